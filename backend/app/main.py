@@ -3,15 +3,17 @@ FastAPI main application for Ghost-Writers.AI backend.
 Implements BE-001 with modular routing and project structure.
 """
 
+import asyncio
 import os
 from fastapi import FastAPI, Request, Depends
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
-# Import routers
+# Import routers (lightweight; the CrewAI stack is loaded lazily by the agents router)
 from app.routers import (
     auth,
     projects,
@@ -21,7 +23,11 @@ from app.routers import (
     agents,
     export,
     tavus,
+    events,
 )
+from app.services import generation_jobs
+from app.utils.compression import CompressionMiddleware
+from app.utils.metrics import REGISTRY, MetricsMiddleware
 
 # Create FastAPI app
 app = FastAPI(
@@ -37,8 +43,25 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Let the editor read generation rate limits
+    expose_headers=[
+        "Retry-After",
+        "X-RateLimit-Limit",
+        "X-RateLimit-Remaining",
+        "X-RateLimit-Reset",
+        "X-RateLimit-Project-Limit",
+        "X-RateLimit-Project-Remaining",
+        "ETag",
+    ],
 )
 
+# Compress prose-heavy responses (inside the metrics middleware, so payload
+# size metrics show the bytes actually sent)
+app.add_middleware(CompressionMiddleware)
+
+# Per-route latency, in-flight and payload size metrics
+app.add_middleware(MetricsMiddleware)
+
 # Include routers
 app.include_router(auth.router, prefix="/auth", tags=["Auth"])
 app.include_router(projects.router, prefix="/projects", tags=["Projects"])
@@ -48,12 +71,45 @@ app.include_router(memory.router, prefix="/memory", tags=["Memory"])
 app.include_router(agents.router, prefix="/agents", tags=["Agents"])
 app.include_router(export.router, prefix="/export", tags=["Export"])
 app.include_router(tavus.router, prefix="/tavus", tags=["Tavus"])
+app.include_router(events.router, prefix="/events", tags=["Events"])
+
+@app.on_event("startup")
+async def preload_crew_service():
+    """
+    Warm the CrewAI stack in a background thread once the server is up, so
+    /health answers immediately and the first generation does not pay the
+    import cost. Disable with GHOSTWRITERS_PRELOAD_CREW=false.
+    """
+    if os.getenv("GHOSTWRITERS_PRELOAD_CREW", "true").lower() != "false":
+        asyncio.get_running_loop().run_in_executor(None, agents.load_crew_service)
+
+@app.on_event("startup")
+async def start_generation_worker():
+    """Claim and run queued background generations in this worker process."""
+    app.state.generation_worker = generation_jobs.GenerationWorker(
+        agents.run_generation_job,
+        concurrency=int(os.getenv("GHOSTWRITERS_GENERATION_CONCURRENCY", "2")),
+        on_finished=agents.publish_generation_finished,
+    )
+    app.state.generation_worker.start()
+
+@app.on_event("shutdown")
+async def stop_generation_worker():
+    """Let in-flight crews finish before the process exits (graceful shutdown)."""
+    worker = getattr(app.state, "generation_worker", None)
+    if worker is not None:
+        await worker.stop(timeout=float(os.getenv("GHOSTWRITERS_SHUTDOWN_GRACE", "300")))
 
 @app.get("/health", tags=["Health"])
 async def health_check():
     """Health check endpoint"""
     return {"status": "healthy", "message": "Ghost-Writers.AI backend is running"}
 
+@app.get("/metrics", tags=["Health"], response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus metrics endpoint"""
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
 @app.get("/", tags=["Root"])
 async def root():
     """Root endpoint"""
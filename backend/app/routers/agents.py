@@ -3,18 +3,36 @@ Agents router for Ghost-Writers.AI.
 Implements CrewAI agent integration as described in BE-006.
 """
 
-from fastapi import APIRouter, Request, Depends, HTTPException, Header, Query, BackgroundTasks
+from fastapi import APIRouter, Request, Response, Depends, HTTPException, Header, Query
 from fastapi.responses import StreamingResponse
-from typing import List, Optional, Dict, Any
+from starlette.concurrency import run_in_threadpool
+from typing import List, Optional, Dict, Any, Literal
 from pydantic import BaseModel, Field
 from datetime import datetime
 import asyncio
+import hashlib
 import json
+import threading
+from uuid import uuid4
 
-from app.services.crew_service import SceneGenerationCrew
+from app.routers.characters import characters_db, voice_line
+from app.services import checkpoints, events, generation_jobs, model_routing
+from app.services.outline_selection import MAX_CANDIDATES, OutlineRace
+from app.services.scheduler import RateLimitExceeded, get_scheduler
+from app.services.single_flight import SingleFlight
+from app.utils.state import collection, edit, transaction
 
 router = APIRouter()
 
+def load_crew_service():
+    """
+    Import the CrewAI service on first use. crewai and its dependency tree
+    take seconds to import, so it is kept off the startup path and either
+    preloaded in the background (see app.main) or loaded here on demand.
+    """
+    from app.services import crew_service
+    return crew_service
+
 # Scene generation model schema
 class SceneGenerationRequest(BaseModel):
     """Scene generation request model"""
@@ -23,6 +41,18 @@ class SceneGenerationRequest(BaseModel):
     word_count: int = Field(ge=500, le=5000, description="Target word count between 500-5000")
     include_characters: List[str] = []
     include_memory: bool = True
+    priority: Optional[Literal["interactive", "batch"]] = Field(
+        None, description="Scheduling lane; defaults to interactive for /generate/scene and batch for queued generations"
+    )
+    chunked_prose: Optional[bool] = Field(
+        None, description="Write the prose beat by beat; defaults to on for long scenes"
+    )
+    outline_candidates: int = Field(
+        1, ge=1, le=MAX_CANDIDATES, description="Draft this many outlines concurrently and continue with the best-scoring one"
+    )
+    outline: Optional[str] = Field(
+        None, description="Use this outline (e.g. a chosen candidate) instead of drafting one"
+    )
 
 class SceneGenerationResponse(BaseModel):
     """Scene generation response model"""
@@ -33,6 +63,7 @@ class SceneGenerationResponse(BaseModel):
     memory_included: bool
     generation_id: str
     created_at: datetime
+    metadata: Dict[str, Any] = {}
 
 class StreamingSceneGenerationResponse(BaseModel):
     """Streaming scene generation response model"""
@@ -42,10 +73,71 @@ class StreamingSceneGenerationResponse(BaseModel):
     memory_included: bool
     created_at: datetime
 
+# Identical generations running in this process, keyed by generation_key()
+scene_generations = SingleFlight()
+# Open progress streams per generation, across workers; the last one to disconnect cancels it
+progress_listeners_db = collection("generation_progress_listeners")
+
+def generation_key(request: SceneGenerationRequest) -> str:
+    """(scene_id, inputs hash) identifying generations that would produce the same draft."""
+    inputs = request.dict(exclude={"priority"})
+    digest = hashlib.sha256(json.dumps(inputs, sort_keys=True).encode()).hexdigest()
+    return f"{request.scene_id}:{digest[:16]}"
+
+# Stub for per-project generation usage aggregates - will be replaced with database
+generation_usage_db = collection("generation_usage")
+
+def record_generation_usage(project_id: str, metadata: Dict[str, Any]) -> None:
+    """Fold one generation's per-task usage into the project's running totals."""
+    with edit(generation_usage_db, project_id, lambda: {"generations": 0, "tasks": {}}) as project_usage:
+        project_usage["generations"] += 1
+        for task_name, usage in metadata.get("tasks", {}).items():
+            totals = project_usage["tasks"].setdefault(task_name, {
+                "runs": 0,
+                "prompt_tokens": 0,
+                "completion_tokens": 0,
+                "wall_time": 0.0,
+                "time_to_first_token": 0.0,
+                "retries": 0,
+                "llm_calls": 0,
+                "fallbacks": 0,
+            })
+            totals["runs"] += 1
+            totals["prompt_tokens"] += usage.get("prompt_tokens", 0)
+            totals["completion_tokens"] += usage.get("completion_tokens", 0)
+            totals["wall_time"] += usage.get("wall_time") or 0.0
+            totals["time_to_first_token"] += usage.get("time_to_first_token") or 0.0
+            totals["retries"] += usage.get("retries", 0)
+            totals["llm_calls"] += usage.get("llm_calls", 0)
+            totals["fallbacks"] = totals.get("fallbacks", 0) + usage.get("fallbacks", 0)
+
+def admit_generation(user_id: str, project_id: str, response: Response) -> None:
+    """Apply the per-user and per-project rate limits, exposing them as response headers."""
+    try:
+        headers = get_scheduler().admit(user_id, project_id)
+    except RateLimitExceeded as exc:
+        raise HTTPException(status_code=429, detail=str(exc), headers=exc.headers)
+    response.headers.update(headers)
+
+async def cancel_on_disconnect(http_request: Request, work, poll_interval: float = 0.5):
+    """Await `work`, cancelling it if the client disconnects first."""
+    task = asyncio.ensure_future(work)
+    while not task.done():
+        await asyncio.wait({task}, timeout=poll_interval)
+        if not task.done() and await http_request.is_disconnected():
+            task.cancel()
+    try:
+        return task.result()
+    except asyncio.CancelledError:
+        # Nobody is listening any more; the status code is for the logs
+        raise HTTPException(status_code=499, detail="Client closed request")
+
 # Scene generation implementations
 @router.post("/generate/scene", response_model=SceneGenerationResponse)
 async def generate_scene(
     request: SceneGenerationRequest,
+    response: Response,
+    http_request: Request,
     x_user_id: Optional[str] = Header(None)
 ):
     """
@@ -62,6 +154,43 @@ async def generate_scene(
             detail="Word count must be between 500 and 5000"
         )
     
+    # A request attaching to an identical generation in flight starts no new work,
+    # so it is not charged against the rate limits
+    if not scene_generations.running(generation_key(request)):
+        admit_generation(x_user_id, request.project_id, response)
+    
+    # Users who navigate away stop paying for the rest of the crew
+    return await cancel_on_disconnect(
+        http_request,
+        run_scene_generation(request, x_user_id, lane=request.priority or "interactive"),
+    )
+
+async def run_scene_generation(
+    request: SceneGenerationRequest,
+    user_id: str,
+    lane: str = "interactive",
+    generation_id: Optional[str] = None,
+    on_task_complete=None,
+    on_prose_chunk=None,
+) -> Dict[str, Any]:
+    """
+    Build the crew for a generation request and run it off the event loop
+    once the scheduler grants a crew slot. Shared by the blocking endpoint
+    and the background job workers.
+    
+    Callers asking for a generation identical to one already in flight
+    attach to it and get the same result instead of starting another crew.
+    Each finished task is checkpointed, so a failed or cancelled attempt
+    (or a retry of the same request) resumes from the last finished task.
+    Cancelling the caller's task stops the crew before its next LLM call.
+    """
+    return await scene_generations.run(
+        generation_key(request),
+        lambda: execute_scene_generation(request, user_id, lane, generation_id, on_task_complete, on_prose_chunk),
+    )
+
+def scene_crew_inputs(request) -> Dict[str, Any]:
+    """Project metadata, character data and memory data for a crew working on `request`'s scene."""
     # Mock project metadata (in a real implementation, we'd fetch this from a database)
     # This should match what's stored by the project endpoints
     project_metadata = {
@@ -71,11 +200,22 @@ async def generate_scene(
         "story_length": "novel"
     }
     
-    # Mock character data based on include_characters list
-    # In a real implementation, we'd fetch these from a character database
+    # Characters from the character store, each with its cached voice profile;
+    # IDs not in the store fall back to mock data
     character_data = []
     if request.include_characters:
         for character_id in request.include_characters:
+            character = characters_db.get(character_id)
+            if character is not None:
+                character_data.append({
+                    "id": character_id,
+                    "name": character["name"],
+                    "traits": ", ".join(character["traits"]),
+                    "motivation": character["motivation"],
+                    "relationships": character.get("relationships"),
+                    "voice": voice_line(character),
+                })
+                continue
             # Mock character data
             character_data.append({
                 "id": character_id,
@@ -104,30 +244,115 @@ async def generate_scene(
             }
         ]
     
-    # Create the CrewAI scene generation crew
-    scene_crew = SceneGenerationCrew(
+    return {
+        "project_metadata": project_metadata,
+        "character_data": character_data,
+        "memory_data": memory_data,
+    }
+
+async def execute_scene_generation(
+    request: SceneGenerationRequest,
+    user_id: str,
+    lane: str,
+    generation_id: Optional[str],
+    on_task_complete,
+    on_prose_chunk,
+) -> Dict[str, Any]:
+    # Off the event loop: a character's first voice profile reads its scenes
+    inputs = await run_in_threadpool(scene_crew_inputs, request)
+    
+    generation_id = generation_id or str(uuid4())
+    key = generation_key(request)
+    checkpoint = checkpoints.load(generation_id, key)
+    if request.outline:
+        # An outline the user chose (or wrote) stands in for the outline task
+        checkpoint = {**checkpoint, "outline": request.outline}
+    cancel_event = threading.Event()
+
+    def task_finished(task_name: str, output: str) -> None:
+        checkpoints.save_task_output(generation_id, key, task_name, output)
+        if on_task_complete:
+            on_task_complete(task_name)
+
+    # Tasks finished by an earlier attempt count as done straight away
+    for task_name in checkpoint:
+        if on_task_complete:
+            on_task_complete(task_name)
+    
+    # Create the CrewAI scene generation crew (first call may import the CrewAI stack)
+    crew_service = await run_in_threadpool(load_crew_service)
+    scene_crew = crew_service.SceneGenerationCrew(
         project_id=request.project_id,
         scene_id=request.scene_id,
         word_count=request.word_count,
         include_characters=request.include_characters,
         include_memory=request.include_memory,
-        project_metadata=project_metadata,
-        character_data=character_data,
-        memory_data=memory_data
+        **inputs,
+        generation_id=generation_id,
+        on_task_complete=task_finished,
+        checkpoint=checkpoint,
+        cancel_event=cancel_event,
+        chunked_prose=request.chunked_prose,
+        on_prose_chunk=on_prose_chunk,
+        outline_candidates=request.outline_candidates,
     )
     
-    # Generate the scene
-    scene_result = scene_crew.generate_scene()
+    # Generate the scene off the event loop (crew execution is blocking),
+    # waiting for a fairly scheduled crew slot first. On cancellation the
+    # slot is freed at once and the crew thread stops at its next LLM call.
+    try:
+        async with get_scheduler().slot(user_id, lane=lane, cost=request.word_count / 1000):
+            scene_result = await run_in_threadpool(scene_crew.generate_scene)
+    except asyncio.CancelledError:
+        cancel_event.set()
+        raise
+    checkpoints.clear(generation_id, key)
+    record_generation_usage(request.project_id, scene_result.get("metadata", {}))
     
     # In a real implementation, we'd store this result in a database
     # For example: await db.scenes.update(request.scene_id, {"text": scene_result["generated_text"]})
     
     return scene_result
 
+def publish_generation_finished(job: Dict[str, Any]) -> None:
+    """Tell the project's editors a background generation finished (completed, failed or cancelled)."""
+    events.publish(
+        job["request"]["project_id"], "generation.finished",
+        generation_id=job["generation_id"], scene_id=job["request"]["scene_id"], status=job["status"],
+    )
+
+async def run_generation_job(job: Dict[str, Any]) -> Dict[str, Any]:
+    """Run a queued background generation, reporting progress as tasks finish."""
+    request = SceneGenerationRequest(**job["request"])
+    generation_id = job["generation_id"]
+    total_tasks = 4 if request.include_memory else 3
+    completed = []
+
+    def on_task_complete(task_name: str) -> None:
+        completed.append(task_name)
+        progress = int(len(completed) * 100 / total_tasks)
+        generation_jobs.update_progress(generation_id, progress)
+        events.publish(
+            request.project_id, "generation.progress",
+            generation_id=generation_id, scene_id=request.scene_id, progress=progress,
+        )
+
+    def on_prose_chunk(index: int, text: str) -> None:
+        generation_jobs.add_chunk(generation_id, index, text)
+
+    return await run_scene_generation(
+        request,
+        job["user_id"],
+        lane=request.priority or "batch",
+        generation_id=generation_id,
+        on_task_complete=on_task_complete,
+        on_prose_chunk=on_prose_chunk,
+    )
+
 @router.post("/generate/scene/stream")
 async def generate_scene_streaming(
     request: SceneGenerationRequest,
-    background_tasks: BackgroundTasks,
+    response: Response,
     x_user_id: Optional[str] = Header(None)
 ):
     """
@@ -137,6 +362,11 @@ async def generate_scene_streaming(
     if not x_user_id:
         raise HTTPException(status_code=401, detail="User ID required")
     
+    # A retry of a generation still queued or running is not charged against the rate limits
+    key = generation_key(request)
+    if generation_jobs.inflight_job(key) is None:
+        admit_generation(x_user_id, request.project_id, response)
+    
     # Create a unique generation ID
     from uuid import uuid4
     from datetime import datetime
@@ -152,39 +382,343 @@ async def generate_scene_streaming(
         created_at=created_at
     )
     
-    # Mock function to simulate generation progress
-    # In a real implementation, you'd have a proper background task that updates a database
-    # or message queue with progress updates that clients can poll
-    async def mock_generation_progress():
-        # In reality, you'd start the actual CrewAI generation in the background here
-        await asyncio.sleep(5)  # Simulate work
-        # Then store the result somewhere the client can retrieve it
-    
-    # Add the background task
-    background_tasks.add_task(mock_generation_progress)
+    # Queue the generation; any worker process sharing the state backend picks it up.
+    # A retry of a generation that is still queued or running attaches to it instead.
+    job = generation_jobs.enqueue_job(
+        generation_id, x_user_id, request.dict(), dedupe_key=key
+    )
+    if job["generation_id"] != generation_id:
+        initial_response.generation_id = job["generation_id"]
+        initial_response.created_at = job["created_at"]
+    else:
+        events.publish(request.project_id, "generation.queued", generation_id=generation_id, scene_id=request.scene_id)
     
     # Return the initial response with the generation ID
     return initial_response
 
+@router.get("/generate/scene/stream/{generation_id}")
+async def stream_generation_progress(
+    generation_id: str,
+    poll_interval: float = Query(0.5, gt=0, le=10),
+    x_user_id: Optional[str] = Header(None)
+):
+    """
+    Stream a queued generation's progress as server-sent events until it
+    finishes. With chunked prose, each beat is streamed as it is written.
+    If every stream of the generation disconnects before then, it is cancelled.
+    """
+    if not x_user_id:
+        raise HTTPException(status_code=401, detail="User ID required")
+    
+    if generation_jobs.get_job(generation_id) is None:
+        raise HTTPException(status_code=404, detail="Generation not found")
+    
+    async def events():
+        finished = False
+        with edit(progress_listeners_db, generation_id, lambda: {"count": 0}) as listeners:
+            listeners["count"] += 1
+        try:
+            last = None
+            sent_chunks = 0
+            while True:
+                job = generation_jobs.get_job(generation_id)
+                for chunk in job.get("chunks", [])[sent_chunks:]:
+                    yield f"data: {json.dumps({'generation_id': generation_id, **chunk})}\n\n"
+                    sent_chunks += 1
+                update = {"generation_id": generation_id, "status": job["status"], "progress": job["progress"]}
+                if update != last:
+                    yield f"data: {json.dumps(update)}\n\n"
+                    last = update
+                if job["status"] not in ("pending", "in_progress"):
+                    finished = True
+                    return
+                await asyncio.sleep(poll_interval)
+        finally:
+            with transaction():
+                with edit(progress_listeners_db, generation_id) as listeners:
+                    listeners["count"] -= 1
+                    remaining = listeners["count"]
+                if not remaining:
+                    del progress_listeners_db[generation_id]
+                    if not finished:
+                        # Nobody is watching any more: stop spending the crew on it
+                        generation_jobs.cancel_job(generation_id)
+    
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+class OutlineDraftRequest(BaseModel):
+    """Outline candidates request model"""
+    scene_id: str
+    project_id: str
+    word_count: int = Field(ge=500, le=5000, description="Target word count of the scene between 500-5000")
+    include_characters: List[str] = []
+    include_memory: bool = True
+    candidates: int = Field(3, ge=2, le=MAX_CANDIDATES, description="Outlines to draft concurrently")
+
+class OutlineChoice(BaseModel):
+    """Chosen outline candidate"""
+    index: int = Field(ge=0)
+
+# Outline candidate sets, keyed by draft_id
+outline_drafts_db = collection("outline_drafts")
+# Races drafting in this process, so a choice cancels their drafts at once
+outline_races: Dict[str, OutlineRace] = {}
+# Drafting tasks, referenced until they finish so they are not garbage collected
+outline_drafting_tasks: set = set()
+
+def outline_choice_made(draft_id: str) -> bool:
+    """Whether drafting should stop: a candidate was chosen (through any worker) or the set is gone."""
+    record = outline_drafts_db.get(draft_id)
+    return record is None or record["status"] in ("chosen", "cancelled")
+
+async def draft_outline_candidates(draft_id: str, request: OutlineDraftRequest, user_id: str) -> None:
+    """Draft a candidate set, storing and announcing each candidate as it finishes."""
+    race = OutlineRace(request.candidates, cancelled=lambda: outline_choice_made(draft_id))
+    outline_races[draft_id] = race
+
+    def on_candidate(candidate: Dict[str, Any]) -> None:
+        with edit(outline_drafts_db, draft_id) as record:
+            record["candidates"][candidate["index"]] = dict(candidate)
+        events.publish(
+            request.project_id, "outline.candidate",
+            draft_id=draft_id, index=candidate["index"], score=candidate["score"]["score"],
+        )
+
+    status, error = "ready", None
+    try:
+        crew_service = await run_in_threadpool(load_crew_service)
+        inputs = await run_in_threadpool(scene_crew_inputs, request)
+        scene_crew = crew_service.SceneGenerationCrew(
+            project_id=request.project_id,
+            scene_id=request.scene_id,
+            word_count=request.word_count,
+            include_characters=request.include_characters,
+            include_memory=request.include_memory,
+            **inputs,
+        )
+        async with get_scheduler().slot(user_id, lane="interactive", cost=request.candidates / 4):
+            await run_in_threadpool(scene_crew.race_outlines, False, race, on_candidate)
+    except Exception as exc:
+        status, error = "failed", str(exc)
+    finally:
+        outline_races.pop(draft_id, None)
+    with edit(outline_drafts_db, draft_id) as record:
+        if record["status"] == "drafting":
+            record["status"] = status if any(c["status"] == "ready" for c in record["candidates"]) else "failed"
+            record["error"] = error
+            for candidate in record["candidates"]:
+                if candidate["status"] == "drafting":
+                    candidate["status"] = "failed"
+        final_status = record["status"]
+    events.publish(request.project_id, "outline.finished", draft_id=draft_id, status=final_status)
+
+@router.post("/generate/outlines", response_model=Dict[str, Any])
+async def draft_outlines(
+    request: OutlineDraftRequest,
+    response: Response,
+    x_user_id: Optional[str] = Header(None)
+):
+    """
+    Draft several outline candidates for a scene concurrently. Candidates
+    are scored locally and announced as "outline.candidate" project events
+    as they finish; read them with GET /generate/outlines/{draft_id}, then
+    choose one, which cancels the drafts still running. Pass the chosen
+    outline to /generate/scene so only it goes on to the prose stages.
+    """
+    if not x_user_id:
+        raise HTTPException(status_code=401, detail="User ID required")
+    
+    admit_generation(x_user_id, request.project_id, response)
+    
+    draft_id = str(uuid4())
+    outline_drafts_db[draft_id] = {
+        "draft_id": draft_id,
+        "scene_id": request.scene_id,
+        "project_id": request.project_id,
+        "status": "drafting",
+        "candidates": [
+            {"index": index, "status": "drafting", "outline": None, "score": None, "seconds": None}
+            for index in range(request.candidates)
+        ],
+        "chosen": None,
+        "error": None,
+        "created_at": datetime.now(),
+    }
+    task = asyncio.get_running_loop().create_task(draft_outline_candidates(draft_id, request, x_user_id))
+    outline_drafting_tasks.add(task)
+    task.add_done_callback(outline_drafting_tasks.discard)
+    
+    return {"draft_id": draft_id, "status": "drafting", "candidates": request.candidates}
+
+@router.get("/generate/outlines/{draft_id}", response_model=Dict[str, Any])
+async def get_outline_candidates(draft_id: str):
+    """The candidate set: each candidate's status, outline and score breakdown."""
+    record = outline_drafts_db.get(draft_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail="Outline draft not found")
+    return record
+
+@router.post("/generate/outlines/{draft_id}/choose", response_model=Dict[str, Any])
+async def choose_outline(
+    draft_id: str,
+    choice: OutlineChoice,
+    x_user_id: Optional[str] = Header(None)
+):
+    """
+    Choose a finished candidate. Drafts still running are cancelled; the
+    response carries the outline to pass to /generate/scene.
+    """
+    if not x_user_id:
+        raise HTTPException(status_code=401, detail="User ID required")
+    
+    with transaction():
+        record = outline_drafts_db.get(draft_id)
+        if record is None:
+            raise HTTPException(status_code=404, detail="Outline draft not found")
+        if record["status"] == "chosen":
+            raise HTTPException(status_code=409, detail=f"Candidate {record['chosen']} was already chosen")
+        if choice.index >= len(record["candidates"]) or record["candidates"][choice.index]["status"] != "ready":
+            raise HTTPException(status_code=409, detail=f"Candidate {choice.index} is not ready")
+        record["status"] = "chosen"
+        record["chosen"] = choice.index
+        for candidate in record["candidates"]:
+            if candidate["status"] == "drafting":
+                candidate["status"] = "cancelled"
+        outline_drafts_db[draft_id] = record
+    
+    race = outline_races.get(draft_id)
+    if race is not None:
+        race.choose(choice.index)
+    events.publish(record["project_id"], "outline.chosen", draft_id=draft_id, index=choice.index)
+    
+    return {
+        "draft_id": draft_id,
+        "chosen": choice.index,
+        "outline": record["candidates"][choice.index]["outline"],
+        "score": record["candidates"][choice.index]["score"],
+    }
+
+@router.post("/generate/cancel/{generation_id}")
+async def cancel_generation(
+    generation_id: str,
+    x_user_id: Optional[str] = Header(None)
+):
+    """
+    Cancel a queued or running generation. No further tasks are scheduled,
+    the in-flight LLM response is discarded and the crew slot is freed.
+    Finished tasks stay checkpointed, so the generation can be resumed.
+    """
+    if not x_user_id:
+        raise HTTPException(status_code=401, detail="User ID required")
+    
+    if generation_jobs.get_job(generation_id) is None:
+        raise HTTPException(status_code=404, detail="Generation not found")
+    
+    job = generation_jobs.cancel_job(generation_id)
+    if job is None:
+        raise HTTPException(status_code=409, detail="Generation already finished")
+    if job["status"] == "cancelled":
+        # A queued job never reaches a worker, so report it here
+        publish_generation_finished(job)
+    
+    return {
+        "generation_id": generation_id,
+        "status": "cancelling" if job["status"] == "in_progress" else job["status"],
+    }
+
+@router.post("/generate/resume/{generation_id}")
+async def resume_generation(
+    generation_id: str,
+    x_user_id: Optional[str] = Header(None)
+):
+    """
+    Queue a failed or cancelled background generation again. It resumes from the last
+    task that finished, so only the remaining LLM calls are made.
+    """
+    if not x_user_id:
+        raise HTTPException(status_code=401, detail="User ID required")
+    
+    job = generation_jobs.get_job(generation_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Generation not found")
+    
+    job = generation_jobs.requeue_job(generation_id)
+    if job is None:
+        raise HTTPException(status_code=409, detail="Only failed or cancelled generations can be resumed")
+    events.publish(
+        job["request"]["project_id"], "generation.queued", generation_id=generation_id, scene_id=job["request"]["scene_id"]
+    )
+    
+    return {
+        "generation_id": generation_id,
+        "status": job["status"],
+        "completed_tasks": sorted(checkpoints.load(generation_id)),
+    }
+
+@router.get("/usage/{project_id}", response_model=Dict[str, Any])
+async def get_generation_usage(
+    project_id: str,
+    x_user_id: Optional[str] = Header(None)
+):
+    """
+    Get aggregated token and latency usage per crew task for a project.
+    Averages are per task run, so the slowest or most expensive agent stands out.
+    """
+    if not x_user_id:
+        raise HTTPException(status_code=401, detail="User ID required")
+
+    project_usage = generation_usage_db.get(project_id, {"generations": 0, "tasks": {}})
+
+    tasks = {}
+    for task_name, totals in project_usage["tasks"].items():
+        runs = totals["runs"] or 1
+        tasks[task_name] = {
+            **totals,
+            "wall_time": round(totals["wall_time"], 4),
+            "time_to_first_token": round(totals["time_to_first_token"], 4),
+            "avg_prompt_tokens": round(totals["prompt_tokens"] / runs, 1),
+            "avg_completion_tokens": round(totals["completion_tokens"] / runs, 1),
+            "avg_wall_time": round(totals["wall_time"] / runs, 4),
+            "avg_time_to_first_token": round(totals["time_to_first_token"] / runs, 4),
+        }
+
+    return {
+        "project_id": project_id,
+        "generations": project_usage["generations"],
+        "tasks": tasks,
+    }
+
+@router.get("/models", response_model=Dict[str, Any])
+async def get_model_routes(x_user_id: Optional[str] = Header(None)):
+    """
+    The model routing policy (model, temperature, timeout and fallbacks per
+    crew task) and the latency, timeouts and errors observed per model.
+    """
+    if not x_user_id:
+        raise HTTPException(status_code=401, detail="User ID required")
+
+    return model_routing.describe_routes()
+
 @router.get("/generate/status/{generation_id}")
 async def get_generation_status(generation_id: str):
     """
     Check the status of a scene generation task by its ID.
     Clients can poll this endpoint after starting a generation.
     """
-    # In a real implementation, this would check a database or message queue
-    # for the current status of the generation task
+    job = generation_jobs.get_job(generation_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Generation not found")
     
-    # Mock implementation
-    import random
-    statuses = ["pending", "in_progress", "completed", "failed"]
-    progress = random.randint(0, 100)
+    if job["status"] == "failed":
+        message = f"Generation failed: {job['error']}"
+    else:
+        message = f"Generation {job['progress']}% complete"
     
     return {
         "generation_id": generation_id,
-        "status": statuses[random.randint(0, 3)],
-        "progress": progress,
-        "message": f"Generation {progress}% complete"
+        "status": job["status"],
+        "progress": job["progress"],
+        "message": message
     }
 
 @router.get("/generate/result/{generation_id}")
@@ -192,15 +726,18 @@ async def get_generation_result(generation_id: str):
     """
     Retrieve the completed scene generation result by its ID.
     """
-    # In a real implementation, this would fetch the result from a database
-    # Here, we'll just return a mock result
+    job = generation_jobs.get_job(generation_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Generation not found")
+    
+    if job["status"] != "completed":
+        raise HTTPException(
+            status_code=409,
+            detail=f"Generation is {job['status']}"
+        )
     
-    # Mock implementation
     return {
+        **job["result"],
         "generation_id": generation_id,
-        "status": "completed",
-        "scene_id": "mock-scene-id",
-        "generated_text": "This is a placeholder for generated scene text. In a real implementation, this would be the actual text generated by CrewAI.",
-        "word_count": 250,
-        "created_at": datetime.now()
+        "status": job["status"],
     }
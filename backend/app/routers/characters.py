@@ -6,7 +6,15 @@ Implements character CRUD operations as described in BE-004.
 from fastapi import APIRouter, Request, Depends, HTTPException, Header, Query
 from typing import List, Optional, Dict, Any
 from pydantic import BaseModel
+from starlette.concurrency import run_in_threadpool
 from datetime import datetime
+import uuid
+
+from app.services import events
+from app.services.voice_profiles import MAX_SCENES, fingerprint, render_profile, voice_profile
+from app.utils.bulk import bulk_response, read_items, validate_items
+from app.utils.http_cache import CachedList
+from app.utils.state import SecondaryIndex, VersionCounter, collection, edit, put_many, transaction
 
 router = APIRouter()
 
@@ -35,26 +43,54 @@ class Character(CharacterBase):
         orm_mode = True
 
 # Stub implementation - will be replaced with database
-characters_db = {}
+characters_db = collection("characters")
+# Character IDs per project
+characters_by_project = SecondaryIndex("characters_by_project", characters_db, "project_id")
+# Character writes per project, for ETags and the cached list responses
+character_versions = VersionCounter("characters")
+character_lists = CachedList("characters", character_versions, Character)
+
+def character_voice(character: Dict[str, Any], refresh: bool = False) -> Dict[str, Any]:
+    """
+    The character's voice profile, derived from its record and its dialogue in
+    the project's recent scenes on first use and cached on the record.
+    """
+    # Imported here: the scenes router imports this module
+    from app.routers.scenes import list_project_scenes, scene_texts
+
+    project_id = character["project_id"]
+
+    def load_texts() -> List[str]:
+        return list(scene_texts(list_project_scenes(project_id)[-MAX_SCENES:]).values())
+
+    def store(profile: Dict[str, Any]) -> None:
+        with edit(characters_db, character["id"]) as stored:
+            # Skip a profile derived from a version the character no longer has
+            if fingerprint(stored) == profile["fingerprint"]:
+                stored["voice_profile"] = profile
+
+    others = [other for other in characters_by_project.records(project_id) if other["id"] != character["id"]]
+    return voice_profile(character, load_texts, others, store, refresh=refresh)
+
+def voice_line(character: Dict[str, Any]) -> str:
+    """The character's voice profile as one prompt line."""
+    return render_profile(character["name"], character_voice(character))
 
 @router.get("/", response_model=List[Character])
 async def get_characters(
+    request: Request,
     project_id: str = Query(..., description="Project ID"),
     x_user_id: Optional[str] = Header(None)
 ):
     """
     Get all characters for a specific project.
+    Supports If-None-Match; the body is only rebuilt after a character write.
     """
     if not x_user_id:
         raise HTTPException(status_code=401, detail="User ID required")
     
-    # Filter characters by project_id
-    project_characters = [
-        character for character in characters_db.values() 
-        if character.get("project_id") == project_id
-    ]
-    
-    return project_characters
+    # Characters of this project, via the project index
+    return character_lists.respond(request, project_id, lambda: characters_by_project.records(project_id))
 
 @router.post("/", response_model=Character)
 async def create_character(
@@ -68,7 +104,6 @@ async def create_character(
         raise HTTPException(status_code=401, detail="User ID required")
     
     # Generate unique ID and timestamp
-    import uuid
     character_id = str(uuid.uuid4())
     created_at = datetime.now()
     
@@ -79,6 +114,87 @@ async def create_character(
         **character.dict()
     }
     
-    characters_db[character_id] = new_character
+    with transaction():
+        characters_db[character_id] = new_character
+        characters_by_project.add([new_character])
+        character_versions.bump(character.project_id)
+    events.publish(character.project_id, "character.created", character_id=character_id)
     
     return new_character
+
+@router.put("/{character_id}", response_model=Character)
+async def update_character(
+    character_id: str,
+    character: CharacterBase,
+    x_user_id: Optional[str] = Header(None)
+):
+    """
+    Replace a character's details. Its cached voice profile is dropped and
+    derived again from the new details on next use.
+    """
+    if not x_user_id:
+        raise HTTPException(status_code=401, detail="User ID required")
+    
+    with transaction():
+        existing = characters_db.get(character_id)
+        if existing is None:
+            raise HTTPException(status_code=404, detail="Character not found")
+        updated = {
+            "id": character_id,
+            "project_id": existing["project_id"],
+            "created_at": existing["created_at"],
+            **character.dict()
+        }
+        characters_db[character_id] = updated
+        character_versions.bump(existing["project_id"])
+    events.publish(existing["project_id"], "character.updated", character_id=character_id)
+    
+    return updated
+
+@router.get("/{character_id}/voice", response_model=Dict[str, Any])
+async def get_character_voice(
+    character_id: str,
+    refresh: bool = Query(False, description="Derive the profile again from the latest scenes"),
+    x_user_id: Optional[str] = Header(None)
+):
+    """
+    Get a character's voice profile and the line prompts use for it.
+    """
+    if not x_user_id:
+        raise HTTPException(status_code=401, detail="User ID required")
+    
+    character = characters_db.get(character_id)
+    if character is None:
+        raise HTTPException(status_code=404, detail="Character not found")
+    
+    profile = await run_in_threadpool(character_voice, character, refresh)
+    return {"character_id": character_id, "profile": profile, "prompt": render_profile(character["name"], profile)}
+
+@router.post("/bulk", response_model=Dict[str, Any])
+async def create_characters_bulk(
+    request: Request,
+    x_user_id: Optional[str] = Header(None)
+):
+    """
+    Create many characters at once from a JSON array or an NDJSON stream.
+    Valid items are stored in one transaction; each item gets a result.
+    """
+    if not x_user_id:
+        raise HTTPException(status_code=401, detail="User ID required")
+    
+    items = await read_items(request)
+    valid, errors = validate_items(items, CharacterCreate)
+    
+    created_at = datetime.now()
+    new_characters = {
+        index: {"id": str(uuid.uuid4()), "created_at": created_at, **character.dict()}
+        for index, character in valid
+    }
+    with transaction():
+        put_many(characters_db, ((character["id"], character) for character in new_characters.values()))
+        characters_by_project.add(new_characters.values())
+        character_versions.bump(*(character["project_id"] for character in new_characters.values()))
+    for project_id, character_ids in events.group_ids(new_characters.values()).items():
+        events.publish(project_id, "characters.created", character_ids=character_ids)
+    
+    return bulk_response(len(items), {index: character["id"] for index, character in new_characters.items()}, errors)
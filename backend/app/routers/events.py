@@ -0,0 +1,103 @@
+"""
+Events router for Ghost-Writers.AI.
+Streams a project's change events to open editors (see app.services.events),
+as server-sent events or over a WebSocket.
+"""
+
+import asyncio
+import os
+from typing import Optional
+
+from fastapi import APIRouter, Header, HTTPException, Query, WebSocket, status
+from fastapi.responses import StreamingResponse
+
+from app.services import events
+from app.utils.fast_json import dumps
+
+router = APIRouter()
+
+# Seconds between keep-alives on an idle stream, so proxies keep it open
+HEARTBEAT_SECONDS = float(os.getenv("GHOSTWRITERS_EVENT_HEARTBEAT", "15"))
+
+
+def format_sse(event: events.Event) -> str:
+    lines = [f"event: {event['type']}", f"data: {dumps(event).decode()}"]
+    if event["id"] is not None:
+        lines.insert(0, f"id: {event['id']}")
+    return "\n".join(lines) + "\n\n"
+
+
+def parse_event_id(value: Optional[str]) -> Optional[int]:
+    try:
+        return int(value) if value else None
+    except ValueError:
+        return None
+
+
+@router.get("/{project_id}")
+async def stream_project_events(
+    project_id: str,
+    user_id: Optional[str] = Query(None, description="User ID, for clients that cannot send headers (EventSource)"),
+    last_event_id: Optional[str] = Query(None, description="Replay events after this one"),
+    x_user_id: Optional[str] = Header(None),
+    last_event_id_header: Optional[str] = Header(None, alias="Last-Event-ID"),
+):
+    """
+    Stream the project's change events as server-sent events. Reconnecting
+    clients (EventSource sends Last-Event-ID) receive the events they
+    missed, or a "resync" event when they should reload instead.
+    """
+    if not (x_user_id or user_id):
+        raise HTTPException(status_code=401, detail="User ID required")
+
+    subscription = events.bus.subscribe(project_id, parse_event_id(last_event_id_header or last_event_id))
+
+    async def stream():
+        try:
+            yield "retry: 2000\n\n"
+            while True:
+                event = await subscription.get(timeout=HEARTBEAT_SECONDS)
+                yield format_sse(event) if event is not None else ": keep-alive\n\n"
+        finally:
+            subscription.close()
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.websocket("/{project_id}/ws")
+async def project_events_socket(
+    websocket: WebSocket,
+    project_id: str,
+    user_id: Optional[str] = Query(None),
+    last_event_id: Optional[str] = Query(None),
+):
+    """
+    Send the project's change events as JSON text messages. Messages from
+    the client are ignored; the stream ends when it disconnects.
+    """
+    if not (websocket.headers.get("x-user-id") or user_id):
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    await websocket.accept()
+
+    subscription = events.bus.subscribe(project_id, parse_event_id(last_event_id))
+
+    async def forward():
+        async for event in subscription:
+            await websocket.send_text(dumps(event).decode())
+
+    async def until_disconnect():
+        while (await websocket.receive())["type"] != "websocket.disconnect":
+            pass
+
+    tasks = [asyncio.ensure_future(forward()), asyncio.ensure_future(until_disconnect())]
+    try:
+        await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for task in tasks:
+            task.cancel()
+        subscription.close()
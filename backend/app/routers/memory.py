@@ -7,6 +7,12 @@ from fastapi import APIRouter, Request, Depends, HTTPException, Header, Query
 from typing import List, Optional, Dict, Any, Literal
 from pydantic import BaseModel
 from datetime import datetime
+import uuid
+
+from app.services import events
+from app.utils.bulk import bulk_response, read_items, validate_items
+from app.utils.http_cache import CachedList
+from app.utils.state import SecondaryIndex, VersionCounter, collection, edit, put_many, transaction
 
 router = APIRouter()
 
@@ -27,31 +33,35 @@ class Memory(MemoryBase):
     scene_id: str
     project_id: str
     created_at: datetime
+    # Suggested by a manuscript import and not yet confirmed by a person
+    candidate: bool = False
     
     class Config:
         from_attributes = True
 
 # Stub implementation - will be replaced with database
-memory_db = {}
+memory_db = collection("memory")
+# Memory IDs per scene
+memory_by_scene = SecondaryIndex("memory_by_scene", memory_db, "scene_id")
+# Memory writes per scene, for ETags and the cached list responses
+memory_versions = VersionCounter("memory")
+memory_lists = CachedList("memory", memory_versions, Memory)
 
 @router.get("/{scene_id}", response_model=List[Memory])
 async def get_memory(
     scene_id: str,
+    request: Request,
     x_user_id: Optional[str] = Header(None)
 ):
     """
     Get all memory entries for a specific scene.
+    Supports If-None-Match; the body is only rebuilt after a memory write.
     """
     if not x_user_id:
         raise HTTPException(status_code=401, detail="User ID required")
     
-    # Filter memory by scene_id
-    scene_memory = [
-        memory for memory in memory_db.values() 
-        if memory.get("scene_id") == scene_id
-    ]
-    
-    return scene_memory
+    # Memory of this scene, via the scene index
+    return memory_lists.respond(request, scene_id, lambda: memory_by_scene.records(scene_id))
 
 @router.post("/", response_model=Memory)
 async def create_memory(
@@ -65,7 +75,6 @@ async def create_memory(
         raise HTTPException(status_code=401, detail="User ID required")
     
     # Generate unique ID and timestamp
-    import uuid
     memory_id = str(uuid.uuid4())
     created_at = datetime.now()
     
@@ -76,10 +85,43 @@ async def create_memory(
         **memory.dict()
     }
     
-    memory_db[memory_id] = new_memory
+    with transaction():
+        memory_db[memory_id] = new_memory
+        memory_by_scene.add([new_memory])
+        memory_versions.bump(memory.scene_id)
+    events.publish(memory.project_id, "memory.created", memory_ids=[memory_id], scene_id=memory.scene_id)
     
     return new_memory
 
+@router.post("/bulk", response_model=Dict[str, Any])
+async def create_memory_bulk(
+    request: Request,
+    x_user_id: Optional[str] = Header(None)
+):
+    """
+    Create many memory entries at once from a JSON array or an NDJSON stream.
+    Valid items are stored in one transaction; each item gets a result.
+    """
+    if not x_user_id:
+        raise HTTPException(status_code=401, detail="User ID required")
+    
+    items = await read_items(request)
+    valid, errors = validate_items(items, MemoryCreate)
+    
+    created_at = datetime.now()
+    new_memories = {
+        index: {"id": str(uuid.uuid4()), "created_at": created_at, **memory.dict()}
+        for index, memory in valid
+    }
+    with transaction():
+        put_many(memory_db, ((memory["id"], memory) for memory in new_memories.values()))
+        memory_by_scene.add(new_memories.values())
+        memory_versions.bump(*(memory["scene_id"] for memory in new_memories.values()))
+    for project_id, memory_ids in events.group_ids(new_memories.values()).items():
+        events.publish(project_id, "memory.created", memory_ids=memory_ids)
+    
+    return bulk_response(len(items), {index: memory["id"] for index, memory in new_memories.items()}, errors)
+
 @router.put("/{memory_id}", response_model=Memory)
 async def update_memory(
     memory_id: str,
@@ -87,7 +129,7 @@ async def update_memory(
     x_user_id: Optional[str] = Header(None)
 ):
     """
-    Update an existing memory entry.
+    Update an existing memory entry. Updating an imported candidate confirms it.
     """
     if not x_user_id:
         raise HTTPException(status_code=401, detail="User ID required")
@@ -96,6 +138,10 @@ async def update_memory(
         raise HTTPException(status_code=404, detail="Memory entry not found")
     
     # Update memory fields
-    memory_db[memory_id].update(memory_update.dict())
+    with transaction():
+        with edit(memory_db, memory_id) as memory:
+            memory.update(memory_update.dict(), candidate=False)
+        memory_versions.bump(memory["scene_id"])
+    events.publish(memory.get("project_id"), "memory.updated", memory_id=memory_id, scene_id=memory["scene_id"])
     
-    return memory_db[memory_id]
+    return memory
@@ -8,6 +8,9 @@ from typing import List, Optional
 from pydantic import BaseModel
 from datetime import datetime
 
+from app.utils.fast_json import fast_json_response
+from app.utils.state import collection
+
 router = APIRouter()
 
 # Project model schema
@@ -33,7 +36,7 @@ class Project(ProjectBase):
         orm_mode = True
 
 # In-memory project data store (will be replaced with database in implementation)
-projects_db = {}
+projects_db = collection("projects")
 
 @router.get("/", response_model=List[Project])
 async def get_projects(x_user_id: Optional[str] = Header(None)):
@@ -49,7 +52,7 @@ async def get_projects(x_user_id: Optional[str] = Header(None)):
         if project.get("user_id") == x_user_id
     ]
     
-    return user_projects
+    return fast_json_response(Project, user_projects)
 
 @router.post("/", response_model=Project)
 async def create_project(
@@ -3,12 +3,25 @@ Scenes router for Ghost-Writers.AI.
 Implements scene management as described in BE-005.
 """
 
-from fastapi import APIRouter, Request, Depends, HTTPException, Header, Query
-from typing import List, Optional, Dict, Any
-from pydantic import BaseModel
+from fastapi import APIRouter, Request, Response, Depends, HTTPException, Header, Query
+from fastapi.concurrency import run_in_threadpool
+from typing import List, Optional, Dict, Any, Tuple, Union
+from typing_extensions import Annotated, Literal
+from pydantic import BaseModel, Field
 from datetime import datetime
+import codecs
 import uuid
 
+from app.routers.characters import characters_by_project
+from app.routers.memory import memory_by_scene, memory_db, memory_versions
+from app.services import events, manuscript_stats, scene_content
+from app.services.manuscript_import import ImportedScene, ManuscriptSplitter
+from app.services.search import SceneSearch
+from app.utils.bulk import bulk_response, read_items, validate_items
+from app.utils.fast_json import fast_json_response
+from app.utils.http_cache import CachedList
+from app.utils.state import SecondaryIndex, VersionCounter, collection, edit, get_many, put_many, transaction
+
 router = APIRouter()
 
 # Scene model schema
@@ -41,31 +54,57 @@ class SceneReorder(BaseModel):
     project_id: str
 
 # Stub implementation - will be replaced with database
-scenes_db = {}
+scenes_db = collection("scenes")
+# Scene IDs per project
+scenes_by_project = SecondaryIndex("scenes_by_project", scenes_db, "project_id")
 # Stub for scene history storage - will be replaced with database
-scene_history_db = {}
+scene_history_db = collection("scene_history")
+# Scene writes per project, for ETags and the cached list responses
+scene_versions = VersionCounter("scenes")
+scene_lists = CachedList("scenes", scene_versions, Scene)
+
+def list_project_scenes(project_id: str) -> List[Dict[str, Any]]:
+    # Scenes of this project, via the project index, sorted by position
+    project_scenes = scenes_by_project.records(project_id)
+    project_scenes.sort(key=lambda x: x.get("position", 0))
+    return project_scenes
+
+def scene_texts(scenes: List[Dict[str, Any]]) -> Dict[str, str]:
+    """Current content of scenes, from the content store (or records written before it existed)."""
+    texts = scene_content.read_many(scene["id"] for scene in scenes)
+    return {scene["id"]: texts.get(scene["id"], scene.get("content", "")) for scene in scenes}
+
+def load_scenes_with_content(project_id: str) -> List[Dict[str, Any]]:
+    scenes = scenes_by_project.records(project_id)
+    texts = scene_texts(scenes)
+    return [{**scene, "content": texts[scene["id"]]} for scene in scenes]
+
+def load_history(scene_ids: List[str]) -> List[Dict[str, Any]]:
+    # Entries are appended inside the write transaction, so list order is commit
+    # order; timestamps are taken before it and can disagree across workers
+    return [
+        entry
+        for history in get_many(scene_history_db, scene_ids)
+        for entry in scene_content.materialize_history(history)
+    ]
+
+# Full-text indexes of scene content (and history) per project
+scene_search = SceneSearch(scene_versions, load_scenes_with_content, load_history)
 
 @router.get("/", response_model=List[Scene])
 async def get_scenes(
+    request: Request,
     project_id: str = Query(..., description="Project ID"),
     x_user_id: Optional[str] = Header(None)
 ):
     """
     Get all scenes for a specific project.
+    Supports If-None-Match; the body is only rebuilt after a scene write.
     """
     if not x_user_id:
         raise HTTPException(status_code=401, detail="User ID required")
     
-    # Filter scenes by project_id
-    project_scenes = [
-        scene for scene in scenes_db.values() 
-        if scene.get("project_id") == project_id
-    ]
-    
-    # Sort by position
-    project_scenes.sort(key=lambda x: x.get("position", 0))
-    
-    return project_scenes
+    return scene_lists.respond(request, project_id, lambda: list_project_scenes(project_id))
 
 @router.post("/", response_model=Scene)
 async def create_scene(
@@ -79,7 +118,6 @@ async def create_scene(
         raise HTTPException(status_code=401, detail="User ID required")
     
     # Generate unique ID and timestamp
-    import uuid
     scene_id = str(uuid.uuid4())
     created_at = datetime.now()
     
@@ -90,10 +128,195 @@ async def create_scene(
         **scene.dict()
     }
     
-    scenes_db[scene_id] = new_scene
+    with transaction():
+        scenes_db[scene_id] = new_scene
+        scenes_by_project.add([new_scene])
+        scene_versions.bump(scene.project_id)
+    events.publish(scene.project_id, "scene.created", scene_id=scene_id, position=new_scene["position"])
     
     return new_scene
 
+@router.post("/bulk", response_model=Dict[str, Any])
+async def create_scenes_bulk(
+    request: Request,
+    x_user_id: Optional[str] = Header(None)
+):
+    """
+    Create many scenes at once from a JSON array or an NDJSON stream.
+    Valid items are stored in one transaction; each item gets a result.
+    """
+    if not x_user_id:
+        raise HTTPException(status_code=401, detail="User ID required")
+    
+    items = await read_items(request)
+    valid, errors = validate_items(items, SceneCreate)
+    
+    created_at = datetime.now()
+    new_scenes = {
+        index: {"id": str(uuid.uuid4()), "created_at": created_at, **scene.dict()}
+        for index, scene in valid
+    }
+    with transaction():
+        put_many(scenes_db, ((scene["id"], scene) for scene in new_scenes.values()))
+        scenes_by_project.add(new_scenes.values())
+        scene_versions.bump(*(scene["project_id"] for scene in new_scenes.values()))
+    for project_id, scene_ids in events.group_ids(new_scenes.values()).items():
+        events.publish(project_id, "scenes.created", scene_ids=scene_ids)
+    
+    return bulk_response(len(items), {index: scene["id"] for index, scene in new_scenes.items()}, errors)
+
+def character_names(project_id: str) -> List[str]:
+    return [character["name"] for character in characters_by_project.records(project_id)]
+
+# Imported scenes written per transaction
+IMPORT_BATCH_SIZE = 25
+
+def store_imported_scenes(project_id: str, batch: List[ImportedScene], first_position: int) -> int:
+    """Write a batch of imported scenes with seeded history (and memory candidates). Returns the count."""
+    timestamp = datetime.now()
+    new_scenes, histories, memories = [], [], []
+    for offset, imported in enumerate(batch):
+        scene_id = str(uuid.uuid4())
+        new_scenes.append({
+            "id": scene_id,
+            "project_id": project_id,
+            "created_at": timestamp,
+            "title": imported.title,
+            "setting": "",
+            "mood": "",
+            "conflict": "",
+            "characters": [],
+            "position": first_position + offset,
+            "chapter": imported.chapter,
+            "chapter_title": imported.chapter_title,
+        })
+        histories.append((scene_id, [{
+            "id": str(uuid.uuid4()),
+            "scene_id": scene_id,
+            "project_id": project_id,
+            "content": imported.content,
+            "revision": 1,
+            "timestamp": timestamp,
+        }]))
+        memories.extend(
+            {
+                "id": str(uuid.uuid4()),
+                "scene_id": scene_id,
+                "project_id": project_id,
+                "created_at": timestamp,
+                "text": text,
+                "category": "Character",
+                "candidate": True,
+            }
+            for text in imported.memory_candidates
+        )
+    with transaction():
+        put_many(scenes_db, ((scene["id"], scene) for scene in new_scenes))
+        put_many(scene_history_db, histories)
+        scenes_by_project.add(new_scenes)
+        contents = {scene["id"]: imported.content for scene, imported in zip(new_scenes, batch)}
+        scene_content.write_many(contents)
+        manuscript_stats.record_scenes(project_id, contents, character_names(project_id))
+        scene_versions.bump(project_id)
+        if memories:
+            put_many(memory_db, ((memory["id"], memory) for memory in memories))
+            memory_by_scene.add(memories)
+            memory_versions.bump(*(memory["scene_id"] for memory in memories))
+    events.publish(project_id, "scenes.created", scene_ids=[scene["id"] for scene in new_scenes])
+    if memories:
+        events.publish(project_id, "memory.created", memory_ids=[memory["id"] for memory in memories])
+    return len(memories)
+
+@router.post("/import", response_model=Dict[str, Any])
+async def import_manuscript(
+    request: Request,
+    project_id: str = Query(..., description="Project ID"),
+    extract_memory: bool = Query(False, description="Store memory candidates for review"),
+    x_user_id: Optional[str] = Header(None)
+):
+    """
+    Import a plaintext or Markdown manuscript streamed as the request body.
+    Chapters and scenes are detected as the text arrives and stored in
+    batches after the project's existing scenes, each with its content as
+    the first history entry.
+    """
+    if not x_user_id:
+        raise HTTPException(status_code=401, detail="User ID required")
+    
+    existing = scenes_by_project.records(project_id)
+    next_position = max((scene.get("position", 0) for scene in existing), default=-1) + 1
+    first_position = next_position
+    
+    splitter = ManuscriptSplitter(extract_memory=extract_memory)
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    pending = ""
+    batch: List[ImportedScene] = []
+    words = 0
+    memory_candidates = 0
+    
+    def take(scenes: List[ImportedScene]) -> None:
+        nonlocal next_position, words, memory_candidates, batch
+        batch.extend(scenes)
+        if len(batch) >= IMPORT_BATCH_SIZE:
+            memory_candidates += store_imported_scenes(project_id, batch, next_position)
+            words += sum(scene.word_count for scene in batch)
+            next_position += len(batch)
+            batch = []
+    
+    async for chunk in request.stream():
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            take(splitter.feed(line))
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        take(splitter.feed(pending))
+    take(splitter.finish())
+    if batch:
+        memory_candidates += store_imported_scenes(project_id, batch, next_position)
+        words += sum(scene.word_count for scene in batch)
+        next_position += len(batch)
+    
+    return {
+        "project_id": project_id,
+        "chapters": splitter.chapter,
+        "scenes_created": next_position - first_position,
+        "first_position": first_position,
+        "words": words,
+        "memory_candidates": memory_candidates,
+    }
+
+@router.get("/search", response_model=Dict[str, Any])
+async def search_scenes(
+    project_id: str = Query(..., description="Project ID"),
+    q: str = Query(..., min_length=1, description='Words to find; quote phrases: "old lighthouse"'),
+    limit: int = Query(20, ge=1, le=200),
+    include_history: bool = Query(False, description="Also search earlier revisions"),
+    x_user_id: Optional[str] = Header(None)
+):
+    """
+    Search the project's scene content. Results are ranked, with snippets
+    and the character offsets of every match.
+    """
+    if not x_user_id:
+        raise HTTPException(status_code=401, detail="User ID required")
+    
+    return await run_in_threadpool(scene_search.search, project_id, q, limit, include_history)
+
+@router.get("/stats", response_model=Dict[str, Any])
+async def get_project_stats(
+    project_id: str = Query(..., description="Project ID"),
+    x_user_id: Optional[str] = Header(None)
+):
+    """
+    Manuscript statistics for a project: scenes, words, dialogue ratio,
+    reading time and character mentions, kept current on every content save.
+    """
+    if not x_user_id:
+        raise HTTPException(status_code=401, detail="User ID required")
+    
+    return manuscript_stats.project_statistics(project_id)
+
 @router.put("/reorder", response_model=Dict[str, Any])
 async def reorder_scenes(
     reorder: SceneReorder,
@@ -110,7 +333,11 @@ async def reorder_scenes(
         raise HTTPException(status_code=404, detail="Scene not found")
     
     # Update scene position
-    scenes_db[scene_id]["position"] = reorder.new_position
+    with transaction():
+        with edit(scenes_db, scene_id) as scene:
+            scene["position"] = reorder.new_position
+        scene_versions.bump(scene["project_id"])
+    events.publish(scene["project_id"], "scene.moved", scene_id=scene_id, position=reorder.new_position)
     
     return {"message": "Scene position updated", "scene_id": scene_id, "new_position": reorder.new_position}
 
@@ -127,6 +354,185 @@ class SceneContentHistory(BaseModel):
     class Config:
         from_attributes = True
 
+class ParagraphSplice(BaseModel):
+    """Replace `delete` paragraphs from `index` with `insert`"""
+    op: Literal["splice"] = "splice"
+    index: int = Field(ge=0)
+    delete: int = Field(0, ge=0)
+    insert: List[str] = []
+
+class TextEdit(BaseModel):
+    """Replace `delete` characters at `offset` in paragraph `index` with `insert`"""
+    op: Literal["edit"]
+    index: int = Field(ge=0)
+    offset: int = Field(ge=0)
+    delete: int = Field(0, ge=0)
+    insert: str = ""
+
+class ScenePatch(BaseModel):
+    """Operations against base_revision; start/end/paragraphs is shorthand for one splice"""
+    base_revision: Optional[int] = None
+    ops: List[Annotated[Union[ParagraphSplice, TextEdit], Field(discriminator="op")]] = []
+    start: Optional[int] = Field(None, ge=0)
+    end: Optional[int] = Field(None, ge=0)
+    paragraphs: List[str] = []
+
+    def operations(self) -> List[Dict[str, Any]]:
+        ops = [op.dict() for op in self.ops]
+        if self.start is not None:
+            end = self.start if self.end is None else self.end
+            ops.append({"op": "splice", "index": self.start, "delete": max(0, end - self.start), "insert": self.paragraphs})
+        return ops
+
+# Patch history entries store operations; every this many entries also store the full content
+HISTORY_SNAPSHOT_EVERY = 20
+
+def project_scene(scene_id: str, project_id: str) -> Dict[str, Any]:
+    """The scene, after checking it exists and belongs to the project."""
+    scene = scenes_db.get(scene_id)
+    if scene is None:
+        raise HTTPException(status_code=404, detail="Scene not found")
+    if scene.get("project_id") != project_id:
+        raise HTTPException(status_code=403, detail="Scene does not belong to specified project")
+    if "content" in scene:
+        # Written before the content store existed: move the content there
+        with transaction():
+            scene_content.write(scene_id, scene["content"])
+            scene = drop_embedded_content(scene_id)
+    return scene
+
+def drop_embedded_content(scene_id: str) -> Dict[str, Any]:
+    with edit(scenes_db, scene_id) as scene:
+        scene.pop("content", None)
+    return scene
+
+def parse_byte_range(header: str, total: int) -> Optional[Tuple[int, int]]:
+    """(first, last) of a single "bytes=" range, or None if unsatisfiable."""
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec or "-" not in spec:
+        raise HTTPException(status_code=400, detail="Only a single bytes range is supported")
+    first, _, last = (part.strip() for part in spec.partition("-"))
+    try:
+        if not first:
+            # Suffix range: the last N bytes
+            length = int(last)
+            return (max(0, total - length), total - 1) if length and total else None
+        first_byte = int(first)
+        last_byte = min(int(last), total - 1) if last else total - 1
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Malformed Range header")
+    return (first_byte, last_byte) if first_byte <= last_byte else None
+
+@router.get("/{scene_id}/content", response_model=Dict[str, Any])
+async def get_scene_content(
+    scene_id: str,
+    request: Request,
+    project_id: str = Query(..., description="Project ID"),
+    start: int = Query(0, ge=0, description="First paragraph"),
+    end: Optional[int] = Query(None, ge=0, description="Paragraph after the last one (default: all)"),
+    x_user_id: Optional[str] = Header(None)
+):
+    """
+    Read a scene's content by paragraph range, or by byte range with a
+    Range header (answered 206 with the raw UTF-8 bytes).
+    """
+    if not x_user_id:
+        raise HTTPException(status_code=401, detail="User ID required")
+    
+    project_scene(scene_id, project_id)
+    
+    range_header = request.headers.get("range")
+    if range_header:
+        manifest = scene_content.manifest(scene_id)
+        total = scene_content.total_bytes(manifest)
+        byte_range = parse_byte_range(range_header, total)
+        if byte_range is None:
+            return Response(status_code=416, headers={"Content-Range": f"bytes */{total}"})
+        _, data = scene_content.read_bytes(scene_id, *byte_range)
+        return Response(
+            data,
+            status_code=206,
+            media_type="text/plain; charset=utf-8",
+            headers={
+                "Content-Range": f"bytes {byte_range[0]}-{byte_range[1]}/{total}",
+                "X-Content-Revision": str(manifest["revision"]),
+            },
+        )
+    
+    manifest, paragraphs = scene_content.read_paragraphs(scene_id, start, end)
+    return {
+        "scene_id": scene_id,
+        "revision": manifest["revision"],
+        "paragraph_count": len(manifest["chunks"]),
+        "total_bytes": scene_content.total_bytes(manifest),
+        "start": start,
+        "end": start + len(paragraphs),
+        "paragraphs": paragraphs,
+    }
+
+@router.patch("/{scene_id}/content", response_model=Dict[str, Any])
+async def patch_scene_content(
+    scene_id: str,
+    scene_patch: ScenePatch,
+    project_id: str = Query(..., description="Project ID"),
+    x_user_id: Optional[str] = Header(None)
+):
+    """
+    Apply paragraph splices and in-paragraph text edits made against
+    base_revision. If other patches landed since, this one is merged over
+    them; it is refused (409) only where it overlaps them. Only changed
+    paragraphs are written, and history records just the operations.
+    """
+    if not x_user_id:
+        raise HTTPException(status_code=401, detail="User ID required")
+    
+    scene = project_scene(scene_id, project_id)
+    timestamp = datetime.now()
+    
+    with transaction():
+        try:
+            stored, applied = scene_content.patch(scene_id, scene_patch.operations(), scene_patch.base_revision)
+        except scene_content.RevisionConflict as exc:
+            raise HTTPException(status_code=409, detail=str(exc))
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=str(exc))
+        content = scene_content.read(scene_id)
+        history_entry = {
+            "id": str(uuid.uuid4()),
+            "scene_id": scene_id,
+            "project_id": project_id,
+            "revision": stored["revision"],
+            "ops": applied,
+            "timestamp": timestamp,
+        }
+        with edit(scene_history_db, scene_id, list) as history:
+            since_snapshot = next(
+                (age for age, entry in enumerate(reversed(history)) if "content" in entry), len(history)
+            )
+            # The first entry with content is the base later patches are rebuilt from
+            if since_snapshot == len(history) or since_snapshot + 1 >= HISTORY_SNAPSHOT_EVERY:
+                history_entry["content"] = content
+            history.append(history_entry)
+        manuscript_stats.record_scenes(project_id, {scene_id: content}, character_names(project_id))
+        previous_version = scene_versions.get(project_id)
+        scene_versions.bump(project_id)
+    # The history index needs the revision's text, which the stored entry may leave to its ops
+    scene_search.update_content(
+        {**scene, "content": content}, {**history_entry, "content": content}, previous_version, previous_version + 1
+    )
+    # Other editors can apply the operations without refetching the scene
+    events.publish(project_id, "scene.content", scene_id=scene_id, revision=stored["revision"], ops=applied)
+    
+    return {
+        "scene_id": scene_id,
+        "revision": stored["revision"],
+        "base_revision": scene_patch.base_revision,
+        "ops": applied,
+        "paragraph_count": len(stored["chunks"]),
+        "total_bytes": scene_content.total_bytes(stored),
+        "timestamp": timestamp,
+    }
+
 @router.post("/{scene_id}/content", response_model=Dict[str, Any])
 async def update_scene_content(
     scene_id: str,
@@ -159,20 +565,29 @@ async def update_scene_content(
         "timestamp": timestamp
     }
     
-    # Initialize history array for this scene if it doesn't exist
-    if scene_id not in scene_history_db:
-        scene_history_db[scene_id] = []
-    
-    # Add to history
-    scene_history_db[scene_id].append(history_entry)
+    with transaction():
+        # Content lives in the chunked content store, not the scene record
+        stored = scene_content.write(scene_id, content_update.content)
+        scene = drop_embedded_content(scene_id)
+        history_entry["revision"] = stored["revision"]
+        
+        # Add to history, initializing the history array for this scene if needed
+        with edit(scene_history_db, scene_id, list) as history:
+            history.append(history_entry)
+        manuscript_stats.record_scenes(project_id, {scene_id: content_update.content}, character_names(project_id))
+        previous_version = scene_versions.get(project_id)
+        scene_versions.bump(project_id)
+    scene_search.update_content(
+        {**scene, "content": content_update.content}, history_entry, previous_version, previous_version + 1
+    )
+    events.publish(project_id, "scene.content", scene_id=scene_id, revision=stored["revision"])
     
-    # Update scene content (would normally be in a separate field)
-    if "content" not in scenes_db[scene_id]:
-        scenes_db[scene_id]["content"] = content_update.content
-    else:
-        scenes_db[scene_id]["content"] = content_update.content
-    
-    return {"message": "Scene content updated", "scene_id": scene_id, "timestamp": timestamp}
+    return {
+        "message": "Scene content updated",
+        "scene_id": scene_id,
+        "timestamp": timestamp,
+        "revision": stored["revision"],
+    }
 
 @router.get("/{scene_id}/history", response_model=List[SceneContentHistory])
 async def get_scene_history(
@@ -193,10 +608,31 @@ async def get_scene_history(
     if scenes_db[scene_id].get("project_id") != project_id:
         raise HTTPException(status_code=403, detail="Scene does not belong to specified project")
     
-    # Get history for scene
-    history = scene_history_db.get(scene_id, [])
+    # Get history for scene (in commit order, see load_history), with content rebuilt for patch entries
+    history = scene_content.materialize_history(scene_history_db.get(scene_id, []))
+    
+    # Newest first
+    history.reverse()
+    
+    return fast_json_response(SceneContentHistory, history)
+
+@router.get("/{scene_id}/stats", response_model=Dict[str, Any])
+async def get_scene_stats(
+    scene_id: str,
+    project_id: str = Query(..., description="Project ID"),
+    x_user_id: Optional[str] = Header(None)
+):
+    """
+    Statistics of a scene's current content.
+    """
+    if not x_user_id:
+        raise HTTPException(status_code=401, detail="User ID required")
+    
+    if scene_id not in scenes_db:
+        raise HTTPException(status_code=404, detail="Scene not found")
     
-    # Sort by timestamp, newest first
-    history.sort(key=lambda x: x.get("timestamp"), reverse=True)
+    # Check project association
+    if scenes_db[scene_id].get("project_id") != project_id:
+        raise HTTPException(status_code=403, detail="Scene does not belong to specified project")
     
-    return history
+    return {"scene_id": scene_id, **manuscript_stats.scene_statistics(scene_id)}
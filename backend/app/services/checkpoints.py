@@ -0,0 +1,52 @@
+"""
+Checkpointed crew task outputs for Ghost-Writers.AI.
+
+Each task's raw output is saved under the generation_id as soon as the task
+finishes. A generation that fails, is cancelled or loses its worker resumes
+from the last finished task instead of paying for every LLM call again.
+
+Checkpoints are also indexed by the generation's inputs key, so a retry of
+the same request (a new generation_id) picks up the unfinished attempt.
+"""
+
+from typing import Dict, Optional
+
+from app.utils.state import collection, edit, transaction
+
+# generation_id -> {task name: raw output}
+generation_checkpoints_db = collection("generation_checkpoints")
+# inputs key -> generation_id of the latest unfinished attempt
+unfinished_generations_db = collection("unfinished_generations")
+
+
+def save_task_output(generation_id: str, key: Optional[str], task_name: str, output: str) -> None:
+    with transaction():
+        with edit(generation_checkpoints_db, generation_id, dict) as outputs:
+            outputs[task_name] = output
+        if key is not None:
+            unfinished_generations_db[key] = generation_id
+
+
+def load(generation_id: str, key: Optional[str] = None) -> Dict[str, str]:
+    """
+    Task outputs already finished for this generation, falling back to an
+    unfinished earlier attempt with the same inputs key.
+    """
+    outputs = generation_checkpoints_db.get(generation_id)
+    if outputs:
+        return outputs
+    previous = unfinished_generations_db.get(key) if key is not None else None
+    if previous is None:
+        return {}
+    return generation_checkpoints_db.get(previous, {})
+
+
+def clear(generation_id: str, key: Optional[str] = None) -> None:
+    """Drop the checkpoint of a generation that completed."""
+    with transaction():
+        generation_checkpoints_db.pop(generation_id, None)
+        if key is None:
+            return
+        previous = unfinished_generations_db.pop(key, None)
+        if previous is not None:
+            generation_checkpoints_db.pop(previous, None)
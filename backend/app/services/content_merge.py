@@ -0,0 +1,166 @@
+"""
+Operational merge of scene content patches for Ghost-Writers.AI.
+
+A patch is a set of operations on a scene's paragraphs, all addressed
+against the same base revision:
+
+    {"op": "splice", "index": 3, "delete": 1, "insert": ["New paragraph."]}
+    {"op": "edit", "index": 5, "offset": 12, "delete": 4, "insert": "rain"}
+
+A splice replaces `delete` paragraphs from `index` with the `insert` list
+(delete 0 inserts, an empty list deletes). An edit replaces `delete`
+characters at `offset` within one paragraph, so fixing a typo sends a few
+bytes. Operations in one patch must not overlap, and paragraphs cannot
+contain blank lines or end with a newline (a splice inserting text with
+blank lines inserts several paragraphs).
+
+When the base revision is behind, the patch is transformed against the
+operations applied since: positions after a concurrent change shift by its
+size, and only operations touching the same paragraph range (or the same
+characters) conflict.
+"""
+
+from typing import Any, Callable, Dict, List, Optional, Tuple, TypeVar
+
+Op = Dict[str, Any]
+Item = TypeVar("Item")
+
+SEPARATOR = "\n\n"
+
+
+class MergeConflict(Exception):
+    """Raised when a patch overlaps a concurrent change."""
+
+
+def _check_paragraph(text: str) -> str:
+    if SEPARATOR in text or text.endswith("\n"):
+        raise ValueError("Paragraphs cannot contain blank lines or end with a newline")
+    return text
+
+
+def _is_splice(op: Op) -> bool:
+    return op["op"] == "splice"
+
+
+def _growth(op: Op) -> int:
+    return len(op["insert"]) - op["delete"]
+
+
+def _order(op: Op) -> Tuple[int, int, int]:
+    # Within one paragraph index, edits come after an insertion before it
+    return (op["index"], 0 if _is_splice(op) else 1, op.get("offset", 0))
+
+
+def validate(ops: List[Op]) -> List[Op]:
+    """Normalized ops sorted by position; raises ValueError if any two overlap."""
+    ops = sorted(
+        (
+            {**op, "insert": [_check_paragraph(part) for text in op["insert"] for part in text.split(SEPARATOR)]}
+            if _is_splice(op) else op
+            for op in ops
+        ),
+        key=_order,
+    )
+    splices = [op for op in ops if _is_splice(op)]
+    for first, second in zip(splices, splices[1:]):
+        if first["index"] == second["index"] or first["index"] + first["delete"] > second["index"]:
+            raise ValueError(f"Overlapping splices at paragraphs {first['index']} and {second['index']}")
+    edits = [op for op in ops if not _is_splice(op)]
+    for edit in edits:
+        for splice in splices:
+            if splice["index"] <= edit["index"] < splice["index"] + splice["delete"]:
+                raise ValueError(f"Edit of paragraph {edit['index']} inside a splice")
+    for first, second in zip(edits, edits[1:]):
+        if first["index"] == second["index"] and (
+            first["offset"] == second["offset"] or first["offset"] + first["delete"] > second["offset"]
+        ):
+            raise ValueError(f"Overlapping edits in paragraph {first['index']}")
+    return ops
+
+
+def _shift(op: Op, applied: Op) -> Tuple[int, int]:
+    """(paragraph shift, character shift) of `op` past `applied`, both against the same document."""
+    if _is_splice(applied):
+        start, end = applied["index"], applied["index"] + applied["delete"]
+        if _is_splice(op):
+            if op["delete"] == 0 and applied["delete"] == 0 and op["index"] == start:
+                # Concurrent insertions at one point: the later patch goes after
+                return _growth(applied), 0
+            if op["index"] + op["delete"] <= start:
+                return 0, 0
+            if op["index"] >= end:
+                return _growth(applied), 0
+        else:
+            if op["index"] < start:
+                return 0, 0
+            if op["index"] >= end:
+                return _growth(applied), 0
+        raise MergeConflict(f"Paragraph {op['index']} was replaced by a concurrent change")
+
+    if _is_splice(op):
+        if op["index"] <= applied["index"] < op["index"] + op["delete"]:
+            raise MergeConflict(f"Paragraph {applied['index']} was edited by a concurrent change")
+        return 0, 0
+    if op["index"] != applied["index"]:
+        return 0, 0
+    growth = len(applied["insert"]) - applied["delete"]
+    if op["delete"] == 0 and applied["delete"] == 0 and op["offset"] == applied["offset"]:
+        return 0, growth
+    if op["offset"] + op["delete"] <= applied["offset"]:
+        return 0, 0
+    if op["offset"] >= applied["offset"] + applied["delete"]:
+        return 0, growth
+    raise MergeConflict(f"Overlapping concurrent edits in paragraph {op['index']}")
+
+
+def transform(ops: List[Op], applied: Optional[List[Op]]) -> List[Op]:
+    """
+    Rewrite `ops` to apply after `applied` (a patch made against the same
+    revision). `applied` is None for a full content replacement, which
+    conflicts with any patch.
+    """
+    if applied is None:
+        raise MergeConflict("The content was replaced by a concurrent save")
+    transformed = []
+    for op in ops:
+        paragraph_shift = character_shift = 0
+        for other in applied:
+            paragraphs, characters = _shift(op, other)
+            paragraph_shift += paragraphs
+            character_shift += characters
+        moved = {**op, "index": op["index"] + paragraph_shift}
+        if not _is_splice(op):
+            moved["offset"] = op["offset"] + character_shift
+        transformed.append(moved)
+    return transformed
+
+
+def edit_text(text: str, op: Op) -> str:
+    if op["offset"] + op["delete"] > len(text):
+        raise ValueError(f"Edit beyond the end of paragraph {op['index']}")
+    return _check_paragraph(text[:op["offset"]] + op["insert"] + text[op["offset"] + op["delete"]:])
+
+
+def apply(
+    paragraphs: List[Item],
+    ops: List[Op],
+    new: Callable[[str], Item] = lambda text: text,
+    edit: Callable[[Item, Op], Item] = edit_text,
+) -> List[Item]:
+    """
+    Paragraphs after applying a validated patch; ValueError if it does not
+    fit them. Paragraphs are strings by default; `new` and `edit` let the
+    content store apply a patch to stored chunks instead.
+    """
+    paragraphs = list(paragraphs)
+    # Back to front, so every position still refers to the original document
+    for op in sorted(ops, key=_order, reverse=True):
+        if _is_splice(op):
+            if op["index"] + op["delete"] > len(paragraphs):
+                raise ValueError(f"Splice beyond the last paragraph ({len(paragraphs)})")
+            paragraphs[op["index"]:op["index"] + op["delete"]] = [new(text) for text in op["insert"]]
+        else:
+            if op["index"] >= len(paragraphs):
+                raise ValueError(f"Edit of missing paragraph {op['index']}")
+            paragraphs[op["index"]] = edit(paragraphs[op["index"]], op)
+    return paragraphs
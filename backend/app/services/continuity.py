@@ -0,0 +1,222 @@
+"""
+Local continuity pre-check for Ghost-Writers.AI.
+
+A deterministic pass over the generated prose that runs before the Memory
+Keeper's LLM call. Established facts (memory entries and character traits,
+motivations and relationships) are indexed by the names and content words
+they mention. The prose is split into passages, and each passage is matched
+against the index:
+
+- a passage that shares a name, or at least two content words, with a
+  memory fact is flagged for review against that fact;
+- a passage that mentions a character is flagged only when it shows a
+  contradiction signal against one of that character's facts: an opposite
+  of a trait word, or a trait word under a negation the fact does not have
+  (or vice versa).
+
+Only flagged passages and the facts they touch are sent to the LLM. When
+nothing is flagged the LLM step can be skipped entirely.
+"""
+
+import re
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Dict, FrozenSet, Iterable, List, Set
+
+STOPWORDS = frozenset("""
+a about above after again against all also am an and any are as at be because been before being
+below between both but by can could did do does doing down during each even ever every few for
+from further had has have having he her here hers herself him himself his how i if in into is it
+its itself just me more most my myself now of off on once only or other our ours ourselves out
+over own same she should so some such than that the their theirs them themselves then there these
+they this those through to too under until up upon very was we were what when where which while
+who whom why will with would you your yours yourself yourselves
+""".split())
+
+NEGATIONS = frozenset("""
+not no never none nobody nothing nowhere neither nor without cannot can't won't don't doesn't
+didn't isn't wasn't aren't weren't hasn't haven't hadn't couldn't wouldn't shouldn't
+""".split())
+
+# Opposites of common trait and state words; each pair works both ways
+_OPPOSITE_PAIRS = (
+    ("brave", "cowardly"), ("brave", "afraid"), ("brave", "fearful"), ("courageous", "cowardly"),
+    ("intelligent", "stupid"), ("intelligent", "foolish"), ("clever", "foolish"), ("wise", "foolish"),
+    ("kind", "cruel"), ("gentle", "cruel"), ("gentle", "violent"), ("calm", "anxious"),
+    ("calm", "panicked"), ("honest", "lying"), ("honest", "dishonest"), ("loyal", "disloyal"),
+    ("loyal", "treacherous"), ("loyal", "betrayed"), ("resourceful", "helpless"),
+    ("alive", "dead"), ("young", "old"), ("strong", "weak"), ("rich", "poor"), ("shy", "outgoing"),
+    ("friend", "enemy"), ("ally", "enemy"), ("trust", "distrust"), ("love", "hate"),
+    ("hidden", "revealed"), ("secret", "revealed"), ("found", "lost"), ("open", "closed"),
+)
+OPPOSITES: Dict[str, Set[str]] = defaultdict(set)
+for _word, _opposite in _OPPOSITE_PAIRS:
+    OPPOSITES[_word].add(_opposite)
+    OPPOSITES[_opposite].add(_word)
+
+# Passages are paragraphs, split further so no passage exceeds this
+MAX_PASSAGE_WORDS = 150
+
+_TOKEN = re.compile(r"[A-Za-z][A-Za-z'-]*")
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+
+def _stem(word: str) -> str:
+    for suffix in ("ing", "ed", "es", "s"):
+        if word.endswith(suffix) and len(word) - len(suffix) >= 4:
+            return word[: -len(suffix)]
+    return word
+
+
+def _analyse(text: str):
+    """(names, content word stems, raw lowercase words) mentioned in `text`."""
+    tokens = _TOKEN.findall(text)
+    lowered = [token.lower() for token in tokens]
+    names = frozenset(
+        low for token, low in zip(tokens, lowered) if token[0].isupper() and low not in STOPWORDS and len(low) > 1
+    )
+    terms = frozenset(_stem(low) for low in lowered if len(low) > 3 and low not in STOPWORDS and low not in NEGATIONS)
+    return names, terms, frozenset(lowered)
+
+
+@dataclass(frozen=True)
+class Fact:
+    """One established fact: a memory entry or one field of a character."""
+
+    source: str  # "memory" or "character"
+    label: str
+    text: str
+    names: FrozenSet[str]
+    terms: FrozenSet[str]
+    words: FrozenSet[str]
+    negated: bool
+
+    @classmethod
+    def build(cls, source: str, label: str, text: str, extra_names: Iterable[str] = ()) -> "Fact":
+        names, terms, words = _analyse(text)
+        return cls(source, label, text, names | frozenset(extra_names), terms, words, bool(words & NEGATIONS))
+
+    def render(self) -> str:
+        return f"- {self.label}: {self.text}"
+
+
+@dataclass
+class Flag:
+    """A passage that needs checking against the facts it touches."""
+
+    index: int
+    passage: str
+    facts: List[Fact] = field(default_factory=list)
+    reasons: List[str] = field(default_factory=list)
+
+
+@dataclass
+class PrecheckReport:
+    passages: int
+    flags: List[Flag]
+
+    @property
+    def relevant_facts(self) -> List[Fact]:
+        seen: Dict[str, Fact] = {}
+        for flag in self.flags:
+            for fact in flag.facts:
+                seen.setdefault(fact.render(), fact)
+        return list(seen.values())
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "passages": self.passages,
+            "flagged_passages": len(self.flags),
+            "relevant_facts": len(self.relevant_facts),
+        }
+
+
+class FactIndex:
+    """Memory and character facts indexed by the names and content words they mention."""
+
+    def __init__(self, facts: List[Fact]):
+        self.facts = facts
+        self._by_key: Dict[str, List[int]] = defaultdict(list)
+        for position, fact in enumerate(facts):
+            for key in fact.names | fact.terms:
+                self._by_key[key].append(position)
+
+    @classmethod
+    def from_context(cls, memory_data: List[Dict[str, Any]], character_data: List[Dict[str, Any]]) -> "FactIndex":
+        facts = []
+        for memory in memory_data:
+            text = memory.get("text", "")
+            if text:
+                facts.append(Fact.build("memory", memory.get("category", "General"), text))
+        for character in character_data:
+            name = character.get("name", "Unknown")
+            name_parts = [part.lower() for part in _TOKEN.findall(name) if part.lower() not in STOPWORDS]
+            for attribute in ("traits", "motivation", "relationships"):
+                text = character.get(attribute)
+                if text:
+                    facts.append(Fact.build("character", f"{name} ({attribute})", str(text), name_parts))
+        return cls(facts)
+
+    def candidates(self, names: FrozenSet[str], terms: FrozenSet[str]) -> Dict[int, int]:
+        """Fact positions sharing a name or term with a passage, with the shared count."""
+        shared: Dict[int, int] = defaultdict(int)
+        for key in names | terms:
+            for position in self._by_key.get(key, ()):
+                shared[position] += 1
+        return shared
+
+
+def split_passages(text: str, max_words: int = MAX_PASSAGE_WORDS) -> List[str]:
+    """Paragraphs, with long ones split at sentence boundaries."""
+    passages = []
+    for paragraph in re.split(r"\n\s*\n", text):
+        sentences = [sentence for sentence in _SENTENCE_END.split(paragraph.strip()) if sentence]
+        current: List[str] = []
+        count = 0
+        for sentence in sentences:
+            words = len(sentence.split())
+            if current and count + words > max_words:
+                passages.append(" ".join(current))
+                current, count = [], 0
+            current.append(sentence)
+            count += words
+        if current:
+            passages.append(" ".join(current))
+    return passages
+
+
+def _contradiction_signals(fact: Fact, terms: FrozenSet[str], words: FrozenSet[str], negated: bool) -> List[str]:
+    reasons = []
+    opposites = sorted({opposite for word in fact.words for opposite in OPPOSITES.get(word, ())} & words)
+    if opposites:
+        reasons.append(f"opposes '{fact.text}' ({', '.join(opposites)})")
+    shared_terms = sorted(fact.terms & terms)
+    if shared_terms and negated != fact.negated:
+        reasons.append(f"negates '{fact.text}' ({', '.join(shared_terms)})")
+    return reasons
+
+
+def precheck(prose: str, index: FactIndex) -> PrecheckReport:
+    """Flag the passages of `prose` that may contradict an indexed fact."""
+    passages = split_passages(prose)
+    flags = []
+    for position, passage in enumerate(passages):
+        names, terms, words = _analyse(passage)
+        negated = bool(words & NEGATIONS)
+        flag = Flag(position, passage)
+        for fact_position, shared in index.candidates(names, terms).items():
+            fact = index.facts[fact_position]
+            shares_name = bool(fact.names & names)
+            if fact.source == "memory":
+                if shares_name or shared >= 2:
+                    flag.facts.append(fact)
+                    shared_keys = sorted((fact.names & names) | (fact.terms & terms))
+                    flag.reasons.append(f"mentions {', '.join(shared_keys)} from '{fact.text}'")
+            elif shares_name:
+                reasons = _contradiction_signals(fact, terms, words, negated)
+                if reasons:
+                    flag.facts.append(fact)
+                    flag.reasons.extend(reasons)
+        if flag.facts:
+            flags.append(flag)
+    return PrecheckReport(passages=len(passages), flags=flags)
@@ -3,20 +3,291 @@ CrewAI service for Ghost-Writers.AI scene generation.
 Implements the AI agent crew system for BE-006.
 """
 
+import math
 import os
+import re
+import threading
+import time
 import uuid
 from datetime import datetime
-from typing import List, Dict, Any, Optional
+from types import SimpleNamespace
+from typing import Callable, List, Dict, Any, Optional
 import logging
 
 from crewai import Agent, Crew, Task, Process, LLM
+from crewai.llms.base_llm import BaseLLM
+from crewai.tasks.task_output import TaskOutput
 from dotenv import load_dotenv
+from pydantic import Field
+
+from app.services import model_routing
+from app.services.outline_selection import OutlineRace
+from app.services.continuity import PrecheckReport, precheck
+from app.services.prompt_context import ProjectContext, compile_context
+from app.utils.metrics import llm_tokens_total, record_span, span
 
 # Load environment variables
 load_dotenv()
 
 logger = logging.getLogger(__name__)
 
+def _estimate_tokens(text: str) -> int:
+    """Rough token estimate (~4 characters per token) for providers that report no usage."""
+    return max(1, len(text) // 4) if text else 0
+
+
+def _messages_text(messages) -> str:
+    if isinstance(messages, str):
+        return messages
+    return "\n".join(str(message.get("content", "")) for message in messages or [])
+
+
+class GenerationCancelled(Exception):
+    """Raised inside the crew once its generation has been cancelled."""
+
+
+class InstrumentedLLM(BaseLLM):
+    """
+    Delegating LLM that records a span for every call made by the crew's
+    agents, labelled with the task that issued it, including token usage.
+    Once `cancel_event` is set no further calls are made, and the response
+    of a call that was in flight is discarded.
+    """
+
+    inner: Any
+    # Shared with the owning crew (typed Any so pydantic keeps the same list)
+    spans: Any = Field(default_factory=list)
+    cancel_event: Any = None
+    # Extra fields for this LLM's call spans (e.g. the outline candidate it drafts)
+    span_tags: Dict[str, Any] = Field(default_factory=dict)
+
+    def call(
+        self,
+        messages,
+        tools=None,
+        callbacks=None,
+        available_functions=None,
+        from_task=None,
+        from_agent=None,
+        **kwargs,
+    ):
+        task_name = getattr(from_task, "name", None) or "unknown"
+        self._check_cancelled()
+        usage_before = self._usage_snapshot()
+        with span("llm_call", task=task_name) as record:
+            record.update(self.span_tags)
+            self.spans.append(record)
+            record["error"] = True
+            response = self.inner.call(
+                messages,
+                tools=tools,
+                callbacks=callbacks,
+                available_functions=available_functions,
+                from_task=from_task,
+                from_agent=from_agent,
+                **kwargs,
+            )
+            record["error"] = False
+            # The model that answered, which differs from the route's after a fallback
+            record["model"] = getattr(self.inner, "last_model", None) or self.inner.model
+            record["fallbacks"] = getattr(self.inner, "last_fallbacks", 0)
+        self._check_cancelled()
+
+        # Token usage for this call: provider-reported delta when available,
+        # otherwise an estimate from the prompt and response text
+        usage_after = self._usage_snapshot()
+        prompt_tokens = completion_tokens = 0
+        if usage_before is not None and usage_after is not None:
+            prompt_tokens = usage_after[0] - usage_before[0]
+            completion_tokens = usage_after[1] - usage_before[1]
+        record["estimated"] = not (prompt_tokens or completion_tokens)
+        if record["estimated"]:
+            prompt_tokens = _estimate_tokens(_messages_text(messages))
+            completion_tokens = _estimate_tokens(response if isinstance(response, str) else str(response))
+        record["prompt_tokens"] = prompt_tokens
+        record["completion_tokens"] = completion_tokens
+        llm_tokens_total.inc(prompt_tokens, task=task_name, type="prompt")
+        llm_tokens_total.inc(completion_tokens, task=task_name, type="completion")
+        return response
+
+    def _check_cancelled(self) -> None:
+        if self.cancel_event is not None and self.cancel_event.is_set():
+            raise GenerationCancelled("Generation was cancelled")
+
+    def _usage_snapshot(self):
+        """Cumulative (prompt, completion) tokens reported by the wrapped LLM, if it tracks them."""
+        summary = getattr(self.inner, "get_token_usage_summary", None)
+        if summary is None:
+            return None
+        try:
+            usage = summary()
+        except Exception:
+            return None
+        return (getattr(usage, "prompt_tokens", 0) or 0, getattr(usage, "completion_tokens", 0) or 0)
+
+    def supports_function_calling(self) -> bool:
+        return getattr(self.inner, "supports_function_calling", lambda: False)()
+
+    def supports_stop_words(self) -> bool:
+        return self.inner.supports_stop_words()
+
+    def get_context_window_size(self) -> int:
+        return self.inner.get_context_window_size()
+
+
+class RoutedLLM(BaseLLM):
+    """
+    LLM for one crew task, following its route (see model_routing): calls
+    go to the route's model and move to a fallback model on timeout. The
+    underlying LLMs are built on first use, one per model.
+    """
+
+    task: str
+    route: Any
+    llms: Any = Field(default_factory=dict)
+    last_model: Optional[str] = None
+    last_fallbacks: int = 0
+
+    def _llm(self, model: str) -> BaseLLM:
+        if model not in self.llms:
+            self.llms[model] = build_llm(model, self.route)
+        return self.llms[model]
+
+    def call(self, messages, tools=None, callbacks=None, available_functions=None, from_task=None, from_agent=None, **kwargs):
+        response, self.last_model, self.last_fallbacks = model_routing.call_with_fallback(
+            self.task,
+            self.route,
+            lambda model: self._llm(model).call(
+                messages,
+                tools=tools,
+                callbacks=callbacks,
+                available_functions=available_functions,
+                from_task=from_task,
+                from_agent=from_agent,
+                **kwargs,
+            ),
+        )
+        return response
+
+    def get_token_usage_summary(self):
+        """Tokens reported by every model this route has called."""
+        prompt_tokens = completion_tokens = 0
+        for llm in self.llms.values():
+            summary = getattr(llm, "get_token_usage_summary", None)
+            try:
+                usage = summary() if summary is not None else None
+            except Exception:
+                usage = None
+            prompt_tokens += getattr(usage, "prompt_tokens", 0) or 0
+            completion_tokens += getattr(usage, "completion_tokens", 0) or 0
+        return SimpleNamespace(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens)
+
+    def supports_function_calling(self) -> bool:
+        return getattr(self._llm(self.route.model), "supports_function_calling", lambda: False)()
+
+    def supports_stop_words(self) -> bool:
+        return self._llm(self.route.model).supports_stop_words()
+
+    def get_context_window_size(self) -> int:
+        return self._llm(self.route.model).get_context_window_size()
+
+# Model of the default route (the large model)
+DEFAULT_MODEL = model_routing.LARGE_MODEL
+
+# Scenes at least this long are written beat by beat (see write_prose_in_beats)
+CHUNKED_PROSE_MIN_WORDS = int(os.getenv("GHOSTWRITERS_CHUNKED_PROSE_MIN_WORDS", "2000"))
+# Words of the most recent prose passed to each beat as rolling context
+ROLLING_CONTEXT_WORDS = 400
+# Beats written past the outline when the model runs short of the target
+MAX_EXTRA_BEATS = 2
+MAX_BEATS = 8
+
+# Continuity report when the local pre-check finds nothing to send to the LLM
+NO_CONTINUITY_ISSUES = "No continuity issues found."
+
+DEFAULT_BEATS = (
+    "Beginning: establish the setting, the mood and each character's objective",
+    "Rising action: complicate the objectives and build tension",
+    "Climax: the key confrontation or revelation of the scene",
+    "Falling action: the immediate consequences and the characters' reactions",
+    "Resolution: close the scene and set up what comes next",
+)
+
+_LIST_ITEM = re.compile(r"^(\s*)(?:[-*+\u2022]|\d+[.)])\s+(.*)$")
+
+
+def outline_beats(outline: str) -> List[str]:
+    """
+    Beats listed under the outline's "Scene Structure" section, one per
+    list item. Falls back to a classic five-beat structure when the outline
+    has no usable section.
+    """
+    beats: List[str] = []
+    heading_indent = None
+    heading_is_item = False
+    beat_indent = 0
+    for line in outline.splitlines():
+        if not line.strip():
+            continue
+        item = _LIST_ITEM.match(line)
+        if heading_indent is None:
+            if "scene structure" in line.lower():
+                heading_indent = len(item.group(1)) if item else 0
+                heading_is_item = item is not None
+            continue
+        if line.lstrip().startswith("#"):
+            break
+        if item is None:
+            continue
+        indent, text = len(item.group(1)), item.group(2)
+        # The next numbered section of the outline ends this one
+        if heading_is_item and indent <= heading_indent:
+            break
+        text = text.replace("**", "").strip()
+        if not text:
+            continue
+        # Nested items are details of the beat above them
+        if beats and indent > beat_indent:
+            beats[-1] += f"; {text}"
+        else:
+            beat_indent = indent if not beats else beat_indent
+            beats.append(text)
+    if len(beats) < 2:
+        return list(DEFAULT_BEATS)
+    return beats[:MAX_BEATS]
+
+
+def _final_answer(response: str) -> str:
+    """Prose from a raw model response, without any ReAct-style preamble."""
+    text = str(response)
+    if "Final Answer:" in text:
+        text = text.split("Final Answer:", 1)[1]
+    return text.strip()
+
+
+def build_llm(model: str, route: model_routing.ModelRoute) -> BaseLLM:
+    """
+    Build one model of a route. GHOSTWRITERS_LLM=local swaps in the
+    deterministic local stand-in (no network, no API keys).
+    """
+    if os.getenv("GHOSTWRITERS_LLM", "").lower() == "local":
+        from app.services.local_llm import LocalLLM
+        return LocalLLM(
+            model=model,
+            latency=float(os.getenv("GHOSTWRITERS_LOCAL_LLM_LATENCY", "0")),
+            timeout=route.timeout,
+        )
+    return LLM(model=model, temperature=route.temperature, timeout=route.timeout)
+
+def routed_llm(task: str) -> BaseLLM:
+    """The LLM a crew task calls, following the routing policy."""
+    route = model_routing.route_for(task)
+    return RoutedLLM(model=route.model, temperature=route.temperature, task=task, route=route)
+
+def default_llm() -> BaseLLM:
+    """LLM of the default route."""
+    return routed_llm("default")
+
 class SceneGenerationCrew:
     """Crew for scene generation using CrewAI."""
 
@@ -30,6 +301,16 @@ class SceneGenerationCrew:
         project_metadata: Optional[Dict[str, Any]] = None,
         character_data: Optional[List[Dict[str, Any]]] = None,
         memory_data: Optional[List[Dict[str, Any]]] = None,
+        llm: Optional[BaseLLM] = None,
+        generation_id: Optional[str] = None,
+        on_task_complete: Optional[Callable[[str, str], None]] = None,
+        checkpoint: Optional[Dict[str, str]] = None,
+        cancel_event: Optional[threading.Event] = None,
+        chunked_prose: Optional[bool] = None,
+        on_prose_chunk: Optional[Callable[[int, str], None]] = None,
+        continuity_precheck: bool = True,
+        context: Optional[ProjectContext] = None,
+        outline_candidates: int = 1,
     ):
         """
         Initialize the scene generation crew.
@@ -43,6 +324,21 @@ class SceneGenerationCrew:
             project_metadata: Additional project metadata
             character_data: Character data for included characters
             memory_data: Memory data if include_memory is True
+            llm: LLM to use for every task instead of the routed models (e.g. a local stand-in)
+            generation_id: Use this ID instead of generating one (e.g. a queued job's ID)
+            on_task_complete: Called with each task's name and raw output as it finishes
+            checkpoint: Raw outputs of tasks an earlier attempt of this generation
+                already finished, by task name; those tasks are not run again
+            cancel_event: Set to stop the crew; no further LLM calls are made
+            chunked_prose: Write the prose beat by beat (default: for scenes of
+                at least CHUNKED_PROSE_MIN_WORDS words)
+            on_prose_chunk: Called with each beat's index and prose as it finishes
+            continuity_precheck: Run the local continuity pre-check and send only
+                flagged passages to the Memory Keeper (skipping it if none)
+            context: Precompiled project context; compiled (or fetched from the
+                cache) from the metadata, character and memory data by default
+            outline_candidates: Draft this many outlines concurrently and continue
+                with the one the local scorer picks (see outline_selection)
         """
         self.project_id = project_id
         self.scene_id = scene_id
@@ -52,13 +348,37 @@ class SceneGenerationCrew:
         self.project_metadata = project_metadata or {}
         self.character_data = character_data or []
         self.memory_data = memory_data or []
-        self.generation_id = str(uuid.uuid4())
-
-        # Convenience: default model once
-        self.llm_model = LLM(
-            model="groq/meta-llama/llama-4-maverick-17b-128e-instruct",
-            temperature=0.6
-        )
+        self.generation_id = generation_id or str(uuid.uuid4())
+        self.on_task_complete = on_task_complete
+        self.checkpoint = dict(checkpoint or {})
+        self.chunked_prose = word_count >= CHUNKED_PROSE_MIN_WORDS if chunked_prose is None else chunked_prose
+        self.on_prose_chunk = on_prose_chunk
+        self.continuity_precheck = continuity_precheck
+        self.precheck_summary: Optional[Dict[str, Any]] = None
+        self.outline_candidates = outline_candidates
+        self.outline_selection: Optional[Dict[str, Any]] = None
+        # Rendered once per distinct project data and shared by every task
+        self.context = context or compile_context(self.project_metadata, self.character_data, self.memory_data)
+        # Timing spans (kickoff, tasks, LLM calls) for this generation
+        self.spans: List[Dict[str, Any]] = []
+        self._task_started_at: Optional[float] = None
+
+        self.llm = llm
+        self.cancel_event = cancel_event
+        # Task name -> the LLM its agent calls, wrapped so every call is timed
+        self._llms: Dict[str, InstrumentedLLM] = {}
+
+    def llm_for(self, task: str) -> InstrumentedLLM:
+        """The task's routed LLM (or the LLM given to the crew), built once per crew."""
+        if task not in self._llms:
+            inner = self.llm or routed_llm(task)
+            self._llms[task] = InstrumentedLLM(
+                model=inner.model,
+                inner=inner,
+                spans=self.spans,
+                cancel_event=self.cancel_event,
+            )
+        return self._llms[task]
 
     # ------------------------------------------------------------------
     # Agent helpers
@@ -73,7 +393,7 @@ class SceneGenerationCrew:
                 "and how to create satisfying scene arcs within the larger story context."
             ),
             verbose=True,
-            llm=self.llm_model,
+            llm=self.llm_for("outline"),
         )
 
     def character_coach_agent(self) -> Agent:
@@ -86,7 +406,7 @@ class SceneGenerationCrew:
                 "stay true to their established traits and motivations across scenes."
             ),
             verbose=True,
-            llm=self.llm_model,
+            llm=self.llm_for("character"),
         )
 
     def prose_stylist_agent(self) -> Agent:
@@ -99,7 +419,7 @@ class SceneGenerationCrew:
                 "the desired tone and style while making the text flow elegantly."
             ),
             verbose=True,
-            llm=self.llm_model,
+            llm=self.llm_for("prose"),
         )
 
     def memory_keeper_agent(self) -> Agent:
@@ -112,7 +432,7 @@ class SceneGenerationCrew:
                 "a cohesive story."
             ),
             verbose=True,
-            llm=self.llm_model,
+            llm=self.llm_for("continuity"),
         )
 
     # ------------------------------------------------------------------
@@ -121,41 +441,16 @@ class SceneGenerationCrew:
     def outline_task(self) -> Task:
         """Create the scene outline task."""
 
-        # Project‑level context
-        genre = self.project_metadata.get("genre", "unspecified")
-        audience = self.project_metadata.get("audience", "unspecified")
-        style = self.project_metadata.get("style", "unspecified")
-
-        # Character context
-        character_context = ""
-        if self.character_data:
-            character_context = "Characters in this scene:\n"
-            for char in self.character_data:
-                character_context += f"- {char.get('name', 'Unknown')}: {char.get('traits', '')}\n"
-                if "motivation" in char:
-                    character_context += f"  Motivation: {char.get('motivation')}\n"
-                if "relationships" in char:
-                    character_context += f"  Relationships: {char.get('relationships')}\n"
-
-        # Memory context
-        memory_context = ""
-        if self.include_memory and self.memory_data:
-            memory_context = "Important context from previous scenes:\n"
-            for memory in self.memory_data:
-                category = memory.get("category", "General")
-                text = memory.get("text", "")
-                memory_context += f"- {category}: {text}\n"
+        context = self.context
+        memory_context = context.memory if self.include_memory else ""
 
         return Task(
             description=(
-                f"Create a detailed scene outline for a {genre} story aimed at {audience} readers, "
-                f"written in a {style} style. The final scene should be approximately {self.word_count} words long.\n\n"
-                f"**Project Context:**\n"
-                f"- Genre: {genre}\n"
-                f"- Audience: {audience}\n"
-                f"- Style: {style}\n\n"
-                f"**Character Context:**\n{character_context}\n"
-                f"**Memory Context (Previous Events):**\n{memory_context}\n"
+                f"Create a detailed scene outline for a {context.genre} story aimed at {context.audience} readers, "
+                f"written in a {context.style} style. The final scene should be approximately {self.word_count} words long.\n\n"
+                f"**Project Context:**\n{context.project}\n\n"
+                f"**Characters in this scene:**\n{context.characters or 'None specified.'}\n\n"
+                f"**Memory Context (Previous Events):**\n{memory_context or 'None.'}\n\n"
                 "**Your Task:** Create a detailed scene outline focusing on these key elements:\n"
                 "1.  **Setting & Atmosphere:** Describe the location, time, and mood.\n"
                 "2.  **Character Objectives:** What does each character want in this scene?\n"
@@ -164,6 +459,7 @@ class SceneGenerationCrew:
                 "5.  **Scene Structure:** A clear beginning, rising action, climax, falling action, and resolution for the scene.\n\n"
                 "Include at least 5 specific, tangible details or events that MUST be present in the final scene prose."
             ),
+            name="outline",
             agent=self.plot_architect_agent(),
             expected_output=(
                 "A detailed scene outline in MARKDOWN format. It must include sections for: \n"
@@ -181,14 +477,17 @@ class SceneGenerationCrew:
         return Task(
             description=(
                 "Based on the provided scene outline, develop the character interactions, dialogue, and internal thoughts.\n\n"
+                f"**Characters in this scene:**\n{self.context.characters or 'None specified.'}\n\n"
                 "**Your Task:** Focus on the following aspects:\n"
-                "1.  **Distinctive Voices:** Write dialogue that clearly reflects each character's unique personality, background, and current emotional state.\n"
+                "1.  **Distinctive Voices:** Write dialogue that clearly reflects each character's unique personality, background, and current emotional state. "
+                "Where a character has a voice profile (\"voice:\" with sample lines), follow it rather than inventing a new voice.\n"
                 "2.  **Plot Advancement:** Ensure dialogue and actions move the scene's plot forward and contribute to character goals.\n"
                 "3.  **Show, Don't Tell:** Reveal emotions and intentions through subtext, actions, and reactions, rather than explicit statements.\n"
                 "4.  **Consistency:** Maintain consistency with established character traits, motivations, and relationships (referencing provided context).\n"
                 "5.  **Scene Arc:** Ensure each character involved has a mini-arc or development within the scene, however small.\n\n"
                 "Include at least one specific moment of dialogue OR action for each primary character that reveals a key aspect of their personality or motivation."
             ),
+            name="character",
             agent=self.character_coach_agent(),
             expected_output=(
                 "A document detailing character interactions for the scene. It must include: \n"
@@ -207,13 +506,14 @@ class SceneGenerationCrew:
             description=(
                 f"Using the scene outline and character details, write the full scene prose.\n\n"
                 f"**Your Task:** Ensure your writing adheres to these requirements:\n"
-                "1.  **Style & Tone:** Match the project's specified style ({self.project_metadata.get('style', 'unspecified')}) and tone.\n"
+                f"1.  **Style & Tone:** Match the project's specified style ({self.context.style}) and tone.\n"
                 "2.  **Sensory Details:** Include vivid descriptions engaging multiple senses (sight, sound, smell, touch) to immerse the reader.\n"
                 "3.  **Pacing & Flow:** Vary sentence structure and paragraph length to control pacing; ensure smooth transitions.\n"
                 f"4.  **Word Count:** Target approximately {self.word_count} words for the final scene.\n"
-                "5.  **Genre Conventions:** Use language and tropes appropriate for the genre ({self.project_metadata.get('genre', 'unspecified')}).\n\n"
+                f"5.  **Genre Conventions:** Use language and tropes appropriate for the genre ({self.context.genre}).\n\n"
                 "Integrate dialogue naturally. Blend action, description, and character thought seamlessly."
             ),
+            name="prose",
             agent=self.prose_stylist_agent(),
             expected_output=(
                 f"The complete scene text, formatted as prose (paragraphs, dialogue, etc.). \n"
@@ -223,21 +523,20 @@ class SceneGenerationCrew:
             context=[outline, character],
         )
 
-    def continuity_task(self, prose: Task) -> Task:
-        """Create the continuity check task."""
-
-        # Prepare context strings from instance data
-        if self.include_memory and self.memory_data:
-            # Convert list of dicts to a simple string representation for the prompt
-            memory_context = "\n".join([str(item) for item in self.memory_data])
-        else:
-            memory_context = "Memory context was not requested or is unavailable."
+    def continuity_task(self, prose: Task, report: Optional[PrecheckReport] = None) -> Task:
+        """
+        Create the continuity check task. Given a pre-check report, the task
+        only sees the flagged passages and the facts they touch instead of
+        the whole scene and every memory and character.
+        """
+        if report is not None:
+            return self._focused_continuity_task(report)
 
-        if self.character_data:
-            # Convert list of dicts to a simple string representation for the prompt
-            character_context = "\n".join([str(item) for item in self.character_data])
-        else:
-            character_context = "Character context is unavailable."
+        # Compact blocks from the precompiled project context
+        memory_context = (self.context.memory if self.include_memory else "") or (
+            "Memory context was not requested or is unavailable."
+        )
+        character_context = self.context.characters or "Character context is unavailable."
 
         return Task(
             description=(
@@ -250,6 +549,7 @@ class SceneGenerationCrew:
                 "3.  **World Building:** Does the scene maintain consistency with established world rules or details?\n\n"
                 "Identify any specific sentences or elements in the prose that conflict with the provided context."
             ),
+            name="continuity",
             agent=self.memory_keeper_agent(),
             expected_output=(
                 "A brief report in MARKDOWN format. \n"
@@ -259,11 +559,40 @@ class SceneGenerationCrew:
             context=[prose],
         )
 
+    def _focused_continuity_task(self, report: PrecheckReport) -> Task:
+        facts = "\n".join(fact.render() for fact in report.relevant_facts)
+        passages = "\n\n".join(
+            f"[Passage {flag.index + 1}] {flag.passage}\n(Flagged: {'; '.join(flag.reasons)})"
+            for flag in report.flags
+        )
+        return Task(
+            description=(
+                "Review the flagged passages of a generated scene against the established facts they touch. "
+                "A local pre-check selected these passages; the rest of the scene touches none of the facts.\n\n"
+                f"**Established Facts:**\n{facts}\n\n"
+                f"**Flagged Passages:**\n{passages}\n\n"
+                "**Your Task:** For each passage, decide whether it actually contradicts a fact, "
+                "a character's established traits or relationships, or the world's rules. "
+                "Flags are candidates only; many will be consistent."
+            ),
+            name="continuity",
+            agent=self.memory_keeper_agent(),
+            expected_output=(
+                "A brief report in MARKDOWN format. \n"
+                "- If inconsistencies are found: List each inconsistency, citing the passage number, the conflicting element and the relevant fact.\n"
+                f"- If NO inconsistencies are found: State '{NO_CONTINUITY_ISSUES}'"
+            ),
+            context=[],
+        )
+
     # ------------------------------------------------------------------
     # Crew assembly & execution
     # ------------------------------------------------------------------
-    def create_crew(self) -> Crew:
-        """Create the scene generation crew."""
+    def build_tasks(self) -> List[Task]:
+        """
+        Build every task of the pipeline. Checkpointed tasks get their earlier
+        output back, which later tasks read as context.
+        """
 
         # Build tasks once so contexts refer to the same objects
         outline = self.outline_task()
@@ -271,39 +600,258 @@ class SceneGenerationCrew:
         prose = self.prose_task(outline, character)
 
         tasks = [outline, character, prose]
-        agents = [
-            outline.agent,
-            character.agent,
-            prose.agent,
-        ]
-
         if self.include_memory:
-            continuity = self.continuity_task(prose)
-            tasks.append(continuity)
-            agents.append(continuity.agent)
-
-        return Crew(agents=agents, tasks=tasks, verbose=True, process=Process.sequential)
+            tasks.append(self.continuity_task(prose))
+
+        for task in tasks:
+            if task.name in self.checkpoint:
+                task.output = self._task_output(task, self.checkpoint[task.name])
+        return tasks
+
+    @staticmethod
+    def _task_output(task: Task, raw: str) -> TaskOutput:
+        return TaskOutput(
+            description=task.description,
+            name=task.name,
+            expected_output=task.expected_output,
+            raw=raw,
+            agent=task.agent.role,
+        )
 
-    def generate_scene(self) -> Dict[str, Any]:
-        """Execute the scene generation process and return the result."""
+    def create_crew(self, tasks: Optional[List[Task]] = None) -> Optional[Crew]:
+        """
+        Create the scene generation crew for the tasks not yet finished.
+        Returns None when the checkpoint already covers every task.
+        """
+        if tasks is None:
+            tasks = self.build_tasks()
+        tasks = [task for task in tasks if task.output is None]
+        if not tasks:
+            return None
+        agents = [task.agent for task in tasks]
+
+        return Crew(
+            agents=agents,
+            tasks=tasks,
+            verbose=True,
+            process=Process.sequential,
+            task_callback=self._on_task_complete,
+        )
 
-        crew = self.create_crew()
+    def _kickoff(self, tasks: List[Task]) -> Dict[str, str]:
+        """Run the unfinished tasks among `tasks`; returns their raw outputs by name."""
+        crew = self.create_crew(tasks)
+        if crew is None:
+            return {}
         result = crew.kickoff()  # CrewOutput
+        return {task_output.name: task_output.raw for task_output in getattr(result, "tasks_output", [])}
+
+    def write_prose_in_beats(self, prose: Task) -> str:
+        """
+        Write the prose task as one LLM call per outline beat instead of one
+        call for the whole scene. Each beat sees the outline, the character
+        notes and the tail of the prose so far, gets its share of the
+        remaining word budget, and is reported through on_prose_chunk as
+        soon as it is written. Stops once the target word count is reached.
+        """
+        outline, character = (task.output.raw for task in prose.context)
+        beats = outline_beats(outline)
+        system_prompt = prose.agent.backstory
+
+        chunks: List[str] = []
+        written = 0
+        index = 0
+        while written < self.word_count and index < len(beats) + MAX_EXTRA_BEATS:
+            beat = beats[index] if index < len(beats) else "Continue the scene toward its resolution"
+            beats_left = max(1, len(beats) - index)
+            target = math.ceil((self.word_count - written) / beats_left)
+            story_so_far = " ".join(" ".join(chunks).split()[-ROLLING_CONTEXT_WORDS:])
+            prompt = (
+                f"Write approximately {target} words of scene prose for this beat: {beat}\n\n"
+                f"**Scene Outline:**\n{outline}\n\n"
+                f"**Character Details:**\n{character}\n\n"
+                f"**Project Context:** {self.context.project}\n\n"
+                f"**Story So Far (most recent part):**\n{story_so_far or 'This is the opening of the scene.'}\n\n"
+                "Continue seamlessly from the story so far without repeating or summarising it. "
+                "Output only the prose for this beat."
+            )
+            recorded = len(self.spans)
+            response = self.llm_for("prose").call(
+                [{"role": "system", "content": system_prompt}, {"role": "user", "content": prompt}],
+                from_task=prose,
+                from_agent=prose.agent,
+            )
+            # Calls for different beats are not retries of each other (see usage_summary)
+            for record in self.spans[recorded:]:
+                if record["name"] == "llm_call":
+                    record["beat"] = index
+            chunk = _final_answer(response)
+            chunks.append(chunk)
+            written += len(chunk.split())
+            if self.on_prose_chunk:
+                self.on_prose_chunk(index, chunk)
+            index += 1
+
+        return "\n\n".join(chunks)
+
+    def draft_outline(self, index: int, count: int, cancel_event) -> str:
+        """
+        Draft one outline candidate in a single LLM call, stopping if
+        `cancel_event` is set. Each candidate is asked for a distinct
+        approach, so the candidates differ.
+        """
+        outline = self.outline_task()
+        prompt = (
+            f"{outline.description}\n\n"
+            f"**Expected Output:**\n{outline.expected_output}\n\n"
+            f"This is candidate {index + 1} of {count}: take a distinct approach to the scene's "
+            "structure and central conflict. Output only the outline."
+        )
+        # Each draft gets its own LLM, so concurrent calls do not mix token usage
+        inner = self.llm or routed_llm("outline")
+        llm = InstrumentedLLM(
+            model=inner.model, inner=inner, spans=self.spans, cancel_event=cancel_event,
+            # Candidates are not retries of each other (see usage_summary)
+            span_tags={"candidate": index},
+        )
+        response = llm.call(
+            [{"role": "system", "content": outline.agent.backstory}, {"role": "user", "content": prompt}],
+            from_task=outline,
+            from_agent=outline.agent,
+        )
+        return _final_answer(response)
 
-        # Ensure we get the output from the PROSE task (always index 2)
-        # The final result from kickoff() might be the continuity task if enabled.
-        prose_task_output = None
-        if result and hasattr(result, 'tasks_output') and len(result.tasks_output) > 2:
-            prose_task_output = result.tasks_output[2] # Get the TaskOutput for the prose task
+    def race_outlines(
+        self,
+        automatic: bool = True,
+        race: Optional[OutlineRace] = None,
+        on_candidate: Optional[Callable[[Dict[str, Any]], None]] = None,
+    ) -> OutlineRace:
+        """
+        Draft outline candidates concurrently (outline_candidates of them,
+        or as many as `race` has). Automatic races pick one by score;
+        otherwise the caller chooses through the race once candidates arrive.
+        """
+        race = race or OutlineRace(
+            self.outline_candidates,
+            cancelled=lambda: self.cancel_event is not None and self.cancel_event.is_set(),
+        )
+        names = [character.get("name", "") for character in self.character_data]
+        race.run(lambda index, cancel: self.draft_outline(index, race.count, cancel), names, automatic, on_candidate)
+        return race
 
-        # Extract the raw text from the prose task's output
-        raw_text = ""
-        if prose_task_output:
-            raw_text = prose_task_output.raw if hasattr(prose_task_output, "raw") else str(prose_task_output)
-        else:
+    def check_continuity(self, prose: Task, continuity: Task) -> str:
+        """
+        Run the continuity check on the finished prose. The local pre-check
+        goes first; the Memory Keeper only sees what it flags, and is not
+        called at all when nothing is flagged.
+        """
+        if not self.continuity_precheck:
+            return self._kickoff([continuity]).get("continuity", "")
+
+        report = precheck(prose.output.raw, self.context.facts(self.include_memory))
+        self.precheck_summary = {**report.summary(), "llm_skipped": not report.flags}
+        if not report.flags:
+            continuity.output = self._task_output(continuity, NO_CONTINUITY_ISSUES)
+            self._on_task_complete(continuity.output)
+            return continuity.output.raw
+        return self._kickoff([self.continuity_task(prose, report)]).get("continuity", "")
+
+    def _on_task_complete(self, output) -> None:
+        """Record a task span. Tasks run sequentially, so each one starts when the previous finished."""
+        now = time.perf_counter()
+        started_at = self._task_started_at if self._task_started_at is not None else now
+        task_name = getattr(output, "name", None) or "unknown"
+        self.spans.append(record_span("task", started_at, now - started_at, task=task_name))
+        self._task_started_at = now
+        if self.on_task_complete:
+            self.on_task_complete(task_name, getattr(output, "raw", str(output)))
+
+    def usage_summary(self) -> Dict[str, Any]:
+        """
+        Summarise token usage and latency per task from the recorded spans.
+
+        For each task: prompt/completion tokens, wall time, time to first
+        token, retries (failed LLM calls and repeated calls for the same task,
+        prose beat or outline candidate), outline candidates drafted, the
+        models that answered and how many calls fell back to another model.
+        Calls are not
+        streamed, so time to first token is measured from task start to the
+        first successful LLM response.
+        """
+        tasks: Dict[str, Dict[str, Any]] = {}
+        for task_span in (entry for entry in self.spans if entry["name"] == "task"):
+            name = task_span["task"]
+            calls = [entry for entry in self.spans if entry["name"] == "llm_call" and entry.get("task") == name]
+            answered = [call for call in calls if not call.get("error")]
+            first_response = answered[0] if answered else None
+            # One answered call per task, per beat of chunked prose or per outline candidate is expected
+            expected = len({(call.get("beat"), call.get("candidate")) for call in answered})
+            tasks[name] = {
+                "prompt_tokens": sum(call.get("prompt_tokens", 0) for call in calls),
+                "completion_tokens": sum(call.get("completion_tokens", 0) for call in calls),
+                "wall_time": round(task_span["duration"], 4),
+                "time_to_first_token": (
+                    round(first_response["start"] + first_response["duration"] - task_span["start"], 4)
+                    if first_response else None
+                ),
+                "retries": len(calls) - expected,
+                "llm_calls": len(calls),
+                "candidates": len({call["candidate"] for call in calls if call.get("candidate") is not None}),
+                "estimated_tokens": any(call.get("estimated") for call in calls),
+                "models": sorted({call["model"] for call in calls if call.get("model")}),
+                "fallbacks": sum(1 for call in calls if call.get("fallbacks")),
+            }
+
+        kickoff = next((entry for entry in self.spans if entry["name"] == "crew_kickoff"), None)
+        totals = {
+            "prompt_tokens": sum(task["prompt_tokens"] for task in tasks.values()),
+            "completion_tokens": sum(task["completion_tokens"] for task in tasks.values()),
+            "wall_time": round(kickoff["duration"], 4) if kickoff and "duration" in kickoff else None,
+            "retries": sum(task["retries"] for task in tasks.values()),
+            "llm_calls": sum(task["llm_calls"] for task in tasks.values()),
+            "fallbacks": sum(task["fallbacks"] for task in tasks.values()),
+        }
+        return {"tasks": tasks, "totals": totals}
+
+    def generate_scene(self) -> Dict[str, Any]:
+        """Execute the scene generation process and return the result."""
+
+        tasks = self.build_tasks()
+        outputs = dict(self.checkpoint)
+        prose = next(task for task in tasks if task.name == "prose")
+        continuity = next((task for task in tasks if task.name == "continuity"), None)
+        with span("crew_kickoff") as kickoff_span:
+            self.spans.append(kickoff_span)
+            self._task_started_at = time.perf_counter()
+            outline = tasks[0]
+            if self.outline_candidates > 1 and outline.output is None:
+                race = self.race_outlines()
+                self.outline_selection = race.summary()
+                if race.chosen is None:
+                    raise GenerationCancelled("Generation was cancelled")
+                outline.output = self._task_output(outline, race.candidates[race.chosen]["outline"])
+                self._on_task_complete(outline.output)
+                outputs["outline"] = outline.output.raw
+            if not self.chunked_prose:
+                outputs.update(self._kickoff(tasks[:tasks.index(prose) + 1]))
+            else:
+                # Crew runs the tasks before the prose; the prose is written beat by beat
+                outputs.update(self._kickoff(tasks[:tasks.index(prose)]))
+                if prose.output is None:
+                    prose.output = self._task_output(prose, self.write_prose_in_beats(prose))
+                    self._on_task_complete(prose.output)
+                    outputs["prose"] = prose.output.raw
+            if continuity is not None and continuity.output is None:
+                outputs["continuity"] = self.check_continuity(prose, continuity)
+
+        # Use the output of the PROSE task; the final result might be the
+        # continuity task if enabled.
+        raw_text = outputs.get("prose")
+        if raw_text is None:
             # Fallback or error handling if prose output isn't found
-            raw_text = str(result.raw) if hasattr(result, "raw") else str(result)
-            logger.warning(f"Could not find prose task output (index 2) in CrewOutput. Falling back to final result. Result: {raw_text[:100]}...")
+            raw_text = outputs[tasks[-1].name] if tasks[-1].name in outputs else ""
+            logger.warning(f"Could not find prose task output. Falling back to final result. Result: {raw_text[:100]}...")
 
         word_count = len(raw_text.split())
 
@@ -315,4 +863,11 @@ class SceneGenerationCrew:
             "memory_included": self.include_memory,
             "generation_id": self.generation_id,
             "created_at": datetime.now(),
+            "metadata": {
+                **self.usage_summary(),
+                "resumed_tasks": sorted(self.checkpoint),
+                "prose_mode": "chunked" if self.chunked_prose else "single",
+                "continuity_precheck": self.precheck_summary,
+                "outline_selection": self.outline_selection,
+            },
         }
\ No newline at end of file
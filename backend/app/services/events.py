@@ -0,0 +1,212 @@
+"""
+Per-project change events for Ghost-Writers.AI.
+
+Open editors subscribe to a project's event stream (over SSE or a
+WebSocket, see app.routers.events) instead of polling its lists. Writes in
+the scenes, characters, memory and agents routers publish a compact event
+once their transaction has committed:
+
+    {"id": 42, "type": "scene.content", "project_id": "...",
+     "data": {"scene_id": "...", "revision": 7}, "timestamp": 1700000000.0}
+
+Events carry ids and revisions, not records; clients refetch what they
+show, which the list ETags make cheap. Content patches also carry their
+operations, so other editors of the scene can apply them directly.
+
+Publishing goes through a broker, which hands each event to every
+process's EventBus; the bus fans it out to that process's subscribers.
+LocalBroker is the in-process stand-in: it is enough for a single worker,
+and a networked broker with the same publish/subscribe interface carries
+events between workers.
+
+Each project keeps its last REPLAY_SIZE events, so a client reconnecting
+with the id of the last event it saw (SSE Last-Event-ID) receives what it
+missed. A client too far behind, or whose queue overflows because it is
+not reading, gets a "resync" event and should reload.
+"""
+
+import asyncio
+import itertools
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional, Set
+
+from app.utils.metrics import REGISTRY
+
+events_published_total = REGISTRY.counter(
+    "events_published_total", "Project change events published, by type."
+)
+event_subscribers = REGISTRY.gauge(
+    "event_subscribers", "Open project event streams in this process."
+)
+event_overflows_total = REGISTRY.counter(
+    "event_overflows_total", "Event streams told to resync because they fell behind."
+)
+
+# Events kept per project for reconnecting clients
+REPLAY_SIZE = int(os.getenv("GHOSTWRITERS_EVENT_REPLAY", "200"))
+# Events buffered per subscriber before it is told to resync
+QUEUE_SIZE = int(os.getenv("GHOSTWRITERS_EVENT_QUEUE", "256"))
+
+Event = Dict[str, Any]
+
+
+class LocalBroker:
+    """In-process broker: every published event goes to this process's handlers."""
+
+    def __init__(self):
+        self._handlers: List[Callable[[Event], None]] = []
+
+    def subscribe(self, handler: Callable[[Event], None]) -> None:
+        self._handlers.append(handler)
+
+    def publish(self, event: Event) -> None:
+        for handler in self._handlers:
+            handler(event)
+
+
+class Subscription:
+    """One client's stream of a project's events, read with `async for`."""
+
+    def __init__(self, bus: "EventBus", project_id: str, backlog: List[Event]):
+        self.bus = bus
+        self.project_id = project_id
+        self._loop = asyncio.get_running_loop()
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._pending = 0
+        self._overflowed = False
+        for event in backlog:
+            self._put(event)
+
+    def _put(self, event: Event) -> None:
+        # Called on the subscriber's event loop
+        if self._overflowed:
+            return
+        if self._pending >= QUEUE_SIZE:
+            self._overflowed = True
+            event_overflows_total.inc()
+            event = resync_event(self.project_id)
+        self._pending += 1
+        self._queue.put_nowait(event)
+
+    def deliver(self, event: Event) -> None:
+        """Queue an event from any thread."""
+        try:
+            self._loop.call_soon_threadsafe(self._put, event)
+        except RuntimeError:
+            # The subscriber's loop has shut down; it is about to unsubscribe
+            pass
+
+    async def get(self, timeout: Optional[float] = None) -> Optional[Event]:
+        """The next event, or None if none arrives within `timeout` seconds."""
+        try:
+            event = await asyncio.wait_for(self._queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+        self._pending -= 1
+        return event
+
+    def close(self) -> None:
+        self.bus._unsubscribe(self)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> Event:
+        return await self.get()
+
+
+def resync_event(project_id: str) -> Event:
+    return {"id": None, "type": "resync", "project_id": project_id, "data": {}, "timestamp": time.time()}
+
+
+class EventBus:
+    """Fans a broker's events out to the subscribers of each project in this process."""
+
+    def __init__(self, broker=None):
+        self.broker = broker or LocalBroker()
+        self.broker.subscribe(self._deliver)
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._subscribers: Dict[str, Set[Subscription]] = defaultdict(set)
+        self._replay: Dict[str, Deque[Event]] = defaultdict(lambda: deque(maxlen=REPLAY_SIZE))
+        # project_id -> id of the newest event dropped from its replay buffer
+        self._evicted: Dict[str, int] = {}
+        self._last_id = 0
+
+    def publish(self, project_id: Optional[str], event_type: str, **data: Any) -> None:
+        """Publish a change to a project's subscribers. Call after the write has committed."""
+        if not project_id:
+            return
+        with self._lock:
+            event_id = next(self._ids)
+        events_published_total.inc(type=event_type)
+        self.broker.publish({
+            "id": event_id,
+            "type": event_type,
+            "project_id": project_id,
+            "data": data,
+            "timestamp": time.time(),
+        })
+
+    def _deliver(self, event: Event) -> None:
+        with self._lock:
+            replay = self._replay[event["project_id"]]
+            if len(replay) == replay.maxlen:
+                self._evicted[event["project_id"]] = replay[0]["id"]
+            replay.append(event)
+            self._last_id = max(self._last_id, event["id"])
+            subscribers = list(self._subscribers.get(event["project_id"], ()))
+        for subscription in subscribers:
+            subscription.deliver(event)
+
+    def subscribe(self, project_id: str, last_event_id: Optional[int] = None) -> Subscription:
+        """
+        Subscribe to a project's events. With last_event_id, events after it
+        are replayed first, or a resync event if they are no longer kept.
+        Close the subscription when the client goes away.
+        """
+        with self._lock:
+            backlog: List[Event] = []
+            if last_event_id is not None:
+                if last_event_id < self._evicted.get(project_id, 0) or last_event_id > self._last_id:
+                    # Missed events are no longer kept, or the id came from another process
+                    backlog = [resync_event(project_id)]
+                else:
+                    backlog = [event for event in self._replay.get(project_id, ()) if event["id"] > last_event_id]
+            subscription = Subscription(self, project_id, backlog)
+            self._subscribers[project_id].add(subscription)
+        event_subscribers.inc()
+        return subscription
+
+    def _unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.project_id)
+            if subscribers is None or subscription not in subscribers:
+                return
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._subscribers[subscription.project_id]
+        event_subscribers.dec()
+
+    def subscriber_count(self, project_id: str) -> int:
+        with self._lock:
+            return len(self._subscribers.get(project_id, ()))
+
+
+# The process-wide bus used by the routers
+bus = EventBus()
+
+
+def publish(project_id: Optional[str], event_type: str, **data: Any) -> None:
+    bus.publish(project_id, event_type, **data)
+
+
+def group_ids(records: Iterable[Dict[str, Any]]) -> Dict[str, List[str]]:
+    """Record IDs grouped by project, for one event per project after a bulk write."""
+    grouped: Dict[str, List[str]] = defaultdict(list)
+    for record in records:
+        grouped[record["project_id"]].append(record["id"])
+    return grouped
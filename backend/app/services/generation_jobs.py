@@ -0,0 +1,305 @@
+"""
+Background scene generation jobs for Ghost-Writers.AI.
+
+Jobs live in shared state (see app.utils.state), so with the SQLite backend
+any worker process can claim a queued generation and every worker can report
+its status and result. Claims carry a lease, which the worker renews while
+the crew runs: if a worker dies mid-crew, the job is picked up again once
+the lease expires. A worker whose lease lapsed (e.g. a stalled process) no
+longer holds the claim, so it stops its crew and does not record a result.
+
+Cancelling a queued job removes it from the queue; cancelling a running one
+flags it, and the worker running it cancels the crew on its next poll.
+"""
+
+import asyncio
+import logging
+import os
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from app.utils.state import collection, edit, transaction
+
+logger = logging.getLogger(__name__)
+
+# Full job records, keyed by generation_id
+generation_jobs_db = collection("generation_jobs")
+# generation_id -> queued timestamp, for jobs waiting for a worker
+generation_queue_db = collection("generation_queue")
+# generation_id -> lease expiry timestamp, for jobs a worker has claimed
+generation_running_db = collection("generation_running")
+# dedupe key -> generation_id, for queued or running jobs
+generation_inflight_db = collection("generation_inflight")
+
+LEASE_SECONDS = float(os.getenv("GHOSTWRITERS_GENERATION_LEASE", "900"))
+# Leases are renewed this many times per lease period while the job runs
+LEASE_RENEWALS = 3
+
+
+def enqueue_job(
+    generation_id: str,
+    user_id: str,
+    request: Dict[str, Any],
+    dedupe_key: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Queue a generation request for the next free worker. With a dedupe_key,
+    a queued or running job with the same key is returned instead of
+    queueing a duplicate.
+    """
+    job = {
+        "generation_id": generation_id,
+        "user_id": user_id,
+        "request": request,
+        "status": "pending",
+        "progress": 0,
+        # Prose beats streamed so far ({"chunk": index, "text": ...})
+        "chunks": [],
+        "result": None,
+        "error": None,
+        "worker": None,
+        "cancel_requested": False,
+        "dedupe_key": dedupe_key,
+        "created_at": datetime.now(),
+    }
+    with transaction():
+        if dedupe_key is not None:
+            existing = generation_jobs_db.get(generation_inflight_db.get(dedupe_key))
+            if existing is not None and existing["status"] in ("pending", "in_progress"):
+                return existing
+            generation_inflight_db[dedupe_key] = generation_id
+        generation_jobs_db[generation_id] = job
+        generation_queue_db[generation_id] = time.time()
+    return job
+
+
+def inflight_job(dedupe_key: str) -> Optional[Dict[str, Any]]:
+    """The queued or running job with this dedupe key, if any."""
+    job = generation_jobs_db.get(generation_inflight_db.get(dedupe_key))
+    if job is not None and job["status"] in ("pending", "in_progress"):
+        return job
+    return None
+
+
+def requeue_job(generation_id: str) -> Optional[Dict[str, Any]]:
+    """Queue a failed or cancelled job again. Returns None for any other job."""
+    with transaction():
+        job = generation_jobs_db.get(generation_id)
+        if job is None or job["status"] not in ("failed", "cancelled"):
+            return None
+        job.update(status="pending", error=None, worker=None, cancel_requested=False, chunks=[])
+        generation_jobs_db[generation_id] = job
+        generation_queue_db[generation_id] = time.time()
+        if job.get("dedupe_key") is not None:
+            generation_inflight_db[job["dedupe_key"]] = generation_id
+    return job
+
+
+def get_job(generation_id: str) -> Optional[Dict[str, Any]]:
+    return generation_jobs_db.get(generation_id)
+
+
+def claim_job(worker_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Atomically take the oldest queued job, or a job whose worker's lease
+    expired. Returns None when there is nothing to do.
+    """
+    now = time.time()
+    with transaction():
+        expired = [job_id for job_id, expires_at in generation_running_db.items() if expires_at < now]
+        for job_id in expired:
+            logger.warning("Generation %s lease expired; requeueing", job_id)
+            del generation_running_db[job_id]
+            generation_queue_db[job_id] = now
+            with edit(generation_jobs_db, job_id) as job:
+                job["claim"] = None
+
+        queued = generation_queue_db.items()
+        if not queued:
+            return None
+        generation_id, _ = min(queued, key=lambda item: item[1])
+        del generation_queue_db[generation_id]
+        generation_running_db[generation_id] = now + LEASE_SECONDS
+
+        with edit(generation_jobs_db, generation_id) as job:
+            job["status"] = "in_progress"
+            job["worker"] = worker_id
+            # Identifies this claim, so a worker whose lease lapsed cannot renew or finish it
+            job["claim"] = uuid.uuid4().hex
+        return job
+
+
+def renew_lease(generation_id: str, claim: str) -> bool:
+    """Extend the lease of a claimed job. Returns False if the claim is no longer held."""
+    with transaction():
+        job = generation_jobs_db.get(generation_id)
+        if job is None or job.get("claim") != claim or generation_id not in generation_running_db:
+            return False
+        generation_running_db[generation_id] = time.time() + LEASE_SECONDS
+    return True
+
+
+def update_progress(generation_id: str, progress: int) -> None:
+    with edit(generation_jobs_db, generation_id) as job:
+        job["progress"] = progress
+
+
+def add_chunk(generation_id: str, index: int, text: str) -> None:
+    with edit(generation_jobs_db, generation_id) as job:
+        chunks = job.setdefault("chunks", [])
+        # A beat written again (e.g. after a lease expiry) replaces the old one
+        del chunks[index:]
+        chunks.append({"chunk": index, "text": text})
+
+
+def cancel_job(generation_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Cancel a queued or running job. Queued jobs are cancelled at once;
+    running ones are flagged for their worker. Returns None for jobs that
+    already finished.
+    """
+    with transaction():
+        job = generation_jobs_db.get(generation_id)
+        if job is None or job["status"] not in ("pending", "in_progress"):
+            return None
+        if job["status"] == "pending":
+            generation_queue_db.pop(generation_id, None)
+            finish_job(generation_id, cancelled=True)
+            return generation_jobs_db[generation_id]
+        job["cancel_requested"] = True
+        generation_jobs_db[generation_id] = job
+    return job
+
+
+def finish_job(
+    generation_id: str,
+    result: Optional[Dict[str, Any]] = None,
+    error: Optional[str] = None,
+    cancelled: bool = False,
+    claim: Optional[str] = None,
+) -> bool:
+    """
+    Record a job's result (or error, or cancellation) and release its lease.
+    With a claim, nothing is recorded (and False is returned) unless the
+    caller still holds it.
+    """
+    with transaction():
+        current = generation_jobs_db.get(generation_id)
+        if claim is not None and (current is None or current.get("claim") != claim):
+            logger.warning("Generation %s is no longer claimed by this run; discarding its outcome", generation_id)
+            return False
+        with edit(generation_jobs_db, generation_id) as job:
+            if cancelled:
+                job["status"] = "cancelled"
+            else:
+                job["status"] = "failed" if error else "completed"
+            job["progress"] = 100 if job["status"] == "completed" else job["progress"]
+            job["result"] = result
+            job["error"] = error
+            job["claim"] = None
+        generation_running_db.pop(generation_id, None)
+        if generation_inflight_db.get(job.get("dedupe_key")) == generation_id:
+            del generation_inflight_db[job["dedupe_key"]]
+    return True
+
+
+class GenerationWorker:
+    """
+    Per-process loop that claims queued jobs and runs them, at most
+    `concurrency` at a time. stop() stops claiming and lets in-flight crews
+    finish, so a graceful shutdown never drops a generation.
+    """
+
+    def __init__(
+        self,
+        run_job: Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]],
+        concurrency: int = 2,
+        poll_interval: float = 0.5,
+        on_finished: Optional[Callable[[Dict[str, Any]], None]] = None,
+    ):
+        self.run_job = run_job
+        # Called with the finished job record once its outcome is stored
+        self.on_finished = on_finished
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.worker_id = f"{os.getpid()}"
+        self._stopping = asyncio.Event()
+        self._loop_task: Optional[asyncio.Task] = None
+        self._lease_task: Optional[asyncio.Task] = None
+        # generation_id -> task running it, and the claim it runs under
+        self._in_flight: Dict[str, asyncio.Task] = {}
+        self._claims: Dict[str, str] = {}
+
+    def start(self) -> None:
+        self._loop_task = asyncio.get_running_loop().create_task(self._run())
+        self._lease_task = asyncio.get_running_loop().create_task(self._keep_leases())
+
+    async def _run(self) -> None:
+        while not self._stopping.is_set():
+            self._cancel_requested()
+            job = None
+            if len(self._in_flight) < self.concurrency:
+                job = claim_job(self.worker_id)
+            if job is None:
+                try:
+                    await asyncio.wait_for(self._stopping.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            generation_id = job["generation_id"]
+            task = asyncio.get_running_loop().create_task(self._execute(job))
+            self._in_flight[generation_id] = task
+            self._claims[generation_id] = job["claim"]
+            task.add_done_callback(lambda _, generation_id=generation_id: self._forget(generation_id))
+
+    def _forget(self, generation_id: str) -> None:
+        self._in_flight.pop(generation_id, None)
+        self._claims.pop(generation_id, None)
+
+    async def _keep_leases(self) -> None:
+        """Renew the leases of running jobs; stop any whose claim was lost."""
+        while True:
+            await asyncio.sleep(LEASE_SECONDS / LEASE_RENEWALS)
+            for generation_id, task in list(self._in_flight.items()):
+                if not renew_lease(generation_id, self._claims[generation_id]) and not task.done():
+                    logger.warning("Lost the lease on generation %s; stopping its crew", generation_id)
+                    task.cancel()
+
+    def _cancel_requested(self) -> None:
+        """Cancel in-flight jobs that were cancelled through any worker."""
+        for generation_id, task in list(self._in_flight.items()):
+            job = get_job(generation_id)
+            if job is not None and job.get("cancel_requested") and not task.done():
+                logger.info("Cancelling generation %s", generation_id)
+                task.cancel()
+
+    async def _execute(self, job: Dict[str, Any]) -> None:
+        generation_id = job["generation_id"]
+        claim = job["claim"]
+        try:
+            result = await self.run_job(job)
+        except asyncio.CancelledError:
+            recorded = finish_job(generation_id, cancelled=True, claim=claim)
+        except Exception as exc:
+            logger.exception("Generation %s failed", generation_id)
+            recorded = finish_job(generation_id, error=str(exc), claim=claim)
+        else:
+            recorded = finish_job(generation_id, result=result, claim=claim)
+        if recorded and self.on_finished is not None:
+            try:
+                self.on_finished(get_job(generation_id))
+            except Exception:
+                logger.exception("Finished-generation callback failed for %s", generation_id)
+
+    async def stop(self, timeout: Optional[float] = None) -> None:
+        """Stop claiming new jobs and wait for in-flight ones to finish."""
+        self._stopping.set()
+        if self._loop_task is not None:
+            await self._loop_task
+        if self._in_flight:
+            logger.info("Waiting for %d in-flight generation(s) to finish", len(self._in_flight))
+            await asyncio.wait(set(self._in_flight.values()), timeout=timeout)
+        if self._lease_task is not None:
+            self._lease_task.cancel()
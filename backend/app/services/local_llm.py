@@ -0,0 +1,86 @@
+"""
+Deterministic local LLM stand-in for Ghost-Writers.AI.
+Used by tests, benchmarks and offline development so the crew can run
+without network access or API keys. Enable it for the API server with
+GHOSTWRITERS_LLM=local.
+"""
+
+import hashlib
+import re
+import time
+from typing import Any, Optional
+
+from crewai.llms.base_llm import BaseLLM
+
+# Small fixed vocabulary so output is stable across runs and platforms
+_VOCABULARY = (
+    "the", "night", "wind", "carried", "a", "voice", "across", "harbor", "she",
+    "turned", "toward", "light", "and", "remembered", "promise", "he", "had",
+    "kept", "silence", "between", "them", "grew", "heavy", "with", "unspoken",
+    "questions", "door", "opened", "slowly", "footsteps", "echoed", "stone",
+)
+
+
+def _requested_words(prompt: str, default: int) -> int:
+    """Honour 'approximately N words' style instructions in the prompt."""
+    match = re.search(r"approximately (\d+) words", prompt)
+    return int(match.group(1)) if match else default
+
+
+class LocalLLM(BaseLLM):
+    """
+    Deterministic LLM: the response is derived from a hash of the prompt.
+
+    Attributes:
+        latency: Seconds to sleep per call, to simulate model time
+        default_words: Response length when the prompt does not ask for one
+        timeout: Seconds after which a call slower than that raises TimeoutError,
+            as a provider's client would
+    """
+
+    latency: float = 0.0
+    default_words: int = 120
+    timeout: Optional[float] = None
+
+    def call(
+        self,
+        messages,
+        tools=None,
+        callbacks=None,
+        available_functions=None,
+        from_task=None,
+        from_agent=None,
+        **kwargs: Any,
+    ) -> str:
+        if isinstance(messages, str):
+            prompt = messages
+        else:
+            prompt = "\n".join(str(message.get("content", "")) for message in messages)
+
+        if self.timeout is not None and self.latency > self.timeout:
+            time.sleep(self.timeout)
+            raise TimeoutError(f"{self.model} did not answer within {self.timeout}s")
+        if self.latency:
+            time.sleep(self.latency)
+
+        seed = hashlib.sha256(prompt.encode("utf-8")).digest()
+        word_total = _requested_words(prompt, self.default_words)
+        words = [
+            _VOCABULARY[(seed[index % len(seed)] + index) % len(_VOCABULARY)]
+            for index in range(word_total)
+        ]
+        # Sentence-case every twelve words so the text reads like prose
+        sentences = [
+            " ".join(words[start:start + 12]).capitalize() + "."
+            for start in range(0, len(words), 12)
+        ]
+        return "Thought: I now know the final answer\nFinal Answer: " + " ".join(sentences)
+
+    def supports_function_calling(self) -> bool:
+        return False
+
+    def supports_stop_words(self) -> bool:
+        return False
+
+    def get_context_window_size(self) -> int:
+        return 131072
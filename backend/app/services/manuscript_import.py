@@ -0,0 +1,147 @@
+"""
+Manuscript import for Ghost-Writers.AI.
+
+Splits a plaintext or Markdown manuscript into chapters and scenes while it
+streams in, line by line, so only the scene being read is held in memory:
+
+- chapter boundaries: Markdown headings of level 1-2, or lines such as
+  "Chapter 12", "CHAPTER TWELVE: The Storm", "Part II", "Prologue";
+- scene boundaries: Markdown headings of level 3+, and scene break lines
+  ("***", "* * *", "---", "~~~", "#", "§");
+- a scene that grows past MAX_SCENE_WORDS without a break is split at the
+  next paragraph boundary.
+
+Memory candidates are the sentences that first introduce a proper name
+mid-sentence, so they can be reviewed as Character memory.
+"""
+
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from app.services.continuity import STOPWORDS
+
+MAX_SCENE_WORDS = 20000
+# Memory candidates kept per scene
+CANDIDATES_PER_SCENE = 3
+# Distinct names remembered for candidate extraction (bounds memory use)
+MAX_TRACKED_NAMES = 10000
+
+_HEADING = re.compile(r"^(#{1,6})\s+(.+?)\s*#*\s*$")
+_NUMBER_WORD = (
+    r"(?:(?:twenty|thirty|forty|fifty|sixty|seventy|eighty|ninety)(?:[- ](?:one|two|three|four|five|six|seven|eight|nine))?"
+    r"|one|two|three|four|five|six|seven|eight|nine|ten|eleven|twelve|thirteen|fourteen|fifteen|sixteen"
+    r"|seventeen|eighteen|nineteen|hundred)"
+)
+# Optional title after a heading keyword: "Chapter 3: The Storm", "Prologue - Before"
+_HEADING_TITLE = r"(?:\s*[:.\-\u2013\u2014]\s*.{0,70})?"
+# Chapter headings only in heading form, so prose such as "Part of her..." stays prose
+_CHAPTER = re.compile(
+    r"^\s*(?:(?:chapter|part|book)\s+(?:\d+|[ivxlcdm]+|" + _NUMBER_WORD + r")\b"
+    r"|prologue|epilogue|interlude)" + _HEADING_TITLE + r"\s*$",
+    re.IGNORECASE,
+)
+_SCENE_BREAK = re.compile(r"^\s*(?:(?:\*\s*){3,}|(?:-\s*){3,}|(?:~\s*){3,}|(?:_\s*){3,}|#|§)\s*$")
+_SENTENCE = re.compile(r"[^.!?]+[.!?]+[\"')\]]*")
+_WORD = re.compile(r"[A-Za-z][A-Za-z'-]*")
+
+
+@dataclass
+class ImportedScene:
+    title: str
+    chapter: int
+    chapter_title: Optional[str]
+    content: str
+    word_count: int
+    memory_candidates: List[str] = field(default_factory=list)
+
+
+class ManuscriptSplitter:
+    """
+    Feed manuscript lines with feed(); completed scenes are returned as soon
+    as a boundary is seen. Call finish() at the end for the last scene.
+    """
+
+    def __init__(self, extract_memory: bool = False, max_scene_words: int = MAX_SCENE_WORDS):
+        self.extract_memory = extract_memory
+        self.max_scene_words = max_scene_words
+        self.chapter = 0
+        self.chapter_title: Optional[str] = None
+        self.scene_in_chapter = 0
+        self.scene_title: Optional[str] = None
+        self._lines: List[str] = []
+        self._words = 0
+        self._seen_names: Dict[str, bool] = {}
+
+    def feed(self, line: str) -> List[ImportedScene]:
+        line = line.rstrip("\r\n")
+        stripped = line.strip()
+
+        heading = _HEADING.match(stripped)
+        is_chapter = (heading is not None and len(heading.group(1)) <= 2) or (
+            heading is None and _CHAPTER.match(stripped) is not None and not self._in_paragraph()
+        )
+        if is_chapter:
+            done = self._flush()
+            self.chapter += 1
+            self.chapter_title = heading.group(2) if heading else stripped
+            self.scene_in_chapter = 0
+            return done
+        if heading:
+            done = self._flush()
+            self.scene_title = heading.group(2)
+            return done
+        if _SCENE_BREAK.match(stripped):
+            return self._flush()
+
+        self._lines.append(line)
+        self._words += len(stripped.split())
+        if self._words >= self.max_scene_words and not stripped:
+            return self._flush()
+        return []
+
+    def finish(self) -> List[ImportedScene]:
+        return self._flush()
+
+    def _in_paragraph(self) -> bool:
+        # "Chapter" at the start of a line inside running prose is not a heading
+        return bool(self._lines and self._lines[-1].strip())
+
+    def _flush(self) -> List[ImportedScene]:
+        content = "\n".join(self._lines).strip("\n")
+        words = self._words
+        title = self.scene_title
+        self._lines, self._words, self.scene_title = [], 0, None
+        if not content.strip():
+            return []
+
+        self.scene_in_chapter += 1
+        if title is None:
+            title = f"Scene {self.scene_in_chapter}"
+            if self.chapter_title:
+                title = f"{self.chapter_title} - {title}"
+        scene = ImportedScene(
+            title=title,
+            chapter=max(self.chapter, 1),
+            chapter_title=self.chapter_title,
+            content=content,
+            word_count=words,
+        )
+        if self.extract_memory:
+            scene.memory_candidates = self._memory_candidates(content)
+        return [scene]
+
+    def _memory_candidates(self, content: str) -> List[str]:
+        """Sentences introducing a proper name mid-sentence for the first time."""
+        candidates = []
+        for sentence in _SENTENCE.findall(content.replace("\n", " ")):
+            words = _WORD.findall(sentence)
+            new_name = False
+            for word in words[1:]:
+                if word[0].isupper() and word.lower() not in STOPWORDS and word.lower() not in self._seen_names:
+                    if len(self._seen_names) < MAX_TRACKED_NAMES:
+                        self._seen_names[word.lower()] = True
+                    new_name = True
+            if new_name and len(candidates) < CANDIDATES_PER_SCENE:
+                candidates.append(" ".join(sentence.split()))
+        return candidates
@@ -0,0 +1,112 @@
+"""
+Manuscript statistics for Ghost-Writers.AI.
+
+Word counts, dialogue, paragraph counts and character mentions are kept per
+scene and summed per project. When a scene's content is saved only that
+scene is analysed; the project totals are adjusted by the difference from
+its previous statistics, so reading a project's numbers is a single lookup
+however long the manuscript gets.
+
+Mentions are counted for the project's characters known when a scene is
+saved, by full name or by any distinctive part of it ("Mara Voss", "Mara",
+"Voss"), case-sensitively so common words are not mistaken for names.
+"""
+
+import re
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+from app.services.continuity import STOPWORDS
+from app.utils.state import collection, transaction
+
+# Average adult silent reading speed, in words per minute
+READING_WPM = 238
+
+# scene_id -> statistics of its current content
+scene_stats_db = collection("scene_stats")
+# project_id -> totals over all its scenes
+project_stats_db = collection("project_stats")
+
+_DIALOGUE = re.compile(r'"[^"\n]*"|“[^”]*”')
+_PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+_NAME_PART = re.compile(r"[A-Za-z][A-Za-z'-]*")
+_TITLES = frozenset("captain detective doctor dr lady lord miss mr mrs ms professor sir king queen".split())
+
+_COUNTS = ("words", "dialogue_words", "paragraphs")
+
+
+def _name_pattern(name: str) -> Optional[re.Pattern]:
+    parts = [part for part in _NAME_PART.findall(name) if part.lower() not in STOPWORDS | _TITLES and len(part) > 1]
+    alternatives = [re.escape(name.strip())] + [re.escape(part) for part in parts if part != name.strip()]
+    alternatives = [alternative for alternative in alternatives if alternative]
+    if not alternatives:
+        return None
+    # Full name first so "Mara Voss" counts once, not as "Mara" plus "Voss"
+    return re.compile(r"\b(?:" + "|".join(alternatives) + r")\b")
+
+
+def analyse(content: str, character_names: Iterable[str] = ()) -> Dict[str, Any]:
+    """Statistics of one scene's content."""
+    content = content or ""
+    mentions = {}
+    for name in character_names:
+        pattern = _name_pattern(name)
+        count = len(pattern.findall(content)) if pattern else 0
+        if count:
+            mentions[name] = count
+    return {
+        "words": len(content.split()),
+        "dialogue_words": sum(len(quote.split()) for quote in _DIALOGUE.findall(content)),
+        "paragraphs": len([paragraph for paragraph in _PARAGRAPH_BREAK.split(content) if paragraph.strip()]),
+        "mentions": mentions,
+    }
+
+
+def _empty_totals() -> Dict[str, Any]:
+    return {"scenes": 0, **{key: 0 for key in _COUNTS}, "mentions": {}}
+
+
+def _with_ratios(stats: Dict[str, Any]) -> Dict[str, Any]:
+    words = stats.get("words", 0)
+    return {
+        **stats,
+        "dialogue_ratio": round(stats.get("dialogue_words", 0) / words, 3) if words else 0.0,
+        "reading_minutes": round(words / READING_WPM, 1),
+    }
+
+
+def record_scenes(project_id: str, contents: Dict[str, str], character_names: List[str]) -> None:
+    """
+    Store the statistics of saved scene contents (scene_id -> content) and
+    apply the change to the project totals, in one transaction.
+    """
+    analysed = {scene_id: analyse(content, character_names) for scene_id, content in contents.items()}
+    with transaction():
+        totals = project_stats_db.get(project_id) or _empty_totals()
+        for scene_id, stats in analysed.items():
+            previous = scene_stats_db.get(scene_id)
+            if previous is None:
+                totals["scenes"] += 1
+                previous = {key: 0 for key in _COUNTS}
+            for key in _COUNTS:
+                totals[key] += stats[key] - previous.get(key, 0)
+            for name in set(stats["mentions"]) | set(previous.get("mentions", {})):
+                count = totals["mentions"].get(name, 0) + stats["mentions"].get(name, 0) - previous.get("mentions", {}).get(name, 0)
+                if count:
+                    totals["mentions"][name] = count
+                else:
+                    totals["mentions"].pop(name, None)
+            scene_stats_db[scene_id] = {**stats, "project_id": project_id, "updated_at": datetime.now()}
+        totals["updated_at"] = datetime.now()
+        project_stats_db[project_id] = totals
+
+
+def scene_statistics(scene_id: str) -> Dict[str, Any]:
+    """Statistics of a scene's content (zeros for a scene never saved)."""
+    return _with_ratios(scene_stats_db.get(scene_id) or analyse(""))
+
+
+def project_statistics(project_id: str) -> Dict[str, Any]:
+    """Totals over the project's scenes with content ("scenes" counts those)."""
+    totals = project_stats_db.get(project_id) or _empty_totals()
+    return _with_ratios({"project_id": project_id, **totals})
@@ -0,0 +1,222 @@
+"""
+Per-task model routing for Ghost-Writers.AI scene generation.
+
+Not every crew task needs the large model. The routing policy gives each
+task its own model, temperature, timeout and fallback models:
+
+- outline and continuity (structure and checking) go to a fast, small
+  model, the continuity check at a low temperature;
+- character work and prose go to the large model, whose output readers see.
+
+A call that times out is retried on the route's next fallback model.
+Latency is tracked per task and model; a model that keeps timing out is
+skipped (straight to its fallback) for a cooldown period instead of
+costing every generation a full timeout.
+
+The defaults can be overridden per task with GHOSTWRITERS_MODEL_ROUTES, a
+JSON object such as:
+
+    {"prose": {"model": "groq/llama-3.3-70b-versatile", "timeout": 90},
+     "outline": {"fallbacks": []}}
+
+Tasks without a route of their own use the "default" route.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, field, replace
+from typing import Any, Callable, Dict, List, Tuple, TypeVar
+
+from app.utils.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+llm_route_latency_seconds = REGISTRY.histogram(
+    "llm_route_latency_seconds", "LLM call latency by task, model and outcome (ok, timeout or error)."
+)
+llm_route_fallbacks_total = REGISTRY.counter(
+    "llm_route_fallbacks_total", "LLM calls moved to a fallback model, by task, model and reason."
+)
+
+LARGE_MODEL = "groq/meta-llama/llama-4-maverick-17b-128e-instruct"
+LARGE_FALLBACK_MODEL = "groq/llama-3.3-70b-versatile"
+FAST_MODEL = "groq/llama-3.1-8b-instant"
+FAST_FALLBACK_MODEL = "groq/meta-llama/llama-4-scout-17b-16e-instruct"
+
+# Consecutive timeouts after which a model is skipped, and for how long
+TIMEOUT_STREAK = int(os.getenv("GHOSTWRITERS_MODEL_TIMEOUT_STREAK", "3"))
+COOLDOWN_SECONDS = float(os.getenv("GHOSTWRITERS_MODEL_COOLDOWN", "60"))
+# Weight of the newest call in the moving latency average
+LATENCY_SMOOTHING = 0.2
+
+Result = TypeVar("Result")
+
+
+@dataclass(frozen=True)
+class ModelRoute:
+    """The model settings one crew task calls, with fallbacks in order."""
+
+    model: str
+    temperature: float = 0.6
+    timeout: float = 60.0
+    fallbacks: Tuple[str, ...] = ()
+
+    @property
+    def models(self) -> List[str]:
+        return [self.model, *(model for model in self.fallbacks if model != self.model)]
+
+
+DEFAULT_ROUTES: Dict[str, ModelRoute] = {
+    "outline": ModelRoute(FAST_MODEL, temperature=0.7, timeout=30.0, fallbacks=(FAST_FALLBACK_MODEL, LARGE_MODEL)),
+    "character": ModelRoute(LARGE_MODEL, temperature=0.7, timeout=60.0, fallbacks=(LARGE_FALLBACK_MODEL,)),
+    "prose": ModelRoute(LARGE_MODEL, temperature=0.6, timeout=120.0, fallbacks=(LARGE_FALLBACK_MODEL,)),
+    "continuity": ModelRoute(FAST_MODEL, temperature=0.1, timeout=30.0, fallbacks=(FAST_FALLBACK_MODEL, LARGE_MODEL)),
+    "default": ModelRoute(LARGE_MODEL, temperature=0.6, timeout=60.0, fallbacks=(LARGE_FALLBACK_MODEL,)),
+}
+
+
+def routing_policy() -> Dict[str, ModelRoute]:
+    """The default routes with any GHOSTWRITERS_MODEL_ROUTES overrides applied."""
+    routes = dict(DEFAULT_ROUTES)
+    overrides = os.getenv("GHOSTWRITERS_MODEL_ROUTES")
+    if not overrides:
+        return routes
+    try:
+        for task, settings in json.loads(overrides).items():
+            if "fallbacks" in settings:
+                settings = {**settings, "fallbacks": tuple(settings["fallbacks"])}
+            routes[task] = replace(routes.get(task, routes["default"]), **settings)
+    except (TypeError, ValueError, AttributeError) as exc:
+        logger.error("Ignoring invalid GHOSTWRITERS_MODEL_ROUTES: %s", exc)
+        return dict(DEFAULT_ROUTES)
+    return routes
+
+
+def route_for(task: str) -> ModelRoute:
+    routes = routing_policy()
+    return routes.get(task, routes["default"])
+
+
+def is_timeout(exc: BaseException) -> bool:
+    """Whether an exception is a timeout, whichever client library raised it."""
+    return isinstance(exc, TimeoutError) or any("Timeout" in cls.__name__ for cls in type(exc).__mro__)
+
+
+@dataclass
+class _ModelHealth:
+    calls: int = 0
+    timeouts: int = 0
+    errors: int = 0
+    average_latency: float = 0.0
+    timeout_streak: int = 0
+    skip_until: float = 0.0
+    tasks: Dict[str, int] = field(default_factory=dict)
+
+
+class RouteHealth:
+    """Per-model latency and timeout record shared by every generation in the process."""
+
+    def __init__(self):
+        self._models: Dict[str, _ModelHealth] = {}
+        self._lock = threading.Lock()
+
+    def record(self, task: str, model: str, seconds: float, outcome: str) -> None:
+        llm_route_latency_seconds.observe(seconds, task=task, model=model, outcome=outcome)
+        with self._lock:
+            health = self._models.setdefault(model, _ModelHealth())
+            health.calls += 1
+            health.tasks[task] = health.tasks.get(task, 0) + 1
+            if outcome == "timeout":
+                health.timeouts += 1
+                health.timeout_streak += 1
+                if health.timeout_streak >= TIMEOUT_STREAK:
+                    health.skip_until = time.monotonic() + COOLDOWN_SECONDS
+                    logger.warning("Model %s timed out %d times in a row; skipping it for %.0fs",
+                                   model, health.timeout_streak, COOLDOWN_SECONDS)
+                return
+            health.timeout_streak = 0
+            if outcome == "error":
+                health.errors += 1
+                return
+            if health.average_latency:
+                health.average_latency += LATENCY_SMOOTHING * (seconds - health.average_latency)
+            else:
+                health.average_latency = seconds
+
+    def cooling_down(self, model: str) -> bool:
+        with self._lock:
+            health = self._models.get(model)
+            return health is not None and health.skip_until > time.monotonic()
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        now = time.monotonic()
+        with self._lock:
+            return {
+                model: {
+                    "calls": health.calls,
+                    "timeouts": health.timeouts,
+                    "errors": health.errors,
+                    "average_latency": round(health.average_latency, 4),
+                    "cooling_down": health.skip_until > now,
+                    "tasks": dict(health.tasks),
+                }
+                for model, health in self._models.items()
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._models.clear()
+
+
+health = RouteHealth()
+
+
+def call_with_fallback(task: str, route: ModelRoute, call: Callable[[str], Result]) -> Tuple[Result, str, int]:
+    """
+    `call(model)` on the route's model, moving to the next fallback when it
+    times out (or is cooling down after repeated timeouts). Other errors are
+    raised at once. Returns the result, the model that answered and how many
+    fallbacks were used.
+    """
+    models = route.models
+    # Models cooling down go last, so a route whose models are all slow still gets an answer
+    ordered = [model for model in models if not health.cooling_down(model)]
+    skipped = [model for model in models if model not in ordered]
+    for model in skipped:
+        llm_route_fallbacks_total.inc(task=task, model=model, reason="cooldown")
+    ordered += skipped
+
+    for attempt, model in enumerate(ordered):
+        start = time.perf_counter()
+        try:
+            result = call(model)
+        except Exception as exc:
+            timed_out = is_timeout(exc)
+            health.record(task, model, time.perf_counter() - start, "timeout" if timed_out else "error")
+            if not timed_out or attempt == len(ordered) - 1:
+                raise
+            llm_route_fallbacks_total.inc(task=task, model=model, reason="timeout")
+            logger.warning("Task %s: %s timed out; falling back to %s", task, model, ordered[attempt + 1])
+            continue
+        health.record(task, model, time.perf_counter() - start, "ok")
+        return result, model, attempt
+    raise RuntimeError(f"No models routed for task {task}")  # pragma: no cover - routes always have a model
+
+
+def describe_routes() -> Dict[str, Any]:
+    """The routing policy and the latency observed for each model, for the API."""
+    return {
+        "routes": {
+            task: {
+                "model": route.model,
+                "temperature": route.temperature,
+                "timeout": route.timeout,
+                "fallbacks": list(route.fallbacks),
+            }
+            for task, route in routing_policy().items()
+        },
+        "models": health.snapshot(),
+    }
@@ -0,0 +1,225 @@
+"""
+Best-of-N outline drafting for Ghost-Writers.AI.
+
+Writers often reject the first outline and regenerate the whole scene. The
+outline is the cheapest stage, so several candidates are drafted at once
+and only the chosen one goes on to the character and prose stages.
+
+score_outline is a cheap local scorer: it rewards outlines that contain
+the sections the outline task asks for, list enough concrete details and
+beats, and use the scene's characters. OutlineRace drafts the candidates
+concurrently and picks one:
+
+- automatically, accepting the first candidate that scores at least
+  ACCEPT_SCORE, or else the best candidate finished within GRACE_FACTOR
+  times the first one's drafting time, so the wall time stays close to
+  drafting one outline;
+- or by the user, who sees candidates as they finish and chooses one.
+
+Once a choice is made the other drafts are cancelled: they make no
+further LLM calls and their responses are discarded.
+"""
+
+import logging
+import os
+import re
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+MAX_CANDIDATES = 5
+# A candidate scoring at least this is accepted without waiting for the others
+ACCEPT_SCORE = float(os.getenv("GHOSTWRITERS_OUTLINE_ACCEPT_SCORE", "0.85"))
+# Other candidates are awaited at most this multiple of the first one's time
+GRACE_FACTOR = float(os.getenv("GHOSTWRITERS_OUTLINE_GRACE", "1.5"))
+
+# The sections the outline task asks for, by a keyword of their heading
+SECTIONS = ("setting", "objective", "plot point", "emotional arc", "scene structure")
+# Concrete details the outline task asks for, and a usable number of beats
+MIN_DETAILS = 5
+MIN_BEATS, MAX_BEATS = 3, 8
+# Outline length (words) outside which it is too thin or rambling
+MIN_WORDS, MAX_WORDS = 150, 1500
+
+_LIST_ITEM = re.compile(r"^\s*(?:[-*+•]|\d+[.)])\s+\S")
+_WEIGHTS = {"sections": 0.35, "details": 0.2, "beats": 0.2, "characters": 0.15, "length": 0.1}
+
+
+def score_outline(outline: str, character_names: Iterable[str] = ()) -> Dict[str, Any]:
+    """Score (0 to 1) of an outline, with the parts it is made of."""
+    text = outline or ""
+    lines = text.splitlines()
+    lowered = text.lower()
+    items = [line for line in lines if _LIST_ITEM.match(line)]
+
+    beats = 0
+    in_structure = False
+    for line in lines:
+        if "scene structure" in line.lower():
+            in_structure = True
+            continue
+        if in_structure and line.lstrip().startswith("#"):
+            break
+        if in_structure and _LIST_ITEM.match(line):
+            beats += 1
+
+    words = len(text.split())
+    names = [name for name in character_names if name]
+    parts = {
+        "sections": sum(section in lowered for section in SECTIONS) / len(SECTIONS),
+        "details": min(1.0, len(items) / (MIN_DETAILS * 2)),
+        "beats": 1.0 if MIN_BEATS <= beats <= MAX_BEATS else (0.5 if beats else 0.0),
+        "characters": sum(name.split()[0] in text for name in names) / len(names) if names else 1.0,
+        "length": 1.0 if MIN_WORDS <= words <= MAX_WORDS else 0.5 if words else 0.0,
+    }
+    score = sum(_WEIGHTS[part] * value for part, value in parts.items())
+    return {"score": round(score, 4), **{part: round(value, 4) for part, value in parts.items()}}
+
+
+class _BranchCancel:
+    """Cancellation flag for one draft: set when another candidate is chosen or the race is cancelled."""
+
+    def __init__(self, race: "OutlineRace", index: int):
+        self.race = race
+        self.index = index
+        self._event = threading.Event()
+
+    def set(self) -> None:
+        self._event.set()
+
+    def is_set(self) -> bool:
+        if self._event.is_set():
+            return True
+        if self.race.cancelled():
+            self._event.set()
+        return self._event.is_set()
+
+
+class OutlineRace:
+    """
+    N outline drafts run concurrently; `choose` (or the automatic policy in
+    `run`) picks one and cancels the rest. `cancelled` is polled too, so a
+    choice recorded elsewhere (another worker, a cancelled generation)
+    stops the drafts.
+    """
+
+    def __init__(self, count: int, cancelled: Optional[Callable[[], bool]] = None):
+        self.count = max(1, min(count, MAX_CANDIDATES))
+        self.candidates: List[Dict[str, Any]] = [
+            {"index": index, "status": "drafting", "outline": None, "score": None, "seconds": None}
+            for index in range(self.count)
+        ]
+        self.chosen: Optional[int] = None
+        self._external_cancel = cancelled
+        self._cancels = [_BranchCancel(self, index) for index in range(self.count)]
+        self._lock = threading.Lock()
+
+    def cancel_event(self, index: int) -> _BranchCancel:
+        """The flag the draft with this index checks before and after each LLM call."""
+        return self._cancels[index]
+
+    def cancelled(self) -> bool:
+        return self._external_cancel is not None and self._external_cancel()
+
+    def choose(self, index: int) -> None:
+        """Choose a candidate and cancel the drafts still running."""
+        with self._lock:
+            self.chosen = index
+            for candidate, cancel in zip(self.candidates, self._cancels):
+                if candidate["index"] != index:
+                    cancel.set()
+                    if candidate["status"] == "drafting":
+                        candidate["status"] = "cancelled"
+
+    def run(
+        self,
+        draft: Callable[[int, _BranchCancel], str],
+        character_names: Iterable[str] = (),
+        automatic: bool = True,
+        on_candidate: Optional[Callable[[Dict[str, Any]], None]] = None,
+    ) -> Optional[int]:
+        """
+        Draft every candidate concurrently with `draft(index, cancel_event)`.
+        Automatic races choose by score (see the module docstring); otherwise
+        this waits until every draft finishes or `choose` is called. Returns
+        the chosen index (None if no choice was made). Raises the first
+        draft's error if every draft failed.
+        """
+        names = list(character_names)
+        started = time.perf_counter()
+        executor = ThreadPoolExecutor(max_workers=self.count, thread_name_prefix="outline-draft")
+        futures: Dict[Future, int] = {
+            executor.submit(draft, index, self._cancels[index]): index for index in range(self.count)
+        }
+        pending = set(futures)
+        deadline: Optional[float] = None
+        errors: List[BaseException] = []
+        try:
+            while pending and self.chosen is None and not self.cancelled():
+                timeout = None if deadline is None else max(0.0, deadline - time.perf_counter())
+                # Poll so a choice made from another thread is noticed promptly
+                done, pending = wait(pending, timeout=min(timeout, 0.1) if timeout is not None else 0.1,
+                                     return_when=FIRST_COMPLETED)
+                for future in done:
+                    candidate = self._finish(futures[future], future, started, names, errors)
+                    if candidate is not None and on_candidate is not None:
+                        on_candidate(candidate)
+                    if candidate is not None and automatic:
+                        if candidate["score"]["score"] >= ACCEPT_SCORE:
+                            self.choose(candidate["index"])
+                            break
+                        if deadline is None:
+                            deadline = time.perf_counter() + candidate["seconds"] * (GRACE_FACTOR - 1)
+                if automatic and deadline is not None and time.perf_counter() >= deadline and self.chosen is None:
+                    break
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        finished = [candidate for candidate in self.candidates if candidate["status"] == "ready"]
+        if automatic and self.chosen is None and finished and not self.cancelled():
+            self.choose(max(finished, key=lambda candidate: candidate["score"]["score"])["index"])
+        if not finished and errors and self.chosen is None:
+            raise errors[0]
+        return self.chosen
+
+    def _finish(
+        self, index: int, future: Future, started: float, names: List[str], errors: List[BaseException]
+    ) -> Optional[Dict[str, Any]]:
+        candidate = self.candidates[index]
+        try:
+            outline = future.result()
+        except Exception as exc:
+            if not self._cancels[index].is_set():
+                logger.warning("Outline candidate %d failed: %s", index, exc)
+                errors.append(exc)
+                candidate["status"] = "failed"
+            return None
+        with self._lock:
+            if self._cancels[index].is_set():
+                return None
+            candidate.update(
+                status="ready",
+                outline=outline,
+                score=score_outline(outline, names),
+                seconds=round(time.perf_counter() - started, 4),
+            )
+        return candidate
+
+    def summary(self) -> Dict[str, Any]:
+        """Scores and outcome of every candidate, without the outline texts."""
+        return {
+            "candidates": self.count,
+            "chosen": self.chosen,
+            "results": [
+                {
+                    "index": candidate["index"],
+                    "status": "chosen" if candidate["index"] == self.chosen else candidate["status"],
+                    "score": candidate["score"]["score"] if candidate["score"] else None,
+                    "seconds": candidate["seconds"],
+                }
+                for candidate in self.candidates
+            ],
+        }
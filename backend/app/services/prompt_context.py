@@ -0,0 +1,139 @@
+"""
+Precompiled per-project prompt context for Ghost-Writers.AI.
+
+Every crew task needs some of the same project facts: genre, audience and
+style, the characters in the scene and the memory entries. Instead of each
+task concatenating them from the raw dicts, they are rendered once into a
+compact ProjectContext:
+
+    Genre: science fiction | Audience: young adult | Style: descriptive
+    Mara Voss: brave, intelligent | wants: answers about the past | ties: the elder council
+    Plot: The protagonist found a hidden map.
+
+Contexts are cached by a fingerprint of their inputs, so a project's block
+is rendered again only when its data changes, and concurrent generations
+for the same project share one immutable instance (strings included).
+"""
+
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from app.services.continuity import FactIndex
+from app.utils.metrics import REGISTRY
+
+prompt_context_cache_total = REGISTRY.counter(
+    "prompt_context_cache_total", "Project prompt context lookups, by result (hit or miss)."
+)
+
+# Distinct project contexts kept compiled
+CACHE_SIZE = 256
+
+
+def _clean(value: Any) -> str:
+    """One-line text for a field value, without Python container syntax."""
+    if isinstance(value, (list, tuple, set)):
+        value = ", ".join(str(item) for item in value)
+    return " ".join(str(value).split())
+
+
+def render_project(project_metadata: Dict[str, Any]) -> str:
+    return " | ".join(
+        f"{label}: {_clean(project_metadata.get(key) or 'unspecified')}"
+        for key, label in (("genre", "Genre"), ("audience", "Audience"), ("style", "Style"))
+    )
+
+
+def render_characters(character_data: List[Dict[str, Any]]) -> str:
+    lines = []
+    for character in character_data:
+        # A character's voice profile line already covers traits, motivation and ties
+        if character.get("voice"):
+            lines.append(_clean(character["voice"]))
+            continue
+        parts = [f"{_clean(character.get('name', 'Unknown'))}: {_clean(character.get('traits', '')) or 'no traits noted'}"]
+        if character.get("motivation"):
+            parts.append(f"wants: {_clean(character['motivation'])}")
+        if character.get("relationships"):
+            parts.append(f"ties: {_clean(character['relationships'])}")
+        lines.append(" | ".join(parts))
+    return "\n".join(lines)
+
+
+def render_memory(memory_data: List[Dict[str, Any]]) -> str:
+    """Memory entries grouped by category, one line per category."""
+    by_category: Dict[str, List[str]] = {}
+    for memory in memory_data:
+        text = _clean(memory.get("text", ""))
+        if text:
+            by_category.setdefault(_clean(memory.get("category") or "General"), []).append(text)
+    return "\n".join(f"{category}: {' '.join(texts)}" for category, texts in by_category.items())
+
+
+@dataclass(frozen=True)
+class ProjectContext:
+    """Rendered context blocks for one version of a project's data."""
+
+    fingerprint: str
+    genre: str
+    audience: str
+    style: str
+    project: str
+    characters: str
+    memory: str
+    # Facts indexed for the continuity pre-check, with and without memory
+    all_facts: FactIndex
+    character_facts: FactIndex
+
+    def facts(self, include_memory: bool) -> FactIndex:
+        return self.all_facts if include_memory else self.character_facts
+
+
+_cache: "OrderedDict[str, ProjectContext]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _fingerprint(*parts: Any) -> str:
+    payload = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def compile_context(
+    project_metadata: Optional[Dict[str, Any]] = None,
+    character_data: Optional[List[Dict[str, Any]]] = None,
+    memory_data: Optional[List[Dict[str, Any]]] = None,
+) -> ProjectContext:
+    """The compiled context for this project data, rendered only on first use."""
+    project_metadata = project_metadata or {}
+    character_data = character_data or []
+    memory_data = memory_data or []
+    fingerprint = _fingerprint(project_metadata, character_data, memory_data)
+
+    with _cache_lock:
+        context = _cache.get(fingerprint)
+        if context is not None:
+            _cache.move_to_end(fingerprint)
+            prompt_context_cache_total.inc(result="hit")
+            return context
+
+    prompt_context_cache_total.inc(result="miss")
+    context = ProjectContext(
+        fingerprint=fingerprint,
+        genre=_clean(project_metadata.get("genre") or "unspecified"),
+        audience=_clean(project_metadata.get("audience") or "unspecified"),
+        style=_clean(project_metadata.get("style") or "unspecified"),
+        project=render_project(project_metadata),
+        characters=render_characters(character_data),
+        memory=render_memory(memory_data),
+        all_facts=FactIndex.from_context(memory_data, character_data),
+        character_facts=FactIndex.from_context([], character_data),
+    )
+    with _cache_lock:
+        # Another thread may have compiled the same data meanwhile; keep one copy
+        context = _cache.setdefault(fingerprint, context)
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    return context
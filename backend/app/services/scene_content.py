@@ -0,0 +1,240 @@
+"""
+Chunked scene content store for Ghost-Writers.AI.
+
+Scene prose is kept out of the scene records, so listing scenes never
+reads it. Each scene's content is stored as paragraphs (split on blank
+lines, exactly, so joining them gives back the original text), one record
+per paragraph, plus a manifest:
+
+    scene_id -> {"chunks": [chunk ids], "sizes": [UTF-8 bytes per paragraph], "revision": 3}
+
+The manifest alone answers which paragraphs a byte range covers, so range
+reads fetch only those paragraphs, and a patch (see content_merge) writes
+only the paragraphs it changes. The operations applied at each recent
+revision are logged so patches made against an older revision can be
+merged instead of refused.
+"""
+
+import uuid
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from app.services import content_merge
+from app.utils.state import collection, edit, get_many, put_many, transaction
+
+SEPARATOR = "\n\n"
+_SEPARATOR_BYTES = len(SEPARATOR.encode("utf-8"))
+
+# scene_id -> manifest
+scene_content_db = collection("scene_content")
+# chunk id -> paragraph text
+content_chunks_db = collection("scene_content_chunks")
+# scene_id -> [{"revision": n, "ops": [...]}] for recent revisions; ops is
+# None where the whole content was replaced
+content_log_db = collection("scene_content_log")
+
+# Revisions a patch can lag behind and still be merged
+LOG_SIZE = 100
+
+
+class RevisionConflict(Exception):
+    """Raised when a patch cannot be applied on top of the scene's current revision."""
+
+    def __init__(self, current: int, reason: str = ""):
+        super().__init__(reason or f"Scene content is at revision {current}")
+        self.current = current
+
+
+def split_paragraphs(content: str) -> List[str]:
+    return content.split(SEPARATOR) if content else []
+
+
+def _empty_manifest() -> Dict:
+    return {"chunks": [], "sizes": [], "revision": 0}
+
+
+def manifest(scene_id: str) -> Dict:
+    return scene_content_db.get(scene_id) or _empty_manifest()
+
+
+def total_bytes(current: Dict) -> int:
+    sizes = current["sizes"]
+    return sum(sizes) + _SEPARATOR_BYTES * max(0, len(sizes) - 1)
+
+
+def _chunks(scene_id: str, paragraphs: List[str]) -> List[Tuple[str, str]]:
+    return [(f"{scene_id}:{uuid.uuid4().hex}", paragraph) for paragraph in paragraphs]
+
+
+def _log(scene_id: str, revision: int, ops: Optional[List[Dict[str, Any]]]) -> None:
+    with edit(content_log_db, scene_id, list) as log:
+        log.append({"revision": revision, "ops": ops})
+        del log[:-LOG_SIZE]
+
+
+def write_many(contents: Dict[str, str]) -> Dict[str, Dict]:
+    """Replace the whole content of several scenes (scene_id -> content). Returns their manifests."""
+    manifests = {}
+    new_chunks: List[Tuple[str, str]] = []
+    with transaction():
+        for scene_id, content in contents.items():
+            previous = manifest(scene_id)
+            for chunk_id in previous["chunks"]:
+                content_chunks_db.pop(chunk_id, None)
+            chunks = _chunks(scene_id, split_paragraphs(content))
+            new_chunks.extend(chunks)
+            manifests[scene_id] = {
+                "scene_id": scene_id,
+                "chunks": [chunk_id for chunk_id, _ in chunks],
+                "sizes": [len(paragraph.encode("utf-8")) for _, paragraph in chunks],
+                "revision": previous["revision"] + 1,
+                "updated_at": datetime.now(),
+            }
+        put_many(content_chunks_db, new_chunks)
+        put_many(scene_content_db, manifests.items())
+        for scene_id, current in manifests.items():
+            _log(scene_id, current["revision"], None)
+    return manifests
+
+
+def write(scene_id: str, content: str) -> Dict:
+    return write_many({scene_id: content})[scene_id]
+
+
+def read_paragraphs(scene_id: str, start: int = 0, end: Optional[int] = None) -> Tuple[Dict, List[str]]:
+    """The scene's manifest and its paragraphs [start, end)."""
+    current = manifest(scene_id)
+    return current, get_many(content_chunks_db, current["chunks"][start:end])
+
+
+def read(scene_id: str) -> str:
+    return SEPARATOR.join(read_paragraphs(scene_id)[1])
+
+
+def read_many(scene_ids: Iterable[str]) -> Dict[str, str]:
+    """Full content of the given scenes that have stored content, in two round trips."""
+    manifests = get_many(scene_content_db, list(scene_ids))
+    chunk_ids = [chunk_id for current in manifests for chunk_id in current["chunks"]]
+    texts = dict(zip(chunk_ids, get_many(content_chunks_db, chunk_ids)))
+    return {
+        current["scene_id"]: SEPARATOR.join(texts[chunk_id] for chunk_id in current["chunks"])
+        for current in manifests
+    }
+
+
+def read_bytes(scene_id: str, start: int, end: int) -> Tuple[Dict, bytes]:
+    """The manifest and bytes [start, end] (inclusive, as in HTTP ranges) of the UTF-8 content."""
+    current = manifest(scene_id)
+    first = last = None
+    offset = 0
+    offsets = []
+    for index, size in enumerate(current["sizes"]):
+        offsets.append(offset)
+        paragraph_end = offset + size + _SEPARATOR_BYTES
+        if first is None and paragraph_end > start:
+            first = index
+        if offset <= end:
+            last = index
+        offset = paragraph_end
+    if first is None or last is None or first > last:
+        return current, b""
+    texts = get_many(content_chunks_db, current["chunks"][first:last + 1])
+    data = SEPARATOR.join(texts).encode("utf-8")
+    if last < len(current["sizes"]) - 1:
+        # The range may end inside the separator after the last paragraph read
+        data += SEPARATOR.encode("utf-8")
+    base = offsets[first]
+    return current, data[start - base:end - base + 1]
+
+
+def _rebase(scene_id: str, ops: List[Dict[str, Any]], base_revision: int, current: int) -> List[Dict[str, Any]]:
+    """`ops` made against base_revision, transformed to apply on top of `current`."""
+    if base_revision > current:
+        raise RevisionConflict(current, f"Unknown revision {base_revision}; current revision is {current}")
+    applied = [entry for entry in content_log_db.get(scene_id, []) if entry["revision"] > base_revision]
+    if len(applied) != current - base_revision:
+        raise RevisionConflict(current, f"Revision {base_revision} is too old to merge; current revision is {current}")
+    try:
+        for entry in applied:
+            ops = content_merge.transform(ops, entry["ops"])
+    except content_merge.MergeConflict as exc:
+        raise RevisionConflict(current, f"{exc}; current revision is {current}")
+    return ops
+
+
+def patch(
+    scene_id: str, ops: List[Dict[str, Any]], base_revision: Optional[int] = None
+) -> Tuple[Dict, List[Dict[str, Any]]]:
+    """
+    Apply a patch, merged over any revisions since base_revision (or onto
+    the current content without one). Only new or edited paragraphs are
+    written. Returns the new manifest and the operations as applied.
+    Raises ValueError for an invalid patch and RevisionConflict when it
+    overlaps a concurrent change.
+    """
+    ops = content_merge.validate(ops)
+    with transaction():
+        current = manifest(scene_id)
+        if base_revision is not None and base_revision != current["revision"]:
+            ops = _rebase(scene_id, ops, base_revision, current["revision"])
+
+        edited_ids = [
+            current["chunks"][op["index"]]
+            for op in ops
+            if op["op"] == "edit" and op["index"] < len(current["chunks"])
+        ]
+        texts = dict(zip(edited_ids, get_many(content_chunks_db, edited_ids)))
+        new_chunks: List[Tuple[str, str]] = []
+
+        def new(text: str) -> Tuple[str, int]:
+            chunk_id, _ = _chunks(scene_id, [text])[0]
+            new_chunks.append((chunk_id, text))
+            return chunk_id, len(text.encode("utf-8"))
+
+        def edit_chunk(item: Tuple[str, int], op: Dict[str, Any]) -> Tuple[str, int]:
+            return new(content_merge.edit_text(texts[item[0]], op))
+
+        items = content_merge.apply(list(zip(current["chunks"], current["sizes"])), ops, new, edit_chunk)
+        kept = {chunk_id for chunk_id, _ in items}
+        for chunk_id in current["chunks"]:
+            if chunk_id not in kept:
+                content_chunks_db.pop(chunk_id, None)
+        put_many(content_chunks_db, new_chunks)
+        updated = {
+            "scene_id": scene_id,
+            "chunks": [chunk_id for chunk_id, _ in items],
+            "sizes": [size for _, size in items],
+            "revision": current["revision"] + 1,
+            "updated_at": datetime.now(),
+        }
+        scene_content_db[scene_id] = updated
+        _log(scene_id, updated["revision"], ops)
+    return updated, ops
+
+
+def materialize_history(entries: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    History entries (oldest first) with their full content. Patch entries
+    store only their operations; content is rebuilt from the last snapshot.
+    Patches recorded before any snapshot (older histories) are rebuilt from
+    an empty base where their operations allow it, and left empty otherwise.
+    """
+    paragraphs: List[str] = []
+    has_base = False
+    materialized = []
+    for entry in entries:
+        if "content" in entry:
+            paragraphs = split_paragraphs(entry["content"])
+            has_base = True
+            materialized.append(entry)
+            continue
+        try:
+            paragraphs = content_merge.apply(paragraphs, entry.get("ops") or [])
+        except ValueError:
+            if has_base:
+                raise
+            # No snapshot to apply the patch to: its content is unknown, not an error
+            materialized.append({**entry, "content": ""})
+            continue
+        materialized.append({**entry, "content": SEPARATOR.join(paragraphs)})
+    return materialized
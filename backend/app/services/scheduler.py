@@ -0,0 +1,243 @@
+"""
+Generation scheduler for Ghost-Writers.AI.
+
+Sits in front of crew execution:
+- Token buckets per user (X-User-Id) and per project limit how many
+  generations can be started. Buckets live in shared state, so limits hold
+  across worker processes.
+- A fixed number of crew slots per process are handed out by weighted fair
+  queueing between tenants (users), so one user's backlog cannot starve
+  everyone else.
+- Two priority lanes: interactive generations are served before batch
+  ones. A batch request that has waited longer than max_batch_wait is
+  served next anyway, so batches are never starved.
+"""
+
+import asyncio
+import heapq
+import itertools
+import math
+import os
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from app.utils.metrics import REGISTRY
+from app.utils.state import collection, transaction
+
+LANES = ("interactive", "batch")
+
+generation_queue_depth = REGISTRY.gauge(
+    "generation_queue_depth", "Generations waiting for a crew slot, by lane."
+)
+generation_slot_wait_seconds = REGISTRY.histogram(
+    "generation_slot_wait_seconds", "Time generations waited for a crew slot, by lane."
+)
+generation_rate_limited_total = REGISTRY.counter(
+    "generation_rate_limited_total", "Generations rejected by rate limiting, by scope."
+)
+
+# Token bucket state, keyed by "<scope>:<id>"
+rate_limit_db = collection("rate_limits")
+
+
+class RateLimitExceeded(Exception):
+    """Raised when a user or project bucket has no tokens left."""
+
+    def __init__(self, scope: str, retry_after: float, headers: Dict[str, str]):
+        super().__init__(f"{scope} generation rate limit exceeded")
+        self.scope = scope
+        self.retry_after = retry_after
+        self.headers = headers
+
+
+@dataclass
+class BucketConfig:
+    """Token bucket: `capacity` burst, refilled at `per_minute` tokens a minute."""
+
+    capacity: float
+    per_minute: float
+
+    @property
+    def per_second(self) -> float:
+        return self.per_minute / 60.0
+
+
+def _refill(bucket: Dict[str, float], config: BucketConfig, now: float) -> None:
+    elapsed = max(0.0, now - bucket["updated_at"])
+    bucket["tokens"] = min(config.capacity, bucket["tokens"] + elapsed * config.per_second)
+    bucket["updated_at"] = now
+
+
+@dataclass(order=True)
+class _Waiter:
+    tag: float
+    sequence: int
+    enqueued_at: float = field(compare=False)
+    tenant: str = field(compare=False)
+    future: asyncio.Future = field(compare=False)
+
+
+class GenerationScheduler:
+    """Rate limiting plus fair, prioritised hand-out of crew slots."""
+
+    def __init__(
+        self,
+        user_limit: BucketConfig,
+        project_limit: BucketConfig,
+        slots: int,
+        max_batch_wait: float = 60.0,
+    ):
+        self.user_limit = user_limit
+        self.project_limit = project_limit
+        self.slots = slots
+        self.max_batch_wait = max_batch_wait
+        self._busy = 0
+        self._queues: Dict[str, List[_Waiter]] = {lane: [] for lane in LANES}
+        # Weighted fair queueing: per-lane virtual clock and per-tenant finish tags
+        self._virtual_time: Dict[str, float] = {lane: 0.0 for lane in LANES}
+        self._finish_tags: Dict[str, Dict[str, float]] = {lane: {} for lane in LANES}
+        self._sequence = itertools.count()
+
+    # ------------------------------------------------------------------
+    # Rate limiting
+    # ------------------------------------------------------------------
+    def admit(self, user_id: str, project_id: str) -> Dict[str, str]:
+        """
+        Take one token from the user's and the project's bucket.
+        Returns rate limit headers; raises RateLimitExceeded when either
+        bucket is empty (no token is taken from the other one).
+        """
+        now = time.time()
+        checks = (("user", user_id, self.user_limit), ("project", project_id, self.project_limit))
+        with transaction():
+            buckets = {
+                scope: rate_limit_db.get(f"{scope}:{key}") or {"tokens": config.capacity, "updated_at": now}
+                for scope, key, config in checks
+            }
+            for scope, _, config in checks:
+                _refill(buckets[scope], config, now)
+            for scope, _, config in checks:
+                if buckets[scope]["tokens"] < 1:
+                    retry_after = (1 - buckets[scope]["tokens"]) / config.per_second
+                    generation_rate_limited_total.inc(scope=scope)
+                    headers = self._headers(buckets, retry_after)
+                    headers["Retry-After"] = str(math.ceil(retry_after))
+                    raise RateLimitExceeded(scope, retry_after, headers)
+            for scope, key, _ in checks:
+                buckets[scope]["tokens"] -= 1
+                rate_limit_db[f"{scope}:{key}"] = buckets[scope]
+        return self._headers(buckets)
+
+    def _headers(self, buckets: Dict[str, Dict[str, float]], retry_after: float = 0.0) -> Dict[str, str]:
+        user = buckets["user"]
+        project = buckets["project"]
+        reset = max(0.0, (self.user_limit.capacity - user["tokens"]) / self.user_limit.per_second)
+        return {
+            "X-RateLimit-Limit": str(int(self.user_limit.capacity)),
+            "X-RateLimit-Remaining": str(max(0, int(user["tokens"]))),
+            "X-RateLimit-Reset": str(math.ceil(max(reset, retry_after))),
+            "X-RateLimit-Project-Limit": str(int(self.project_limit.capacity)),
+            "X-RateLimit-Project-Remaining": str(max(0, int(project["tokens"]))),
+        }
+
+    # ------------------------------------------------------------------
+    # Fair scheduling of crew slots
+    # ------------------------------------------------------------------
+    @asynccontextmanager
+    async def slot(self, tenant: str, lane: str = "interactive", cost: float = 1.0, weight: float = 1.0):
+        """Wait for a crew slot, then hold it for the duration of the block."""
+        await self._acquire(tenant, lane, cost, weight)
+        try:
+            yield
+        finally:
+            self._release()
+
+    async def _acquire(self, tenant: str, lane: str, cost: float, weight: float) -> None:
+        enqueued_at = time.perf_counter()
+        if self._busy < self.slots and not any(self._queues.values()):
+            self._busy += 1
+            generation_slot_wait_seconds.observe(0.0, lane=lane)
+            return
+
+        # Start-time fair queueing: a tenant's next request is tagged after
+        # its previous one, so heavy tenants queue behind light ones
+        start = max(self._virtual_time[lane], self._finish_tags[lane].get(tenant, 0.0))
+        tag = start + cost / max(weight, 1e-6)
+        self._finish_tags[lane][tenant] = tag
+        waiter = _Waiter(tag, next(self._sequence), enqueued_at, tenant, asyncio.get_running_loop().create_future())
+        heapq.heappush(self._queues[lane], waiter)
+        generation_queue_depth.inc(lane=lane)
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            if waiter.future.done() and not waiter.future.cancelled():
+                # Granted a slot just as we were cancelled: hand it on
+                self._release()
+            else:
+                self._queues[lane].remove(waiter)
+                heapq.heapify(self._queues[lane])
+                generation_queue_depth.dec(lane=lane)
+            raise
+        generation_slot_wait_seconds.observe(time.perf_counter() - enqueued_at, lane=lane)
+
+    def _next_lane(self) -> Optional[str]:
+        interactive, batch = self._queues["interactive"], self._queues["batch"]
+        if batch and time.perf_counter() - min(w.enqueued_at for w in batch) > self.max_batch_wait:
+            return "batch"
+        if interactive:
+            return "interactive"
+        if batch:
+            return "batch"
+        return None
+
+    def _release(self) -> None:
+        lane = self._next_lane()
+        if lane is None:
+            self._busy -= 1
+            return
+        waiter = heapq.heappop(self._queues[lane])
+        generation_queue_depth.dec(lane=lane)
+        self._virtual_time[lane] = waiter.tag
+        self._forget_idle_tenants(lane)
+        # The slot passes straight to the next waiter
+        waiter.future.set_result(None)
+
+    def _forget_idle_tenants(self, lane: str) -> None:
+        # A tag at or behind the virtual clock no longer delays its tenant
+        # (requests start at max(clock, tag)), so only queued tenants need theirs
+        queued = {waiter.tenant for waiter in self._queues[lane]}
+        now = self._virtual_time[lane]
+        tags = self._finish_tags[lane]
+        for tenant in [tenant for tenant, tag in tags.items() if tag <= now and tenant not in queued]:
+            del tags[tenant]
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "slots": self.slots,
+            "busy": self._busy,
+            **{f"queued_{lane}": len(queue) for lane, queue in self._queues.items()},
+        }
+
+
+_scheduler: Optional[GenerationScheduler] = None
+
+
+def get_scheduler() -> GenerationScheduler:
+    """Process-wide scheduler configured from the environment."""
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = GenerationScheduler(
+            user_limit=BucketConfig(
+                capacity=float(os.getenv("GHOSTWRITERS_USER_BURST", "5")),
+                per_minute=float(os.getenv("GHOSTWRITERS_USER_RATE", "10")),
+            ),
+            project_limit=BucketConfig(
+                capacity=float(os.getenv("GHOSTWRITERS_PROJECT_BURST", "10")),
+                per_minute=float(os.getenv("GHOSTWRITERS_PROJECT_RATE", "20")),
+            ),
+            slots=int(os.getenv("GHOSTWRITERS_CREW_SLOTS", "4")),
+            max_batch_wait=float(os.getenv("GHOSTWRITERS_MAX_BATCH_WAIT", "60")),
+        )
+    return _scheduler
@@ -0,0 +1,260 @@
+"""
+Full-text search over scene content for Ghost-Writers.AI.
+
+Each project gets an in-process inverted index: for every word, the scenes
+containing it and the word positions within each scene. Queries are
+matched against the index only, so a search costs a few dictionary lookups
+however long the manuscript is:
+
+- every plain query word must appear in a scene ("harbor storm");
+- quoted phrases must appear as consecutive words ("\"the old lighthouse\"");
+- matching scenes are ranked by BM25 and returned with snippets and the
+  character offsets of each match.
+
+Scene history revisions can be searched too; they are indexed the first
+time a history search is made for the project.
+
+update_scene_content applies its change to the index directly. Any other
+scene write (bulk create, import, a write from another worker) bumps the
+project's scene version, and the index is rebuilt on the next search.
+"""
+
+import math
+import re
+import threading
+from collections import OrderedDict, defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from app.utils.metrics import REGISTRY
+
+search_index_builds_total = REGISTRY.counter(
+    "search_index_builds_total", "Project search indexes built from scratch, by kind (scenes or history)."
+)
+
+# Projects whose indexes are kept in memory
+CACHE_SIZE = 64
+# Characters of context either side of a match in a snippet
+SNIPPET_CONTEXT = 60
+SNIPPETS_PER_RESULT = 3
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+_WORD = re.compile(r"\w+(?:'\w+)?")
+_QUERY_PART = re.compile(r'"([^"]*)"|(\S+)')
+
+
+def tokenize(text: str) -> List[Tuple[str, int, int]]:
+    """(lowercase word, start, end) for each word of `text`."""
+    return [(match.group().lower(), match.start(), match.end()) for match in _WORD.finditer(text)]
+
+
+def parse_query(query: str) -> List[List[str]]:
+    """Query as a list of phrases; a plain word is a one-word phrase."""
+    phrases = []
+    for quoted, word in _QUERY_PART.findall(query):
+        words = [token for token, _, _ in tokenize(quoted or word)]
+        if words:
+            phrases.append(words)
+    return phrases
+
+
+@dataclass
+class _Document:
+    text: str
+    spans: List[Tuple[int, int]]
+    meta: Dict[str, Any] = field(default_factory=dict)
+
+
+class InvertedIndex:
+    """Word -> document -> word positions, with BM25 ranking."""
+
+    def __init__(self):
+        self.postings: Dict[str, Dict[str, List[int]]] = defaultdict(dict)
+        self.documents: Dict[str, _Document] = {}
+        self.total_words = 0
+
+    def add(self, doc_id: str, text: str, **meta: Any) -> None:
+        """Index (or re-index) one document."""
+        self.remove(doc_id)
+        tokens = tokenize(text or "")
+        positions: Dict[str, List[int]] = defaultdict(list)
+        for position, (word, _, _) in enumerate(tokens):
+            positions[word].append(position)
+        for word, word_positions in positions.items():
+            self.postings[word][doc_id] = word_positions
+        self.documents[doc_id] = _Document(text or "", [(start, end) for _, start, end in tokens], meta)
+        self.total_words += len(tokens)
+
+    def remove(self, doc_id: str) -> None:
+        document = self.documents.pop(doc_id, None)
+        if document is None:
+            return
+        self.total_words -= len(document.spans)
+        for word in {word.lower() for word in _WORD.findall(document.text)}:
+            docs = self.postings.get(word)
+            if docs is not None:
+                docs.pop(doc_id, None)
+                if not docs:
+                    del self.postings[word]
+
+    def _phrase_starts(self, phrase: List[str], doc_id: str) -> List[int]:
+        """Positions where `phrase` starts in the document."""
+        starts = self.postings[phrase[0]][doc_id]
+        for offset, word in enumerate(phrase[1:], start=1):
+            following = set(self.postings[word][doc_id])
+            starts = [start for start in starts if start + offset in following]
+        return starts
+
+    def search(self, query: str, limit: int = 20) -> Tuple[int, List[Dict[str, Any]]]:
+        """Total matching documents, and the best `limit` of them with snippets."""
+        phrases = parse_query(query)
+        words = {word for phrase in phrases for word in phrase}
+        if not phrases or any(word not in self.postings for word in words):
+            return 0, []
+
+        # Candidates contain every word; start from the rarest
+        candidates = set(min((self.postings[word] for word in words), key=len))
+        for word in words:
+            candidates &= self.postings[word].keys()
+
+        count = len(self.documents)
+        average_length = self.total_words / count if count else 0.0
+        scored = []
+        for doc_id in candidates:
+            starts = [self._phrase_starts(phrase, doc_id) for phrase in phrases]
+            if not all(starts):
+                continue
+            matches = [(start, len(phrase)) for phrase, phrase_starts in zip(phrases, starts) for start in phrase_starts]
+            document = self.documents[doc_id]
+            score = 0.0
+            for word in words:
+                frequency = len(self.postings[word][doc_id])
+                idf = math.log(1 + (count - len(self.postings[word]) + 0.5) / (len(self.postings[word]) + 0.5))
+                norm = K1 * (1 - B + B * len(document.spans) / (average_length or 1))
+                score += idf * frequency * (K1 + 1) / (frequency + norm)
+            scored.append((score, doc_id, sorted(matches)))
+
+        scored.sort(key=lambda item: (-item[0], item[1]))
+        return len(scored), [self._result(doc_id, score, matches) for score, doc_id, matches in scored[:limit]]
+
+    def _result(self, doc_id: str, score: float, matches: List[Tuple[int, int]]) -> Dict[str, Any]:
+        document = self.documents[doc_id]
+        spans = [
+            (document.spans[start][0], document.spans[start + length - 1][1]) for start, length in matches
+        ]
+        snippets = []
+        covered_until = -1
+        for start, end in spans:
+            if len(snippets) == SNIPPETS_PER_RESULT:
+                break
+            if start < covered_until:
+                continue
+            snippet_start = max(0, start - SNIPPET_CONTEXT)
+            snippet_end = min(len(document.text), end + SNIPPET_CONTEXT)
+            text = " ".join(document.text[snippet_start:snippet_end].split())
+            prefix = "…" if snippet_start > 0 else ""
+            suffix = "…" if snippet_end < len(document.text) else ""
+            snippets.append(prefix + text + suffix)
+            covered_until = snippet_end
+        return {
+            **document.meta,
+            "score": round(score, 4),
+            "matches": len(spans),
+            "positions": [[start, end] for start, end in spans],
+            "snippets": snippets,
+        }
+
+
+class _ProjectIndex:
+    def __init__(self, version: int):
+        self.version = version
+        self.scenes = InvertedIndex()
+        self.history: Optional[InvertedIndex] = None
+        self.lock = threading.Lock()
+
+
+class SceneSearch:
+    """
+    Per-project scene indexes, kept in step with a version counter.
+    `load_scenes(project_id)` and `load_history(scene_ids)` read the records
+    an index is built from.
+    """
+
+    def __init__(
+        self,
+        versions,
+        load_scenes: Callable[[str], List[Dict[str, Any]]],
+        load_history: Callable[[List[str]], Iterable[Dict[str, Any]]],
+    ):
+        self.versions = versions
+        self.load_scenes = load_scenes
+        self.load_history = load_history
+        self._projects: "OrderedDict[str, _ProjectIndex]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _project(self, project_id: str) -> _ProjectIndex:
+        version = self.versions.get(project_id)
+        with self._lock:
+            index = self._projects.get(project_id)
+            if index is not None and index.version == version:
+                self._projects.move_to_end(project_id)
+                return index
+
+        # Read the version before the data, as the list cache does
+        index = _ProjectIndex(version)
+        for scene in self.load_scenes(project_id):
+            index.scenes.add(scene["id"], scene.get("content", ""), **self._scene_meta(scene))
+        search_index_builds_total.inc(kind="scenes")
+        with self._lock:
+            self._projects[project_id] = index
+            self._projects.move_to_end(project_id)
+            while len(self._projects) > CACHE_SIZE:
+                self._projects.popitem(last=False)
+        return index
+
+    @staticmethod
+    def _scene_meta(scene: Dict[str, Any]) -> Dict[str, Any]:
+        return {"scene_id": scene["id"], "title": scene.get("title"), "position": scene.get("position")}
+
+    @staticmethod
+    def _revision_meta(scene_meta: Dict[str, Any], entry: Dict[str, Any]) -> Dict[str, Any]:
+        return {**scene_meta, "revision_id": entry["id"], "timestamp": entry["timestamp"]}
+
+    def search(self, project_id: str, query: str, limit: int = 20, include_history: bool = False) -> Dict[str, Any]:
+        index = self._project(project_id)
+        with index.lock:
+            if include_history and index.history is None:
+                index.history = InvertedIndex()
+                scenes = {doc_id: doc.meta for doc_id, doc in index.scenes.documents.items()}
+                for entry in self.load_history(list(scenes)):
+                    meta = self._revision_meta(scenes[entry["scene_id"]], entry)
+                    index.history.add(entry["id"], entry.get("content", ""), **meta)
+                search_index_builds_total.inc(kind="history")
+            total, results = index.scenes.search(query, limit)
+            response = {"query": query, "total": total, "results": results}
+            if include_history:
+                response["history_total"], response["history"] = index.history.search(query, limit)
+        return response
+
+    def update_content(
+        self, scene: Dict[str, Any], entry: Dict[str, Any], previous_version: int, version: int
+    ) -> None:
+        """
+        Apply one content update to an indexed project. Skipped (so the
+        index is rebuilt on the next search) unless the index was current
+        just before this write.
+        """
+        with self._lock:
+            index = self._projects.get(scene["project_id"])
+        if index is None:
+            return
+        with index.lock:
+            if index.version != previous_version:
+                return
+            index.scenes.add(scene["id"], scene.get("content", ""), **self._scene_meta(scene))
+            if index.history is not None:
+                meta = self._revision_meta(self._scene_meta(scene), entry)
+                index.history.add(entry["id"], entry.get("content", ""), **meta)
+            index.version = version
@@ -0,0 +1,70 @@
+"""
+Single-flight request coalescing for Ghost-Writers.AI.
+
+Double-clicks and client retries tend to ask for the same generation while
+the first one is still running. SingleFlight runs one call per key; callers
+arriving while it is in flight attach to it and receive the same result
+(or exception) instead of starting another crew.
+"""
+
+import asyncio
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict
+
+from app.utils.metrics import REGISTRY
+
+generation_coalesced_total = REGISTRY.counter(
+    "generation_coalesced_total", "Generations served by attaching to an identical in-flight one."
+)
+
+
+@dataclass
+class _Call:
+    task: asyncio.Task
+    waiters: int = 0
+
+
+class SingleFlight:
+    """Per-process registry of in-flight calls, keyed by caller-chosen keys."""
+
+    def __init__(self):
+        self._in_flight: Dict[str, _Call] = {}
+
+    async def run(self, key: str, call: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Await `call()` for `key`, or the call already in flight for it.
+        The call runs in its own task: a caller that is cancelled (e.g. its
+        client disconnected) does not cancel it for the others still
+        waiting. It is cancelled once the last waiter goes away.
+        """
+        entry = self._in_flight.get(key)
+        if entry is None:
+            entry = _Call(asyncio.get_running_loop().create_task(call()))
+            self._in_flight[key] = entry
+            entry.task.add_done_callback(lambda done: self._forget(key, done))
+        else:
+            generation_coalesced_total.inc()
+        entry.waiters += 1
+        try:
+            return await asyncio.shield(entry.task)
+        except asyncio.CancelledError:
+            if not entry.task.done() and entry.waiters == 1:
+                entry.task.cancel()
+            raise
+        finally:
+            entry.waiters -= 1
+
+    def _forget(self, key: str, task: asyncio.Task) -> None:
+        entry = self._in_flight.get(key)
+        if entry is not None and entry.task is task:
+            del self._in_flight[key]
+        if not task.cancelled():
+            # Mark a failure as retrieved even if every caller went away
+            task.exception()
+
+    def running(self, key: str) -> bool:
+        """Whether a call for `key` is in flight, so a caller would attach to it."""
+        return key in self._in_flight
+
+    def in_flight(self) -> int:
+        return len(self._in_flight)
@@ -0,0 +1,216 @@
+"""
+Character voice profiles for Ghost-Writers.AI.
+
+The Character Coach used to infer each character's voice from a dump of
+their traits on every scene. A voice profile is derived once per version
+of a character instead, from:
+
+- the character record: traits (mapped to how they speak), motivation,
+  background and relationships;
+- dialogue attributed to them in the project's scenes: sentence length,
+  questions, exclamations, contractions, favourite words and a few sample
+  lines.
+
+Profiles are rendered into one compact line that replaces the raw trait
+dump in prompts, so every generation writes the character the same way:
+
+    Mara Voss: voice: direct, guarded; short clipped sentences, asks questions,
+    uses contractions; favours "ledger", "tide" | wants: find her brother |
+    to Tobias: distrusts him | e.g. "Not tonight." / "Where's the ledger?"
+
+A profile is stored on the character record with a fingerprint of the
+fields it was derived from. Editing the character replaces the record,
+which drops the profile. A profile whose fingerprint no longer matches is
+derived again on the next use.
+"""
+
+import hashlib
+import json
+import re
+from collections import Counter
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from app.services.continuity import STOPWORDS
+from app.utils.metrics import REGISTRY
+
+voice_profiles_total = REGISTRY.counter(
+    "voice_profiles_total", "Character voice profile lookups, by result (hit or derived)."
+)
+
+# Character fields a profile is derived from
+PROFILE_FIELDS = ("name", "codename", "traits", "motivation", "background", "relationships")
+# Recent scenes searched for a character's dialogue, and lines kept
+MAX_SCENES = 30
+MAX_LINES = 200
+SAMPLE_LINES = 2
+SAMPLE_MAX_WORDS = 12
+FAVOURITE_WORDS = 3
+
+# How traits tend to sound in dialogue
+TRAIT_VOICES = {
+    "brave": "direct", "bold": "direct", "confident": "assured", "arrogant": "condescending",
+    "shy": "hesitant", "timid": "hesitant", "anxious": "hesitant", "nervous": "halting",
+    "intelligent": "precise", "clever": "quick", "witty": "quick, playful", "sarcastic": "dry, ironic",
+    "cynical": "dry", "kind": "warm", "gentle": "soft-spoken", "compassionate": "warm",
+    "cold": "clipped", "stoic": "terse", "reserved": "terse", "secretive": "guarded", "suspicious": "guarded",
+    "stubborn": "insistent", "impulsive": "blunt", "hot-headed": "blunt", "angry": "sharp",
+    "cheerful": "upbeat", "optimistic": "upbeat", "formal": "formal", "noble": "formal",
+    "resourceful": "practical", "pragmatic": "practical", "curious": "inquisitive", "wise": "measured",
+    "calm": "measured", "mysterious": "guarded", "loyal": "earnest", "honest": "plain-spoken",
+}
+
+_QUOTE = re.compile(r'"([^"\n]+)"|“([^”]+)”')
+_PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+_WORD = re.compile(r"[A-Za-z][A-Za-z'-]*")
+_SENTENCE_END = re.compile(r"[.!?]+")
+_CONTRACTION = re.compile(r"\b\w+'(?:s|t|re|ve|ll|d|m)\b", re.IGNORECASE)
+
+
+def fingerprint(character: Dict[str, Any]) -> str:
+    payload = json.dumps({field: character.get(field) for field in PROFILE_FIELDS}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def _name_parts(character: Dict[str, Any]) -> List[str]:
+    """Words that name the character in prose: full name, codename and distinctive name parts."""
+    names = [character.get("name") or "", character.get("codename") or ""]
+    parts = [part for name in names for part in _WORD.findall(name) if len(part) > 1 and part.lower() not in STOPWORDS]
+    return [name.strip() for name in names if name.strip()] + parts
+
+
+def attributed_dialogue(character: Dict[str, Any], others: Iterable[Dict[str, Any]], texts: Iterable[str]) -> List[str]:
+    """
+    Lines of dialogue the character speaks in `texts`: the quotes of every
+    paragraph that names this character and none of the `others`.
+    """
+    own = _name_parts(character)
+    if not own:
+        return []
+    other_names = {part for other in others for part in _name_parts(other)} - set(own)
+    own_pattern = re.compile(r"\b(?:" + "|".join(map(re.escape, own)) + r")\b")
+    other_pattern = re.compile(r"\b(?:" + "|".join(map(re.escape, other_names)) + r")\b") if other_names else None
+
+    lines: List[str] = []
+    for text in texts:
+        for paragraph in _PARAGRAPH_BREAK.split(text or ""):
+            if not own_pattern.search(paragraph):
+                continue
+            if other_pattern is not None and other_pattern.search(_QUOTE.sub("", paragraph)):
+                continue
+            lines.extend(" ".join((straight or curly).split()) for straight, curly in _QUOTE.findall(paragraph))
+            if len(lines) >= MAX_LINES:
+                return lines[:MAX_LINES]
+    return lines
+
+
+def _speech_habits(lines: List[str]) -> List[str]:
+    sentences = [sentence for line in lines for sentence in _SENTENCE_END.split(line) if sentence.strip()]
+    words = [word for line in lines for word in _WORD.findall(line)]
+    if not sentences or not words:
+        return []
+    habits = []
+    average = len(words) / len(sentences)
+    if average <= 6:
+        habits.append("short clipped sentences")
+    elif average >= 16:
+        habits.append("long flowing sentences")
+    if sum("?" in line for line in lines) / len(lines) >= 0.25:
+        habits.append("asks questions")
+    if sum("!" in line for line in lines) / len(lines) >= 0.25:
+        habits.append("exclaims")
+    contractions = sum(len(_CONTRACTION.findall(line)) for line in lines)
+    habits.append("uses contractions" if contractions / len(sentences) >= 0.2 else "avoids contractions")
+    return habits
+
+
+def _favourite_words(lines: List[str], names: List[str]) -> List[str]:
+    excluded = STOPWORDS | {name.lower() for name in names}
+    counts = Counter(
+        word.lower() for line in lines for word in _WORD.findall(line) if len(word) > 3 and word.lower() not in excluded
+    )
+    return [word for word, count in counts.most_common(FAVOURITE_WORDS) if count > 1]
+
+
+def _samples(lines: List[str]) -> List[str]:
+    # Short, distinct lines show the voice best
+    short = sorted({line for line in lines if len(line.split()) <= SAMPLE_MAX_WORDS}, key=lambda line: (len(line), line))
+    return short[:SAMPLE_LINES]
+
+
+def _clean(value: Any) -> str:
+    if isinstance(value, dict):
+        return "; ".join(f"{key}: {item}" for key, item in value.items())
+    if isinstance(value, (list, tuple, set)):
+        value = ", ".join(str(item) for item in value)
+    return " ".join(str(value or "").split())
+
+
+def derive_profile(character: Dict[str, Any], dialogue: List[str]) -> Dict[str, Any]:
+    """A voice profile for the character from its record and the dialogue attributed to it."""
+    traits = character.get("traits") or []
+    if isinstance(traits, str):
+        traits = [trait.strip() for trait in traits.split(",")]
+    tones: List[str] = []
+    for trait in traits:
+        tone = TRAIT_VOICES.get(trait.lower().strip())
+        if tone and tone not in tones:
+            tones.append(tone)
+
+    relationships = character.get("relationships") or {}
+    if isinstance(relationships, dict):
+        addresses = [f"to {_clean(name)}: {_clean(description)}" for name, description in relationships.items()]
+    else:
+        addresses = [f"ties: {_clean(relationships)}"] if relationships else []
+
+    return {
+        "fingerprint": fingerprint(character),
+        "tones": tones or [_clean(trait).lower() for trait in traits[:2]],
+        "habits": _speech_habits(dialogue),
+        "favourite_words": _favourite_words(dialogue, _name_parts(character)),
+        "samples": _samples(dialogue),
+        "motivation": _clean(character.get("motivation")),
+        "background": _clean(character.get("background")),
+        "addresses": addresses,
+        "dialogue_lines": len(dialogue),
+        "derived_at": datetime.now(),
+    }
+
+
+def render_profile(name: str, profile: Dict[str, Any]) -> str:
+    """The profile as one prompt line."""
+    voice = ", ".join(profile["tones"]) or "neutral"
+    if profile["habits"]:
+        voice += "; " + ", ".join(profile["habits"])
+    if profile["favourite_words"]:
+        voice += "; favours " + ", ".join(f'"{word}"' for word in profile["favourite_words"])
+    parts = [f"{_clean(name)}: voice: {voice}"]
+    if profile["motivation"]:
+        parts.append(f"wants: {profile['motivation']}")
+    parts.extend(profile["addresses"])
+    if profile["samples"]:
+        parts.append("e.g. " + " / ".join(f'"{sample}"' for sample in profile["samples"]))
+    return " | ".join(parts)
+
+
+def voice_profile(
+    character: Dict[str, Any],
+    load_texts: Callable[[], Iterable[str]],
+    others: Iterable[Dict[str, Any]] = (),
+    store: Optional[Callable[[Dict[str, Any]], None]] = None,
+    refresh: bool = False,
+) -> Dict[str, Any]:
+    """
+    The character's cached profile, or a new one derived from its record
+    and the dialogue in `load_texts()` (then passed to `store`) when there
+    is none, it is stale, or `refresh` is set.
+    """
+    cached = character.get("voice_profile")
+    if cached is not None and cached.get("fingerprint") == fingerprint(character) and not refresh:
+        voice_profiles_total.inc(result="hit")
+        return cached
+    voice_profiles_total.inc(result="derived")
+    profile = derive_profile(character, attributed_dialogue(character, others, load_texts()))
+    if store is not None:
+        store(profile)
+    return profile
@@ -0,0 +1,103 @@
+"""
+Bulk import helpers for Ghost-Writers.AI.
+
+Bulk endpoints accept either a JSON array (or {"items": [...]}) or an NDJSON
+stream (Content-Type: application/x-ndjson, one object per line). Items are
+validated together; valid ones are written in a single transaction and
+every item gets its own result, so one bad row does not sink an import.
+"""
+
+import json
+import os
+from typing import Any, Dict, List, Tuple, Type
+
+from fastapi import HTTPException, Request
+from pydantic import BaseModel, ValidationError
+
+MAX_BULK_ITEMS = int(os.getenv("GHOSTWRITERS_BULK_MAX_ITEMS", "10000"))
+
+NDJSON_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl")
+
+
+class _InvalidLine:
+    """Placeholder for an NDJSON line that is not valid JSON."""
+
+    def __init__(self, error: str):
+        self.error = error
+
+
+def _too_many() -> HTTPException:
+    return HTTPException(status_code=413, detail=f"At most {MAX_BULK_ITEMS} items per batch")
+
+
+async def read_items(request: Request) -> List[Any]:
+    """Raw items of a bulk request body, from a JSON array or an NDJSON stream."""
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    if content_type in NDJSON_TYPES:
+        return await _read_ndjson(request)
+
+    try:
+        body = json.loads(await request.body() or b"null")
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Body must be a JSON array or NDJSON")
+    if isinstance(body, dict) and isinstance(body.get("items"), list):
+        body = body["items"]
+    if not isinstance(body, list):
+        raise HTTPException(status_code=400, detail="Body must be a JSON array or NDJSON")
+    if len(body) > MAX_BULK_ITEMS:
+        raise _too_many()
+    return body
+
+
+async def _read_ndjson(request: Request) -> List[Any]:
+    """Parse NDJSON as it streams in; a line that is not JSON becomes an item error."""
+    items: List[Any] = []
+    pending = b""
+
+    def take(line: bytes) -> None:
+        if not line.strip():
+            return
+        if len(items) >= MAX_BULK_ITEMS:
+            raise _too_many()
+        try:
+            items.append(json.loads(line))
+        except ValueError as exc:
+            items.append(_InvalidLine(str(exc)))
+
+    async for chunk in request.stream():
+        pending += chunk
+        *lines, pending = pending.split(b"\n")
+        for line in lines:
+            take(line)
+    take(pending)
+    return items
+
+
+def validate_items(
+    items: List[Any], model: Type[BaseModel]
+) -> Tuple[List[Tuple[int, BaseModel]], Dict[int, Dict[str, Any]]]:
+    """
+    Validate every item against `model`. Returns the valid (index, model)
+    pairs and an error result for each invalid index.
+    """
+    valid: List[Tuple[int, BaseModel]] = []
+    errors: Dict[int, Dict[str, Any]] = {}
+    for index, item in enumerate(items):
+        if isinstance(item, _InvalidLine):
+            errors[index] = {"index": index, "status": "error", "errors": [{"msg": f"Invalid JSON: {item.error}"}]}
+            continue
+        try:
+            valid.append((index, model.parse_obj(item)))
+        except ValidationError as exc:
+            details = [{"loc": list(error["loc"]), "msg": error["msg"]} for error in exc.errors()]
+            errors[index] = {"index": index, "status": "error", "errors": details}
+    return valid, errors
+
+
+def bulk_response(total: int, created: Dict[int, str], errors: Dict[int, Dict[str, Any]]) -> Dict[str, Any]:
+    """Summary plus one result per input item, in input order."""
+    results = [
+        {"index": index, "status": "created", "id": created[index]} if index in created else errors[index]
+        for index in range(total)
+    ]
+    return {"created": len(created), "failed": len(errors), "results": results}
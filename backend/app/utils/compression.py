@@ -0,0 +1,202 @@
+"""
+Response compression for Ghost-Writers.AI.
+
+Prose-heavy responses (generated scenes, history lists, exports) compress
+several-fold. CompressionMiddleware picks the best encoding the client
+accepts from brotli, zstd (when their packages are installed) and gzip:
+
+- bodies sent in one piece are compressed only when they reach
+  GHOSTWRITERS_COMPRESS_MIN_BYTES; smaller ones gain nothing;
+- streamed bodies are compressed incrementally. Server-sent events are
+  flushed after every message so each event still reaches the client as
+  soon as it is sent; other streams (exports) are flushed only at the end
+  so the compressor can use the whole window.
+
+Only text-like content types are compressed, and responses that already
+carry a Content-Encoding, or answer a byte range, are left alone.
+"""
+
+import os
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli is optional
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - zstandard is optional
+    zstandard = None
+
+MIN_SIZE = int(os.getenv("GHOSTWRITERS_COMPRESS_MIN_BYTES", "1024"))
+GZIP_LEVEL = int(os.getenv("GHOSTWRITERS_GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("GHOSTWRITERS_BROTLI_QUALITY", "5"))
+ZSTD_LEVEL = int(os.getenv("GHOSTWRITERS_ZSTD_LEVEL", "3"))
+
+COMPRESSIBLE_TYPES = (
+    "text/",
+    "application/json",
+    "application/x-ndjson",
+    "application/javascript",
+    "application/xml",
+)
+EVENT_STREAM = "text/event-stream"
+
+
+class _Gzip:
+    def __init__(self):
+        self._compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush(zlib.Z_FINISH)
+
+
+class _Brotli:
+    def __init__(self):
+        self._compressor = brotli.Compressor(quality=BROTLI_QUALITY, mode=brotli.MODE_TEXT)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush()
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+
+class _Zstd:
+    def __init__(self):
+        self._compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_FINISH)
+
+
+# Preference order when the client accepts several equally
+ENCODERS = {
+    name: encoder
+    for name, encoder, available in (
+        ("br", _Brotli, brotli is not None),
+        ("zstd", _Zstd, zstandard is not None),
+        ("gzip", _Gzip, True),
+    )
+    if available
+}
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """The best supported encoding for an Accept-Encoding header, if any."""
+    weights: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if name:
+            weights[name.strip().lower()] = quality
+    ranked: List[Tuple[float, int, str]] = []
+    for preference, name in enumerate(ENCODERS):
+        quality = weights.get(name, weights.get("*", 0.0))
+        if quality > 0:
+            ranked.append((-quality, preference, name))
+    return min(ranked)[2] if ranked else None
+
+
+class CompressionMiddleware:
+    """ASGI middleware compressing text responses with brotli, zstd or gzip."""
+
+    def __init__(self, app, min_size: int = MIN_SIZE):
+        self.app = app
+        self.min_size = min_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        encoder = None
+        flush_each = False
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start_message, encoder, flush_each, passthrough
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message["headers"])
+                content_type = headers.get("content-type", "")
+                passthrough = (
+                    "content-encoding" in headers
+                    # Byte ranges refer to the identity encoding
+                    or "content-range" in headers
+                    or message["status"] < 200
+                    or message["status"] in (204, 304)
+                    or not content_type.startswith(COMPRESSIBLE_TYPES)
+                )
+                if passthrough:
+                    await send(message)
+                else:
+                    MutableHeaders(raw=message["headers"]).add_vary_header("Accept-Encoding")
+                    flush_each = content_type.startswith(EVENT_STREAM)
+                    # Held until the first body chunk shows whether it streams
+                    start_message = message
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if start_message is not None:
+                headers = MutableHeaders(raw=start_message["headers"])
+                if not more_body and len(body) < self.min_size:
+                    passthrough = True
+                    await send(start_message)
+                    await send(message)
+                    return
+                encoder = ENCODERS[encoding]()
+                headers["Content-Encoding"] = encoding
+                if more_body:
+                    del headers["Content-Length"]
+                start, start_message = start_message, None
+                if not more_body:
+                    body = encoder.compress(body) + encoder.finish()
+                    headers["Content-Length"] = str(len(body))
+                    await send(start)
+                    await send({"type": "http.response.body", "body": body})
+                    return
+                await send(start)
+
+            chunk = encoder.compress(body)
+            if not more_body:
+                chunk += encoder.finish()
+            elif flush_each:
+                chunk += encoder.flush()
+            if chunk or not more_body:
+                await send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+
+        await self.app(scope, receive, send_wrapper)
@@ -0,0 +1,102 @@
+"""
+Fast JSON responses for Ghost-Writers.AI.
+
+Routes normally return plain dicts that FastAPI validates against the
+response_model and encodes through jsonable_encoder. For records the server
+built itself that validation is redundant, and for long lists it dominates
+the request's CPU time. Routes can opt in to serializing straight to bytes:
+
+    return fast_json_response(Scene, project_scenes)
+
+Each record is projected onto the model's fields (so fields the model does
+not declare are still left out, and defaults filled in) and encoded with
+orjson when it is installed, or pydantic-core's JSON serializer otherwise.
+The output matches the validated path. Set GHOSTWRITERS_FAST_JSON=false to
+send everything through full validation instead.
+
+Projection covers flat response models; a model with nested model fields is
+always validated.
+"""
+
+import os
+import threading
+from typing import Any, Dict, Iterable, List, Tuple, Type
+
+from fastapi.responses import Response
+from pydantic import BaseModel, TypeAdapter
+from pydantic_core import PydanticUndefined, to_json, to_jsonable_python
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional
+    orjson = None
+
+FAST_JSON = os.getenv("GHOSTWRITERS_FAST_JSON", "true").lower() != "false"
+
+_REQUIRED = object()
+
+
+def dumps(content: Any) -> bytes:
+    """Compact JSON bytes for plain data (dicts, lists, datetimes, ...)."""
+    if orjson is not None:
+        return orjson.dumps(content, default=to_jsonable_python, option=orjson.OPT_NON_STR_KEYS)
+    return to_json(content)
+
+
+def _is_model(annotation: Any) -> bool:
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return True
+    return any(_is_model(arg) for arg in getattr(annotation, "__args__", ()))
+
+
+class _Shape:
+    """Field names and defaults of a flat response model."""
+
+    def __init__(self, model: Type[BaseModel]):
+        self.adapter = TypeAdapter(List[model])
+        self.flat = not any(_is_model(field.annotation) for field in model.model_fields.values())
+        self.fields: List[Tuple[str, Any]] = []
+        for name, field in model.model_fields.items():
+            default = field.get_default(call_default_factory=True)
+            self.fields.append((name, _REQUIRED if default is PydanticUndefined else default))
+
+    def project(self, record: Dict[str, Any]) -> Dict[str, Any]:
+        projected = {}
+        for name, default in self.fields:
+            if name in record:
+                projected[name] = record[name]
+            elif default is _REQUIRED:
+                raise KeyError(name)
+            else:
+                projected[name] = default
+        return projected
+
+
+_shapes: Dict[Type[BaseModel], _Shape] = {}
+_shapes_lock = threading.Lock()
+
+
+def _shape(model: Type[BaseModel]) -> _Shape:
+    shape = _shapes.get(model)
+    if shape is None:
+        with _shapes_lock:
+            shape = _shapes.setdefault(model, _Shape(model))
+    return shape
+
+
+def serialize_list(model: Type[BaseModel], records: Iterable[Dict[str, Any]]) -> bytes:
+    """JSON array of `records` as `model` would render them."""
+    records = list(records)
+    shape = _shape(model)
+    if FAST_JSON and shape.flat:
+        try:
+            return dumps([shape.project(record) for record in records])
+        except KeyError:
+            # A record missing a required field: let validation report it
+            pass
+    return shape.adapter.dump_json(shape.adapter.validate_python(records))
+
+
+def fast_json_response(model: Type[BaseModel], records: Iterable[Dict[str, Any]], **kwargs: Any) -> Response:
+    """Response with `records` serialized by serialize_list, skipping FastAPI's response validation."""
+    return Response(serialize_list(model, records), media_type="application/json", **kwargs)
@@ -0,0 +1,77 @@
+"""
+Conditional GET support for Ghost-Writers.AI list endpoints.
+
+List responses are tagged with an ETag derived from the collection's
+version counter for the requested scope (see VersionCounter), so checking
+whether anything changed costs one counter read:
+
+- a request whose If-None-Match matches the current ETag gets 304;
+- otherwise the serialized body cached for that version is sent as is;
+- only after a write is the list read and serialized again.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, List, Tuple, Type
+
+from fastapi import Request, Response
+from pydantic import BaseModel
+
+from app.utils.fast_json import serialize_list
+from app.utils.metrics import REGISTRY
+from app.utils.state import VersionCounter
+
+list_cache_total = REGISTRY.counter(
+    "list_cache_total", "Cached list endpoint lookups, by list and result (not_modified, hit or miss)."
+)
+
+# Serialized bodies kept per list (one per scope)
+CACHE_SIZE = 512
+
+
+def _matches(if_none_match: str, etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against an ETag."""
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    return "*" in candidates or any(candidate.removeprefix("W/") == etag.removeprefix("W/") for candidate in candidates)
+
+
+class CachedList:
+    """Versioned, serialized responses of one list endpoint, keyed by scope."""
+
+    def __init__(self, name: str, versions: VersionCounter, model: Type[BaseModel]):
+        self.name = name
+        self.versions = versions
+        self.model = model
+        self._bodies: "OrderedDict[str, Tuple[int, bytes]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def etag(self, version: int) -> str:
+        return f'W/"{self.versions.epoch}-{version}"'
+
+    def respond(self, request: Request, scope: str, load: Callable[[], List[Any]]) -> Response:
+        """304, the cached body, or the freshly serialized result of `load()`."""
+        # Read the version before the data: a write in between leaves the
+        # body tagged with the older version, so it is rebuilt next time
+        version = self.versions.get(scope)
+        etag = self.etag(version)
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+
+        if _matches(request.headers.get("if-none-match", ""), etag):
+            list_cache_total.inc(list=self.name, result="not_modified")
+            return Response(status_code=304, headers=headers)
+
+        with self._lock:
+            cached = self._bodies.get(scope)
+            if cached is not None and cached[0] == version:
+                self._bodies.move_to_end(scope)
+                list_cache_total.inc(list=self.name, result="hit")
+                return Response(cached[1], media_type="application/json", headers=headers)
+
+        list_cache_total.inc(list=self.name, result="miss")
+        body = serialize_list(self.model, load())
+        with self._lock:
+            self._bodies[scope] = (version, body)
+            self._bodies.move_to_end(scope)
+            while len(self._bodies) > CACHE_SIZE:
+                self._bodies.popitem(last=False)
+        return Response(body, media_type="application/json", headers=headers)
@@ -0,0 +1,295 @@
+"""
+Shared state backend for Ghost-Writers.AI.
+
+Routers keep their stub stores as dict-like collections. By default these
+are plain in-process dicts. With GHOSTWRITERS_STATE_BACKEND=sqlite they are
+backed by a local SQLite database (GHOSTWRITERS_STATE_PATH) so several
+uvicorn worker processes see the same data.
+
+Values are stored pickled, so nested dicts and datetimes round-trip
+unchanged. Mutating a value fetched from a SQLite collection does not
+persist it: write it back, or use `edit()` for an atomic read-modify-write.
+"""
+
+import os
+import pickle
+import sqlite3
+import threading
+import uuid
+from collections.abc import MutableMapping
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+_memory_lock = threading.RLock()
+
+
+def backend_name() -> str:
+    return os.getenv("GHOSTWRITERS_STATE_BACKEND", "memory").lower()
+
+
+class SQLiteStore:
+    """One SQLite database file shared by every collection and worker process."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        with self.connection() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS state ("
+                " collection TEXT NOT NULL,"
+                " key TEXT NOT NULL,"
+                " value BLOB NOT NULL,"
+                " PRIMARY KEY (collection, key))"
+            )
+
+    @contextmanager
+    def connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # Autocommit; multi-statement updates use transaction()
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.depth = 0
+        yield conn
+
+    @contextmanager
+    def transaction(self):
+        """
+        Exclusive write transaction across threads and processes.
+        Nested calls on the same thread join the outer transaction.
+        """
+        with self.connection() as conn:
+            if self._local.depth == 0:
+                conn.execute("BEGIN IMMEDIATE")
+            self._local.depth += 1
+            try:
+                yield conn
+            except BaseException:
+                self._local.depth -= 1
+                if self._local.depth == 0:
+                    conn.execute("ROLLBACK")
+                raise
+            self._local.depth -= 1
+            if self._local.depth == 0:
+                conn.execute("COMMIT")
+
+
+class SQLiteCollection(MutableMapping):
+    """Dict-like view over one collection in a SQLiteStore."""
+
+    def __init__(self, store: SQLiteStore, name: str):
+        self.store = store
+        self.name = name
+
+    def __getitem__(self, key: str) -> Any:
+        with self.store.connection() as conn:
+            row = conn.execute(
+                "SELECT value FROM state WHERE collection = ? AND key = ?", (self.name, key)
+            ).fetchone()
+        if row is None:
+            raise KeyError(key)
+        return pickle.loads(row[0])
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        with self.store.connection() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO state (collection, key, value) VALUES (?, ?, ?)",
+                (self.name, key, pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)),
+            )
+
+    def __delitem__(self, key: str) -> None:
+        with self.store.connection() as conn:
+            cursor = conn.execute(
+                "DELETE FROM state WHERE collection = ? AND key = ?", (self.name, key)
+            )
+        if cursor.rowcount == 0:
+            raise KeyError(key)
+
+    def __contains__(self, key: object) -> bool:
+        with self.store.connection() as conn:
+            row = conn.execute(
+                "SELECT 1 FROM state WHERE collection = ? AND key = ?", (self.name, key)
+            ).fetchone()
+        return row is not None
+
+    def __iter__(self) -> Iterator[str]:
+        with self.store.connection() as conn:
+            keys = [row[0] for row in conn.execute(
+                "SELECT key FROM state WHERE collection = ?", (self.name,)
+            )]
+        return iter(keys)
+
+    def __len__(self) -> int:
+        with self.store.connection() as conn:
+            return conn.execute(
+                "SELECT COUNT(*) FROM state WHERE collection = ?", (self.name,)
+            ).fetchone()[0]
+
+    # Bulk reads in one query instead of one query per key
+    def items(self) -> List[Tuple[str, Any]]:
+        with self.store.connection() as conn:
+            rows = conn.execute(
+                "SELECT key, value FROM state WHERE collection = ?", (self.name,)
+            ).fetchall()
+        return [(key, pickle.loads(value)) for key, value in rows]
+
+    def values(self) -> List[Any]:
+        return [value for _, value in self.items()]
+
+    def get_many(self, keys: List[str]) -> List[Any]:
+        """Values for `keys` (missing ones skipped), in key order, in one query per 500 keys."""
+        found = {}
+        with self.store.connection() as conn:
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = conn.execute(
+                    f"SELECT key, value FROM state WHERE collection = ? AND key IN ({placeholders})",
+                    (self.name, *chunk),
+                ).fetchall()
+                found.update((key, pickle.loads(value)) for key, value in rows)
+        return [found[key] for key in keys if key in found]
+
+    def put_many(self, items: Iterable[Tuple[str, Any]]) -> None:
+        with self.store.connection() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO state (collection, key, value) VALUES (?, ?, ?)",
+                (
+                    (self.name, key, pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+                    for key, value in items
+                ),
+            )
+
+    def clear(self) -> None:
+        with self.store.connection() as conn:
+            conn.execute("DELETE FROM state WHERE collection = ?", (self.name,))
+
+
+_store: Optional[SQLiteStore] = None
+_store_lock = threading.Lock()
+
+
+def get_store() -> Optional[SQLiteStore]:
+    """The shared SQLite store, or None when running on the memory backend."""
+    global _store
+    if backend_name() != "sqlite":
+        return None
+    with _store_lock:
+        if _store is None:
+            _store = SQLiteStore(os.getenv("GHOSTWRITERS_STATE_PATH", "ghostwriters_state.db"))
+        return _store
+
+
+def collection(name: str) -> MutableMapping:
+    """Named collection on the configured backend (a plain dict by default)."""
+    store = get_store()
+    if store is None:
+        return {}
+    return SQLiteCollection(store, name)
+
+
+@contextmanager
+def transaction():
+    """Serialise a multi-step update against other threads and workers."""
+    store = get_store()
+    if store is None:
+        with _memory_lock:
+            yield
+        return
+    with store.transaction():
+        yield
+
+
+@contextmanager
+def edit(collection: MutableMapping, key: str, default_factory: Optional[Callable[[], Any]] = None):
+    """
+    Atomic read-modify-write of one value. Yields the value to mutate in
+    place; it is written back when the block exits without error.
+
+        with edit(scene_history_db, scene_id, list) as history:
+            history.append(entry)
+    """
+    with transaction():
+        if key in collection:
+            value = collection[key]
+        elif default_factory is not None:
+            value = default_factory()
+        else:
+            raise KeyError(key)
+        yield value
+        collection[key] = value
+
+
+def get_many(collection: MutableMapping, keys: List[str]) -> List[Any]:
+    """Values for `keys` that exist, in order; one round trip on SQLite."""
+    if isinstance(collection, SQLiteCollection):
+        return collection.get_many(keys)
+    return [collection[key] for key in keys if key in collection]
+
+
+def put_many(collection: MutableMapping, items: Iterable[Tuple[str, Any]]) -> None:
+    """Write many values at once; wrap in transaction() to make the batch atomic."""
+    if isinstance(collection, SQLiteCollection):
+        collection.put_many(items)
+        return
+    collection.update(items)
+
+
+class SecondaryIndex:
+    """
+    Ids of a collection's records grouped by one field (e.g. scenes by
+    project_id), stored in its own collection so list endpoints read only
+    the matching records instead of scanning everything.
+    """
+
+    def __init__(self, name: str, source: MutableMapping, field: str):
+        self.field = field
+        self.source = source
+        self.db = collection(name)
+        if not len(self.db) and len(source):
+            # Records written before the index existed
+            self.add(source.values())
+
+    def add(self, records: Iterable[Dict[str, Any]]) -> None:
+        """Index a batch of new records, with one write per distinct field value."""
+        grouped: Dict[Any, List[str]] = {}
+        for record in records:
+            if record.get(self.field) is not None:
+                grouped.setdefault(record[self.field], []).append(record["id"])
+        with transaction():
+            for value, ids in grouped.items():
+                with edit(self.db, value, list) as indexed:
+                    indexed.extend(ids)
+
+    def ids(self, value: Any) -> List[str]:
+        return self.db.get(value, [])
+
+    def records(self, value: Any) -> List[Dict[str, Any]]:
+        return get_many(self.source, self.ids(value))
+
+
+class VersionCounter:
+    """
+    Write counters for one collection, per scope (e.g. per project), kept in
+    shared state so every worker sees the same versions. Writers bump the
+    scope inside the same transaction as the write, after changing the data.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.db = collection(f"{name}_versions")
+        with transaction():
+            if "__epoch__" not in self.db:
+                # Distinguishes counters that restarted from zero (memory backend)
+                self.db["__epoch__"] = uuid.uuid4().hex[:12]
+        self.epoch = self.db["__epoch__"]
+
+    def get(self, scope: str) -> int:
+        return self.db.get(scope, 0)
+
+    def bump(self, *scopes: str) -> None:
+        with transaction():
+            for scope in set(scopes):
+                self.db[scope] = self.db.get(scope, 0) + 1
@@ -0,0 +1,3 @@
+"""
+Benchmark suite for the Ghost-Writers.AI backend.
+"""
@@ -0,0 +1,418 @@
+"""
+Benchmark suite for the Ghost-Writers.AI backend.
+
+Drives the FastAPI app in-process against synthetic projects with thousands
+of scenes, characters and memories, and measures p50/p99 latency and
+throughput per router. Also measures SceneGenerationCrew orchestration
+overhead (crew time not spent inside LLM calls) using the deterministic
+local LLM stand-in.
+
+Usage (from backend/):
+    python -m benchmarks.run_benchmarks --output benchmarks/results/latest.json
+    python -m benchmarks.run_benchmarks --quick --compare benchmarks/results/baseline.json
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Benchmarks never call a real model
+os.environ.setdefault("GHOSTWRITERS_LLM", "local")
+os.environ.setdefault("CREWAI_DISABLE_TELEMETRY", "true")
+os.environ.setdefault("OTEL_SDK_DISABLED", "true")
+
+import httpx
+
+from app.main import app
+from app.routers import characters, memory, projects, scenes
+
+USER_ID = "benchmark-user"
+HEADERS = {"x-user-id": USER_ID}
+MEMORY_CATEGORIES = ("Character", "Plot", "World", "Style")
+
+# (router, label, method, path builder, body builder, iterations multiplier)
+Scenario = Tuple[str, str, str, Callable[[random.Random], str], Optional[Callable[[random.Random], Dict[str, Any]]], float]
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """Nearest-rank percentile of a list of samples."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100.0 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def summarise(samples: List[float], elapsed: float, errors: int) -> Dict[str, Any]:
+    """Latency percentiles (ms) and throughput for one scenario."""
+    return {
+        "iterations": len(samples),
+        "errors": errors,
+        "p50_ms": round(percentile(samples, 50) * 1000, 3),
+        "p99_ms": round(percentile(samples, 99) * 1000, 3),
+        "mean_ms": round(statistics.mean(samples) * 1000, 3) if samples else 0.0,
+        "throughput_rps": round(len(samples) / elapsed, 1) if elapsed else 0.0,
+    }
+
+
+def seed_dataset(
+    project_count: int,
+    scenes_per_project: int,
+    characters_per_project: int,
+    memories_per_scene: int,
+    seed: int = 42,
+) -> Dict[str, List[str]]:
+    """
+    Populate the in-memory stores directly with synthetic, reproducible data.
+    Returns the generated IDs so scenarios can address real entities.
+    """
+    rng = random.Random(seed)
+    ids: Dict[str, List[str]] = {"projects": [], "scenes": [], "characters": [], "memories": []}
+    base_time = datetime(2025, 5, 1)
+
+    for project_index in range(project_count):
+        project_id = str(uuid.UUID(int=rng.getrandbits(128)))
+        projects.projects_db[project_id] = {
+            "id": project_id,
+            "user_id": USER_ID,
+            "created_at": base_time,
+            "title": f"Benchmark Project {project_index}",
+            "description": "Synthetic project for benchmarking",
+            "genre": "Mystery",
+            "audience": "Adult",
+            "writing_style": "Suspenseful",
+            "story_length": "Novel",
+        }
+        ids["projects"].append(project_id)
+
+        character_ids = []
+        for character_index in range(characters_per_project):
+            character_id = str(uuid.UUID(int=rng.getrandbits(128)))
+            characters.characters_db[character_id] = {
+                "id": character_id,
+                "project_id": project_id,
+                "created_at": base_time,
+                "name": f"Character {character_index}",
+                "codename": None,
+                "traits": ["perceptive", "cynical", "determined"],
+                "motivation": "To uncover the truth",
+                "background": "Grew up in the harbor town",
+                "relationships": {"mentor": "Character 0"},
+                "is_shared": False,
+            }
+            character_ids.append(character_id)
+        ids["characters"].extend(character_ids)
+
+        for position in range(scenes_per_project):
+            scene_id = str(uuid.UUID(int=rng.getrandbits(128)))
+            scenes.scenes_db[scene_id] = {
+                "id": scene_id,
+                "project_id": project_id,
+                "created_at": base_time + timedelta(seconds=position),
+                "title": f"Scene {position}",
+                "setting": "Abandoned warehouse at night",
+                "mood": "Tense",
+                "conflict": "A discovery reveals a disturbing pattern",
+                "characters": rng.sample(character_ids, min(3, len(character_ids))),
+                "position": position,
+            }
+            ids["scenes"].append(scene_id)
+
+            for memory_index in range(memories_per_scene):
+                memory_id = str(uuid.UUID(int=rng.getrandbits(128)))
+                memory.memory_db[memory_id] = {
+                    "id": memory_id,
+                    "scene_id": scene_id,
+                    "project_id": project_id,
+                    "created_at": base_time,
+                    "text": f"Fact {memory_index} established in scene {position}",
+                    "category": MEMORY_CATEGORIES[memory_index % len(MEMORY_CATEGORIES)],
+                }
+                ids["memories"].append(memory_id)
+
+    # Records were written directly, so index them the way the routers do
+    characters.characters_by_project.add(characters.characters_db.get(key) for key in ids["characters"])
+    scenes.scenes_by_project.add(scenes.scenes_db.get(key) for key in ids["scenes"])
+    memory.memory_by_scene.add(memory.memory_db.get(key) for key in ids["memories"])
+    characters.character_versions.bump(*ids["projects"])
+    scenes.scene_versions.bump(*ids["projects"])
+    memory.memory_versions.bump(*ids["scenes"])
+
+    return ids
+
+
+def build_scenarios(ids: Dict[str, List[str]], word_count: int) -> List[Scenario]:
+    """Representative requests for every router (Tavus calls external APIs and is skipped)."""
+    pick = lambda key: (lambda rng: rng.choice(ids[key]))
+    project = pick("projects")
+    scene = pick("scenes")
+    memory_id = pick("memories")
+
+    def scene_project(rng: random.Random) -> Tuple[str, str]:
+        scene_id = rng.choice(ids["scenes"])
+        return scene_id, scenes.scenes_db[scene_id]["project_id"]
+
+    def content_path(rng):
+        scene_id, project_id = scene_project(rng)
+        return f"/scenes/{scene_id}/content?project_id={project_id}"
+
+    def history_path(rng):
+        scene_id, project_id = scene_project(rng)
+        return f"/scenes/{scene_id}/history?project_id={project_id}"
+
+    return [
+        ("health", "GET /health", "GET", lambda rng: "/health", None, 1.0),
+        ("auth", "GET /auth/session", "GET", lambda rng: "/auth/session", None, 1.0),
+        ("projects", "GET /projects/", "GET", lambda rng: "/projects/", None, 1.0),
+        ("projects", "GET /projects/{id}", "GET", lambda rng: f"/projects/{project(rng)}", None, 1.0),
+        ("projects", "POST /projects/", "POST", lambda rng: "/projects/", lambda rng: {
+            "title": "Bench", "description": "Bench", "genre": "Mystery", "audience": "Adult",
+            "writing_style": "Suspenseful", "story_length": "Novel",
+        }, 1.0),
+        ("characters", "GET /characters/", "GET", lambda rng: f"/characters/?project_id={project(rng)}", None, 0.5),
+        ("characters", "POST /characters/", "POST", lambda rng: "/characters/", lambda rng: {
+            "name": "Bench Character", "traits": ["brave"], "motivation": "Win", "project_id": project(rng),
+        }, 1.0),
+        ("scenes", "GET /scenes/", "GET", lambda rng: f"/scenes/?project_id={project(rng)}", None, 0.5),
+        ("scenes", "POST /scenes/", "POST", lambda rng: "/scenes/", lambda rng: {
+            "title": "Bench Scene", "setting": "Lab", "mood": "Calm", "conflict": "None",
+            "characters": [], "position": rng.randint(0, 10000), "project_id": project(rng),
+        }, 1.0),
+        ("scenes", "PUT /scenes/reorder", "PUT", lambda rng: "/scenes/reorder", lambda rng: {
+            "scene_id": scene(rng), "new_position": rng.randint(0, 10000), "project_id": project(rng),
+        }, 1.0),
+        ("scenes", "POST /scenes/{id}/content", "POST", content_path, lambda rng: {
+            "content": "The night wind carried a voice across the harbor. " * 50,
+        }, 1.0),
+        ("scenes", "GET /scenes/{id}/history", "GET", history_path, None, 1.0),
+        ("memory", "GET /memory/{scene_id}", "GET", lambda rng: f"/memory/{scene(rng)}", None, 1.0),
+        ("memory", "POST /memory/", "POST", lambda rng: "/memory/", lambda rng: {
+            "text": "A new fact", "category": "Plot", "scene_id": scene(rng), "project_id": project(rng),
+        }, 1.0),
+        ("memory", "PUT /memory/{id}", "PUT", lambda rng: f"/memory/{memory_id(rng)}", lambda rng: {
+            "text": "An updated fact", "category": "World",
+        }, 1.0),
+        ("export", "POST /export/llama_prompt", "POST", lambda rng: "/export/llama_prompt", lambda rng: {
+            "project_id": project(rng),
+        }, 1.0),
+        ("agents", "GET /agents/usage/{project_id}", "GET", lambda rng: f"/agents/usage/{project(rng)}", None, 1.0),
+        ("agents", "POST /agents/generate/scene", "POST", lambda rng: "/agents/generate/scene", lambda rng: {
+            "scene_id": scene(rng), "project_id": project(rng), "word_count": word_count,
+            "include_characters": [], "include_memory": True,
+        }, 0.05),
+    ]
+
+
+async def run_scenario(
+    client: httpx.AsyncClient,
+    scenario: Scenario,
+    iterations: int,
+    concurrency: int,
+    seed: int,
+    warmup: int = 3,
+) -> Dict[str, Any]:
+    """Issue the scenario's request `iterations` times across `concurrency` workers."""
+    _, _, method, path_builder, body_builder, _ = scenario
+    rng = random.Random(seed)
+    requests = [(path_builder(rng), body_builder(rng) if body_builder else None) for _ in range(iterations)]
+    samples: List[float] = []
+    errors = 0
+    queue: asyncio.Queue = asyncio.Queue()
+    for request in requests:
+        queue.put_nowait(request)
+
+    async def worker():
+        nonlocal errors
+        while not queue.empty():
+            path, body = queue.get_nowait()
+            start = time.perf_counter()
+            response = await client.request(method, path, json=body, headers=HEADERS)
+            samples.append(time.perf_counter() - start)
+            if response.status_code >= 400:
+                errors += 1
+
+    # Untimed warm-up so first-request costs (lazy imports, caches) are not sampled
+    for path, body in requests[:min(warmup, iterations)]:
+        await client.request(method, path, json=body, headers=HEADERS)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarise(samples, time.perf_counter() - start, errors)
+
+
+async def benchmark_routes(
+    ids: Dict[str, List[str]],
+    iterations: int,
+    concurrency: int,
+    word_count: int,
+) -> Dict[str, Dict[str, Any]]:
+    """Latency and throughput per router, keyed by router then request label."""
+    results: Dict[str, Dict[str, Any]] = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+        for index, scenario in enumerate(build_scenarios(ids, word_count)):
+            router, label, _, _, _, multiplier = scenario
+            count = max(1, int(iterations * multiplier))
+            with contextlib.redirect_stdout(io.StringIO()):
+                results.setdefault(router, {})[label] = await run_scenario(
+                    client, scenario, count, concurrency, seed=index
+                )
+            print(f"  {label:<36} p50={results[router][label]['p50_ms']:>9.3f}ms "
+                  f"p99={results[router][label]['p99_ms']:>9.3f}ms "
+                  f"{results[router][label]['throughput_rps']:>9.1f} req/s")
+    return results
+
+
+def benchmark_crew(iterations: int, word_count: int, llm_latency: float) -> Dict[str, Any]:
+    """
+    End-to-end SceneGenerationCrew runs with the local LLM. Orchestration
+    overhead is the crew wall time not spent inside LLM calls.
+    """
+    from app.services.crew_service import SceneGenerationCrew
+    from app.services.local_llm import LocalLLM
+
+    totals: List[float] = []
+    overheads: List[float] = []
+    start = time.perf_counter()
+    for index in range(iterations):
+        crew = SceneGenerationCrew(
+            project_id="benchmark",
+            scene_id=f"scene-{index}",
+            word_count=word_count,
+            include_characters=["c1", "c2"],
+            include_memory=True,
+            project_metadata={"genre": "mystery", "audience": "adult", "style": "suspenseful"},
+            character_data=[
+                {"name": "Morgan", "traits": ["perceptive"], "motivation": "Redemption"},
+                {"name": "Reed", "traits": ["skeptical"], "motivation": "Safety"},
+            ],
+            memory_data=[{"category": "Plot", "text": "The lighthouse has been dark for fifty years."}],
+            llm=LocalLLM(model="local", latency=llm_latency),
+        )
+        with contextlib.redirect_stdout(io.StringIO()):
+            crew.generate_scene()
+        kickoff = next(entry for entry in crew.spans if entry["name"] == "crew_kickoff")
+        llm_time = sum(entry["duration"] for entry in crew.spans if entry["name"] == "llm_call")
+        totals.append(kickoff["duration"])
+        overheads.append(kickoff["duration"] - llm_time)
+    elapsed = time.perf_counter() - start
+
+    return {
+        "total": summarise(totals, elapsed, 0),
+        "orchestration_overhead": summarise(overheads, elapsed, 0),
+        "llm_latency_s": llm_latency,
+        "word_count": word_count,
+    }
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """Return a line per request whose p50 or p99 regressed by more than `threshold`."""
+    regressions = []
+    for router, labels in current.get("routes", {}).items():
+        for label, stats in labels.items():
+            previous = baseline.get("routes", {}).get(router, {}).get(label)
+            if not previous:
+                continue
+            for key in ("p50_ms", "p99_ms"):
+                if previous[key] and stats[key] > previous[key] * (1 + threshold):
+                    regressions.append(
+                        f"{label} {key}: {previous[key]:.3f} -> {stats[key]:.3f} "
+                        f"(+{(stats[key] / previous[key] - 1) * 100:.0f}%)"
+                    )
+    for key in ("total", "orchestration_overhead"):
+        previous = baseline.get("crew", {}).get(key)
+        stats = current.get("crew", {}).get(key)
+        if previous and stats and previous["p50_ms"] and stats["p50_ms"] > previous["p50_ms"] * (1 + threshold):
+            regressions.append(f"crew {key} p50_ms: {previous['p50_ms']:.3f} -> {stats['p50_ms']:.3f}")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Ghost-Writers.AI backend benchmarks")
+    parser.add_argument("--projects", type=int, default=3)
+    parser.add_argument("--scenes", type=int, default=2000, help="Scenes per project")
+    parser.add_argument("--characters", type=int, default=200, help="Characters per project")
+    parser.add_argument("--memories", type=int, default=3, help="Memories per scene")
+    parser.add_argument("--iterations", type=int, default=200, help="Requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--crew-iterations", type=int, default=10)
+    parser.add_argument("--word-count", type=int, default=1000)
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="Simulated seconds per LLM call")
+    parser.add_argument("--quick", action="store_true", help="Small dataset and few iterations")
+    parser.add_argument("--output", default=None, help="Write results JSON here")
+    parser.add_argument("--compare", default=None, help="Baseline results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed slowdown before flagging (0.2 = 20%%)")
+    args = parser.parse_args(argv)
+
+    if args.quick:
+        args.projects, args.scenes, args.characters, args.memories = 2, 200, 20, 2
+        args.iterations, args.crew_iterations = 30, 3
+
+    print(f"Seeding {args.projects} projects x {args.scenes} scenes ...")
+    ids = seed_dataset(args.projects, args.scenes, args.characters, args.memories)
+
+    print("Benchmarking routers ...")
+    routes = asyncio.run(benchmark_routes(ids, args.iterations, args.concurrency, args.word_count))
+
+    print("Benchmarking crew orchestration ...")
+    crew = benchmark_crew(args.crew_iterations, args.word_count, args.llm_latency)
+    print(f"  crew total p50={crew['total']['p50_ms']:.3f}ms "
+          f"overhead p50={crew['orchestration_overhead']['p50_ms']:.3f}ms")
+
+    results = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.now().isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "dataset": {key: len(value) for key, value in ids.items()},
+            "iterations": args.iterations,
+            "concurrency": args.concurrency,
+        },
+        "routes": routes,
+        "crew": crew,
+    }
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w") as handle:
+            json.dump(results, handle, indent=2)
+        print(f"Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as handle:
+            baseline = json.load(handle)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"Regressions against {baseline['meta'].get('commit', args.compare)}:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print(f"No regressions against {baseline['meta'].get('commit', args.compare)}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
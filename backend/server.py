@@ -2,11 +2,52 @@
 Ghost-Writers.AI Server
 
 This module serves as the main entry point for the FastAPI backend server.
-It imports and runs the FastAPI application defined in app/main.py.
+It runs the FastAPI application defined in app/main.py.
+
+Development (default): a single process with auto-reload.
+    python server.py
+
+Production: N worker processes (one per CPU core by default). Workers share
+projects, scenes and the generation job queue through the SQLite state
+backend, and on shutdown wait for in-flight crews to finish.
+    python server.py --prod [--workers 4]
+
+Note: /metrics is collected per worker process.
 """
 
+import argparse
+import os
+
 import uvicorn
-from app.main import app
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the Ghost-Writers.AI backend")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--prod", action="store_true", help="Multi-process production mode")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (implies --prod)")
+    parser.add_argument(
+        "--graceful-timeout",
+        type=int,
+        default=int(os.getenv("GHOSTWRITERS_SHUTDOWN_GRACE", "300")),
+        help="Seconds to wait for in-flight requests and crews on shutdown",
+    )
+    args = parser.parse_args()
+
+    if not (args.prod or args.workers):
+        uvicorn.run("app.main:app", host=args.host, port=args.port, reload=True)
+        return
+
+    # Separate processes only see each other's data through a shared backend
+    os.environ.setdefault("GHOSTWRITERS_STATE_BACKEND", "sqlite")
+    os.environ["GHOSTWRITERS_SHUTDOWN_GRACE"] = str(args.graceful_timeout)
+    uvicorn.run(
+        "app.main:app",
+        host=args.host,
+        port=args.port,
+        workers=args.workers or os.cpu_count() or 1,
+        timeout_graceful_shutdown=args.graceful_timeout,
+    )
 
 if __name__ == "__main__":
-    uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True)
+    main()
@@ -0,0 +1,447 @@
+"""
+Test agents API functionality.
+"""
+
+from fastapi.testclient import TestClient
+from app.main import app
+from app.routers.agents import record_generation_usage
+import uuid
+
+client = TestClient(app)
+
+def test_generation_usage_api():
+    """Test that per-task generation usage is aggregated per project."""
+    user_id = str(uuid.uuid4())
+    project_id = str(uuid.uuid4())
+
+    # Empty project has no usage yet
+    response = client.get(
+        f"/agents/usage/{project_id}",
+        headers={"x-user-id": user_id}
+    )
+    assert response.status_code == 200
+    assert response.json()["generations"] == 0
+
+    # Record two generations' worth of task metadata
+    for prose_tokens in (1000, 2000):
+        record_generation_usage(project_id, {
+            "tasks": {
+                "outline": {"prompt_tokens": 400, "completion_tokens": 300, "wall_time": 2.0,
+                            "time_to_first_token": 1.0, "retries": 0, "llm_calls": 1},
+                "prose": {"prompt_tokens": 900, "completion_tokens": prose_tokens, "wall_time": 10.0,
+                          "time_to_first_token": 4.0, "retries": 1, "llm_calls": 2},
+            }
+        })
+
+    response = client.get(
+        f"/agents/usage/{project_id}",
+        headers={"x-user-id": user_id}
+    )
+    assert response.status_code == 200
+    usage = response.json()
+    assert usage["generations"] == 2
+    prose = usage["tasks"]["prose"]
+    assert prose["runs"] == 2
+    assert prose["completion_tokens"] == 3000
+    assert prose["avg_completion_tokens"] == 1500
+    assert prose["retries"] == 2
+    assert prose["avg_wall_time"] == 10.0
+    assert usage["tasks"]["outline"]["avg_time_to_first_token"] == 1.0
+
+    # User context is required
+    response = client.get(f"/agents/usage/{project_id}")
+    assert response.status_code == 401
+
+def test_generate_scene_with_local_llm(monkeypatch):
+    """Test scene generation end to end with the deterministic local LLM."""
+    monkeypatch.setenv("GHOSTWRITERS_LLM", "local")
+    user_id = str(uuid.uuid4())
+    project_id = str(uuid.uuid4())
+
+    request_data = {
+        "scene_id": str(uuid.uuid4()),
+        "project_id": project_id,
+        "word_count": 500,
+        "include_characters": ["hero"],
+        "include_memory": True,
+    }
+    response = client.post(
+        "/agents/generate/scene",
+        json=request_data,
+        headers={"x-user-id": user_id}
+    )
+    assert response.status_code == 200
+    scene = response.json()
+    assert scene["word_count"] == 500
+    assert set(scene["metadata"]["tasks"]) == {"outline", "character", "prose", "continuity"}
+    # The prose touches none of the memory facts, so the continuity LLM call is skipped
+    assert scene["metadata"]["continuity_precheck"]["llm_skipped"] is True
+    assert scene["metadata"]["tasks"]["continuity"]["llm_calls"] == 0
+    assert scene["metadata"]["totals"]["llm_calls"] == 3
+
+    # Same inputs produce the same text
+    response = client.post(
+        "/agents/generate/scene",
+        json=request_data,
+        headers={"x-user-id": user_id}
+    )
+    assert response.json()["generated_text"] == scene["generated_text"]
+
+    # Usage was aggregated for the project
+    response = client.get(
+        f"/agents/usage/{project_id}",
+        headers={"x-user-id": user_id}
+    )
+    assert response.json()["generations"] == 2
+
+def test_background_generation_job(monkeypatch):
+    """Test that queued generations are picked up by the worker and report status and results."""
+    import time
+
+    monkeypatch.setenv("GHOSTWRITERS_LLM", "local")
+    user_id = str(uuid.uuid4())
+
+    # Entering the client runs startup, which starts this process's generation worker
+    with TestClient(app) as worker_client:
+        response = worker_client.post(
+            "/agents/generate/scene/stream",
+            json={
+                "scene_id": str(uuid.uuid4()),
+                "project_id": str(uuid.uuid4()),
+                "word_count": 500,
+                "include_characters": [],
+                "include_memory": False,
+            },
+            headers={"x-user-id": user_id}
+        )
+        assert response.status_code == 200
+        generation_id = response.json()["generation_id"]
+
+        deadline = time.time() + 30
+        while time.time() < deadline:
+            status = worker_client.get(f"/agents/generate/status/{generation_id}").json()
+            if status["status"] in ("completed", "failed"):
+                break
+            time.sleep(0.1)
+        assert status["status"] == "completed"
+        assert status["progress"] == 100
+
+        response = worker_client.get(f"/agents/generate/result/{generation_id}")
+        assert response.status_code == 200
+        result = response.json()
+        assert result["generation_id"] == generation_id
+        assert result["word_count"] == 500
+
+        # Only failed generations can be resumed
+        response = worker_client.post(
+            f"/agents/generate/resume/{generation_id}",
+            headers={"x-user-id": user_id}
+        )
+        assert response.status_code == 409
+
+    # Unknown generations are reported as missing
+    response = client.get(f"/agents/generate/status/{uuid.uuid4()}")
+    assert response.status_code == 404
+
+def test_identical_generations_are_coalesced(monkeypatch):
+    """Test that concurrent identical generation requests share one crew run."""
+    import asyncio
+    import httpx
+    from app.services.single_flight import generation_coalesced_total
+
+    monkeypatch.setenv("GHOSTWRITERS_LLM", "local")
+    monkeypatch.setenv("GHOSTWRITERS_LOCAL_LLM_LATENCY", "0.05")
+    user_id = str(uuid.uuid4())
+    project_id = str(uuid.uuid4())
+    request_data = {
+        "scene_id": str(uuid.uuid4()),
+        "project_id": project_id,
+        "word_count": 500,
+        "include_memory": False,
+    }
+    coalesced_before = generation_coalesced_total.get()
+
+    async def double_click():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as async_client:
+            return await asyncio.gather(*[
+                async_client.post("/agents/generate/scene", json=request_data, headers={"x-user-id": user_id})
+                for _ in range(2)
+            ])
+
+    first, second = asyncio.run(double_click())
+    assert first.status_code == second.status_code == 200
+    assert first.json()["generation_id"] == second.json()["generation_id"]
+    assert generation_coalesced_total.get() == coalesced_before + 1
+
+    # Only one crew ran
+    usage = client.get(f"/agents/usage/{project_id}", headers={"x-user-id": user_id}).json()
+    assert usage["generations"] == 1
+
+    # Retrying a queued generation returns the same job
+    request_data["scene_id"] = str(uuid.uuid4())
+    queued = [
+        client.post("/agents/generate/scene/stream", json=request_data, headers={"x-user-id": user_id})
+        for _ in range(2)
+    ]
+    assert queued[0].json()["generation_id"] == queued[1].json()["generation_id"]
+
+    # Different inputs are a different generation
+    request_data["word_count"] = 600
+    response = client.post("/agents/generate/scene/stream", json=request_data, headers={"x-user-id": user_id})
+    assert response.json()["generation_id"] != queued[0].json()["generation_id"]
+
+def test_failed_generation_resumes_from_checkpoint(monkeypatch):
+    """Test that a retry after a failed prose call only re-runs the unfinished task."""
+    from app.services.local_llm import LocalLLM
+
+    monkeypatch.setenv("GHOSTWRITERS_LLM", "local")
+    failing = {"prose": True}
+    original_call = LocalLLM.call
+
+    def flaky_call(self, messages, *args, from_task=None, **kwargs):
+        if failing["prose"] and getattr(from_task, "name", None) == "prose":
+            raise TimeoutError("prose model timed out")
+        return original_call(self, messages, *args, from_task=from_task, **kwargs)
+
+    monkeypatch.setattr(LocalLLM, "call", flaky_call)
+    user_id = str(uuid.uuid4())
+    request_data = {
+        "scene_id": str(uuid.uuid4()),
+        "project_id": str(uuid.uuid4()),
+        "word_count": 500,
+        "include_characters": ["hero"],
+        "include_memory": False,
+    }
+
+    failing_client = TestClient(app, raise_server_exceptions=False)
+    response = failing_client.post("/agents/generate/scene", json=request_data, headers={"x-user-id": user_id})
+    assert response.status_code == 500
+
+    # The retry picks up the outline and character outputs and makes one LLM call
+    failing["prose"] = False
+    response = client.post("/agents/generate/scene", json=request_data, headers={"x-user-id": user_id})
+    assert response.status_code == 200
+    metadata = response.json()["metadata"]
+    assert metadata["resumed_tasks"] == ["character", "outline"]
+    assert set(metadata["tasks"]) == {"prose"}
+    assert metadata["totals"]["llm_calls"] == 1
+    assert response.json()["word_count"] == 500
+
+    # The completed generation's checkpoint is gone: the next run starts fresh
+    response = client.post("/agents/generate/scene", json=request_data, headers={"x-user-id": user_id})
+    assert response.json()["metadata"]["resumed_tasks"] == []
+
+def test_cancel_generation(monkeypatch):
+    """Test cancelling queued and running generations, which can then be resumed."""
+    import time
+    from app.services import checkpoints
+    from app.services.scheduler import get_scheduler
+
+    monkeypatch.setenv("GHOSTWRITERS_LLM", "local")
+    monkeypatch.setenv("GHOSTWRITERS_LOCAL_LLM_LATENCY", "0.3")
+    user_id = str(uuid.uuid4())
+    request_data = {
+        "scene_id": str(uuid.uuid4()),
+        "project_id": str(uuid.uuid4()),
+        "word_count": 500,
+        "include_memory": True,
+    }
+
+    # A queued generation is cancelled straight away
+    generation_id = client.post(
+        "/agents/generate/scene/stream", json=request_data, headers={"x-user-id": user_id}
+    ).json()["generation_id"]
+    response = client.post(f"/agents/generate/cancel/{generation_id}", headers={"x-user-id": user_id})
+    assert response.status_code == 200
+    assert response.json()["status"] == "cancelled"
+    response = client.post(f"/agents/generate/cancel/{generation_id}", headers={"x-user-id": user_id})
+    assert response.status_code == 409
+
+    # A running generation stops after the task in flight
+    with TestClient(app) as worker_client:
+        response = worker_client.post(f"/agents/generate/resume/{generation_id}", headers={"x-user-id": user_id})
+        assert response.json()["status"] == "pending"
+
+        deadline = time.time() + 10
+        while worker_client.get(f"/agents/generate/status/{generation_id}").json()["status"] != "in_progress":
+            assert time.time() < deadline
+            time.sleep(0.05)
+        response = worker_client.post(f"/agents/generate/cancel/{generation_id}", headers={"x-user-id": user_id})
+        assert response.json()["status"] == "cancelling"
+
+        while worker_client.get(f"/agents/generate/status/{generation_id}").json()["status"] != "cancelled":
+            assert time.time() < deadline
+            time.sleep(0.05)
+        assert get_scheduler().stats()["busy"] == 0
+
+        # The crew thread makes no further LLM calls
+        time.sleep(0.7)
+        assert len(checkpoints.load(generation_id)) < 4
+
+    # Unknown generations cannot be cancelled
+    response = client.post(f"/agents/generate/cancel/{uuid.uuid4()}", headers={"x-user-id": user_id})
+    assert response.status_code == 404
+
+def test_client_disconnect_cancels_generation():
+    """Test that work is cancelled when the client goes away."""
+    import asyncio
+    from fastapi import HTTPException
+    from app.routers.agents import cancel_on_disconnect
+
+    class GoneClient:
+        async def is_disconnected(self):
+            return True
+
+    cancelled = []
+
+    async def long_generation():
+        try:
+            await asyncio.sleep(30)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+
+    async def run():
+        try:
+            await cancel_on_disconnect(GoneClient(), long_generation(), poll_interval=0.01)
+        except HTTPException as exc:
+            return exc.status_code
+
+    assert asyncio.run(run()) == 499
+    assert cancelled == [True]
+
+def test_chunked_prose_generation(monkeypatch):
+    """Test that long scenes are written beat by beat and hit the target word count."""
+    import json
+    from app.services.crew_service import DEFAULT_BEATS, outline_beats
+
+    monkeypatch.setenv("GHOSTWRITERS_LLM", "local")
+    user_id = str(uuid.uuid4())
+
+    # Beats come from the outline's scene structure, with nested details folded in
+    outline = (
+        "## Setting & Atmosphere\n- A storm over the harbor\n"
+        "## Scene Structure\n"
+        "- **Beginning:** the door opens\n"
+        "- **Climax:** the captain confesses\n"
+        "  - the crew overhears\n"
+        "- **Resolution:** she leaves\n"
+        "## Notes\n- keep it tense\n"
+    )
+    assert outline_beats(outline) == [
+        "Beginning: the door opens",
+        "Climax: the captain confesses; the crew overhears",
+        "Resolution: she leaves",
+    ]
+    assert outline_beats("No structure here") == list(DEFAULT_BEATS)
+
+    response = client.post(
+        "/agents/generate/scene",
+        json={
+            "scene_id": str(uuid.uuid4()),
+            "project_id": str(uuid.uuid4()),
+            "word_count": 3000,
+            "include_memory": False,
+        },
+        headers={"x-user-id": user_id}
+    )
+    assert response.status_code == 200
+    scene = response.json()
+    assert scene["metadata"]["prose_mode"] == "chunked"
+    assert scene["word_count"] == 3000
+    assert scene["metadata"]["tasks"]["prose"]["llm_calls"] == len(DEFAULT_BEATS)
+    assert scene["metadata"]["tasks"]["prose"]["retries"] == 0
+
+    # Queued generations stream each beat as it is written
+    with TestClient(app) as worker_client:
+        generation_id = worker_client.post(
+            "/agents/generate/scene/stream",
+            json={
+                "scene_id": str(uuid.uuid4()),
+                "project_id": str(uuid.uuid4()),
+                "word_count": 1000,
+                "include_memory": False,
+                "chunked_prose": True,
+            },
+            headers={"x-user-id": user_id}
+        ).json()["generation_id"]
+        url = f"/agents/generate/scene/stream/{generation_id}?poll_interval=0.05"
+        assert worker_client.get(url).status_code == 401
+        response = worker_client.get(url, headers={"x-user-id": user_id})
+        events = [json.loads(line[len("data: "):]) for line in response.text.splitlines() if line.startswith("data: ")]
+        chunks = [event for event in events if "chunk" in event]
+        assert [chunk["chunk"] for chunk in chunks] == list(range(len(DEFAULT_BEATS)))
+        assert events[-1]["status"] == "completed"
+
+        result = worker_client.get(f"/agents/generate/result/{generation_id}").json()
+        assert result["generated_text"] == "\n\n".join(chunk["text"] for chunk in chunks)
+        assert result["word_count"] == 1000
+
+def test_progress_stream_cancels_after_last_listener():
+    """Test that a generation is cancelled only when its last progress stream disconnects."""
+    import asyncio
+    from app.routers.agents import progress_listeners_db, stream_generation_progress
+    from app.services import generation_jobs
+    from app.utils.state import edit
+
+    generation_id = str(uuid.uuid4())
+    generation_jobs.enqueue_job(generation_id, "owner", {"scene_id": "s"})
+
+    async def run():
+        owner = await stream_generation_progress(generation_id, 0.01, "owner")
+        viewer = await stream_generation_progress(generation_id, 0.01, "viewer")
+        for stream in (owner, viewer):
+            await stream.body_iterator.__anext__()
+        await owner.body_iterator.aclose()
+        statuses = [generation_jobs.get_job(generation_id)["status"]]
+        # A stream open on another worker is counted through shared state
+        with edit(progress_listeners_db, generation_id) as listeners:
+            listeners["count"] += 1
+        await viewer.body_iterator.aclose()
+        statuses.append(generation_jobs.get_job(generation_id)["status"])
+        with edit(progress_listeners_db, generation_id) as listeners:
+            listeners["count"] -= 1
+        # That worker's stream then disconnects last and cancels the generation
+        other = await stream_generation_progress(generation_id, 0.01, "viewer")
+        await other.body_iterator.__anext__()
+        await other.body_iterator.aclose()
+        return statuses
+
+    assert asyncio.run(run()) == ["pending", "pending"]
+    assert generation_id not in progress_listeners_db
+    assert generation_jobs.get_job(generation_id)["status"] == "cancelled"
+
+def test_generation_lease_is_renewed(monkeypatch):
+    """Test that a running job keeps its lease, and a run that lost its claim cannot record a result."""
+    import asyncio
+    from app.services import generation_jobs
+
+    monkeypatch.setattr(generation_jobs, "LEASE_SECONDS", 0.2)
+    generation_id = str(uuid.uuid4())
+    generation_jobs.enqueue_job(generation_id, "owner", {"scene_id": "s"})
+    runs = []
+
+    async def run_job(job):
+        runs.append(job["generation_id"])
+        # Outlives the lease several times over
+        await asyncio.sleep(0.7)
+        return {"generated_text": "done"}
+
+    async def run():
+        worker = generation_jobs.GenerationWorker(run_job, poll_interval=0.01)
+        worker.start()
+        await asyncio.sleep(0.5)
+        claim = generation_jobs.get_job(generation_id)["claim"]
+        await worker.stop()
+        return claim
+
+    claim = asyncio.run(run())
+    assert runs.count(generation_id) == 1
+    job = generation_jobs.get_job(generation_id)
+    assert job["status"] == "completed"
+
+    # A run whose claim lapsed does not overwrite the outcome
+    assert not generation_jobs.finish_job(generation_id, error="late", claim=claim)
+    assert not generation_jobs.renew_lease(generation_id, claim)
+    assert generation_jobs.get_job(generation_id)["status"] == "completed"
@@ -68,3 +68,21 @@ def test_characters_api():
     characters = response.json()
     assert len(characters) >= 1
     assert any(c["id"] == character_id for c in characters)
+
+def test_bulk_character_import():
+    """Test bulk character creation."""
+    user_id = str(uuid.uuid4())
+    project_id = str(uuid.uuid4())
+    items = [
+        {"name": f"Character {number}", "traits": ["loyal"], "motivation": "Survive", "project_id": project_id}
+        for number in range(50)
+    ]
+    response = client.post("/characters/bulk", json={"items": items}, headers={"x-user-id": user_id})
+    assert response.status_code == 200
+    assert response.json()["created"] == 50
+
+    response = client.get(f"/characters/?project_id={project_id}", headers={"x-user-id": user_id})
+    assert [character["name"] for character in response.json()] == [item["name"] for item in items]
+
+    # User context is required
+    assert client.post("/characters/bulk", json=items).status_code == 401
@@ -0,0 +1,74 @@
+"""
+Test response compression.
+"""
+
+import asyncio
+import gzip
+import uuid
+import zlib
+
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.utils.compression import CompressionMiddleware, choose_encoding
+
+client = TestClient(app)
+
+
+def test_large_responses_are_gzipped():
+    """Test that large JSON bodies are compressed and small ones are sent as is."""
+    headers = {"x-user-id": str(uuid.uuid4()), "accept-encoding": "gzip"}
+    project_id = str(uuid.uuid4())
+    scenes = [
+        {"title": f"Scene {n}", "setting": "The lighthouse at the end of the harbor wall", "mood": "Tense",
+         "conflict": "The keeper hides the logbook", "characters": [], "position": n, "project_id": project_id}
+        for n in range(50)
+    ]
+    client.post("/scenes/bulk", json=scenes, headers=headers)
+
+    with client.stream("GET", f"/scenes/?project_id={project_id}", headers=headers) as response:
+        raw = b"".join(response.iter_raw())
+    assert response.headers["content-encoding"] == "gzip"
+    assert "accept-encoding" in response.headers["vary"].lower()
+    assert int(response.headers["content-length"]) == len(raw)
+    assert len(gzip.decompress(raw)) > 5 * len(raw)
+
+    response = client.get(f"/scenes/?project_id={uuid.uuid4()}", headers=headers)
+    assert "content-encoding" not in response.headers
+    assert response.json() == []
+
+    # Clients that do not accept an encoding we support get identity
+    assert choose_encoding("identity") is None
+    assert choose_encoding("gzip;q=0, *;q=0") is None
+    assert choose_encoding("deflate, gzip;q=0.5") == "gzip"
+
+
+def test_event_streams_flush_every_event():
+    """Test that compressed server-sent events can be decoded as each one arrives."""
+    async def events():
+        for n in range(3):
+            yield f"event: chunk\ndata: {'prose ' * 50}{n}\n\n"
+
+    inner = StreamingResponse(events(), media_type="text/event-stream")
+    middleware = CompressionMiddleware(inner)
+    sent = []
+
+    async def receive():
+        # The client stays connected until the stream ends
+        await asyncio.Event().wait()
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "method": "GET", "path": "/", "headers": [(b"accept-encoding", b"gzip")]}
+    asyncio.run(middleware(scope, receive, send))
+
+    start = dict(sent[0]["headers"])
+    assert start[b"content-encoding"] == b"gzip"
+    assert b"content-length" not in start
+    decoder = zlib.decompressobj(31)
+    bodies = [message for message in sent[1:] if message["type"] == "http.response.body"]
+    for n, message in enumerate(bodies[:3]):
+        assert decoder.decompress(message["body"]).decode().endswith(f"{n}\n\n")
+    assert not bodies[-1].get("more_body")
@@ -0,0 +1,49 @@
+"""
+Test operational merging of scene content patches.
+"""
+
+import pytest
+
+from app.services import content_merge
+
+
+def splice(index, delete=0, insert=()):
+    return {"op": "splice", "index": index, "delete": delete, "insert": list(insert)}
+
+
+def edit(index, offset, delete=0, insert=""):
+    return {"op": "edit", "index": index, "offset": offset, "delete": delete, "insert": insert}
+
+
+def test_concurrent_patches_converge():
+    """Test that two patches made against one revision give the same text in either order."""
+    base = ["The storm came.", "Mara waited.", "The lamp went out.", "Silence."]
+    ours = content_merge.validate([edit(1, 5, 6, "paced"), splice(3, 1, ["Then, a knock."])])
+    theirs = content_merge.validate([splice(0, 0, ["Night fell."]), edit(2, 4, 4, "lantern")])
+
+    one = content_merge.apply(content_merge.apply(base, theirs), content_merge.transform(ours, theirs))
+    other = content_merge.apply(content_merge.apply(base, ours), content_merge.transform(theirs, ours))
+    assert one == other == ["Night fell.", "The storm came.", "Mara paced.", "The lantern went out.", "Then, a knock."]
+
+    # Concurrent edits at different places in one paragraph both survive
+    first = [edit(0, 4, 5, "gale")]
+    second = [edit(0, 10, 4, "went")]
+    merged = content_merge.apply(content_merge.apply(base, first), content_merge.transform(second, first))
+    assert merged[0] == "The gale went."
+
+
+def test_overlapping_patches_conflict():
+    """Test that overlapping changes conflict and malformed patches are rejected."""
+    with pytest.raises(content_merge.MergeConflict):
+        content_merge.transform([edit(1, 0, 4, "Tobias")], [splice(1, 1, ["Gone."])])
+    with pytest.raises(content_merge.MergeConflict):
+        content_merge.transform([edit(0, 4, 5, "gale")], [edit(0, 6, 2, "x")])
+    with pytest.raises(content_merge.MergeConflict):
+        content_merge.transform([splice(0)], None)
+
+    with pytest.raises(ValueError):
+        content_merge.validate([splice(1, 2), splice(2, 1)])
+    with pytest.raises(ValueError):
+        content_merge.apply(["One."], [edit(0, 3, 1, "\n\nTwo.")])
+    # Blank lines in a splice insert several paragraphs
+    assert content_merge.validate([splice(0, 0, ["A.\n\nB."])])[0]["insert"] == ["A.", "B."]
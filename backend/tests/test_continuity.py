@@ -0,0 +1,62 @@
+"""
+Test the local continuity pre-check.
+"""
+
+from app.services.continuity import FactIndex, precheck, split_passages
+from app.services.crew_service import SceneGenerationCrew
+from app.services.local_llm import LocalLLM
+
+MEMORY = [
+    {"category": "Plot", "text": "The protagonist discovered a hidden map leading to ancient technology."},
+    {"category": "Character", "text": "The captain revealed their true identity during the last confrontation."},
+]
+CHARACTERS = [
+    {"name": "Mara Voss", "traits": "Brave, intelligent, resourceful", "relationships": "Mentored by the elder council"},
+]
+
+def test_precheck_flags_only_candidate_contradictions():
+    """Test that only passages touching facts, or contradicting traits, are flagged."""
+    index = FactIndex.from_context(MEMORY, CHARACTERS)
+    prose = (
+        "Rain hammered the harbor. Nobody spoke for a long while.\n\n"
+        "Mara Voss stood at the door and did not look back.\n\n"
+        "Mara Voss hesitated, afraid of the dark water.\n\n"
+        "Later the captain kept their identity secret from the crew."
+    )
+    report = precheck(prose, index)
+
+    assert report.passages == 4
+    flagged = {flag.index: flag for flag in report.flags}
+    # Weather and a plain mention of a character need no check
+    assert set(flagged) == {2, 3}
+    assert "afraid" in flagged[2].reasons[0]
+    assert [fact.label for fact in flagged[3].facts] == ["Character"]
+    assert {fact.label for fact in report.relevant_facts} == {"Mara Voss (traits)", "Character"}
+
+    # Nothing to check in prose that touches no fact
+    assert precheck("The wind carried a voice across the water.", index).flags == []
+
+def test_split_passages_bounds_long_paragraphs():
+    """Test that long paragraphs are split at sentence boundaries."""
+    paragraph = " ".join(["One two three four five six seven eight nine ten."] * 40)
+    passages = split_passages(paragraph + "\n\nShort closing line.", max_words=100)
+    assert [len(passage.split()) for passage in passages] == [100, 100, 100, 100, 3]
+
+def test_flagged_passages_go_to_memory_keeper():
+    """Test that the Memory Keeper is called with only the flagged passages and facts."""
+    memory = [{"category": "World", "text": "The harbor door is sealed with stone and never opened."}]
+    crew = SceneGenerationCrew(
+        project_id="project",
+        scene_id="scene",
+        word_count=500,
+        include_characters=[],
+        include_memory=True,
+        memory_data=memory,
+        llm=LocalLLM(model="local"),
+    )
+    result = crew.generate_scene()
+
+    precheck_summary = result["metadata"]["continuity_precheck"]
+    assert precheck_summary["llm_skipped"] is False
+    assert 0 < precheck_summary["flagged_passages"] <= precheck_summary["passages"]
+    assert result["metadata"]["tasks"]["continuity"]["llm_calls"] == 1
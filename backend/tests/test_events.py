@@ -0,0 +1,79 @@
+"""
+Test the project event bus and its streaming endpoints.
+"""
+
+import asyncio
+import uuid
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.routers.events import format_sse
+from app.services.events import EventBus
+
+client = TestClient(app)
+
+
+def test_project_events_over_websocket():
+    """Test that writes in a project reach its WebSocket subscribers, and only its own."""
+    headers = {"x-user-id": str(uuid.uuid4())}
+    project_id = str(uuid.uuid4())
+    scene = {"title": "Harbor", "setting": "", "mood": "", "conflict": "", "characters": [], "position": 0}
+
+    with client.websocket_connect(f"/events/{project_id}/ws", headers=headers) as socket:
+        # A write in another project is not sent
+        client.post("/scenes/", json={**scene, "project_id": str(uuid.uuid4())}, headers=headers)
+        created = client.post("/scenes/", json={**scene, "project_id": project_id}, headers=headers).json()
+        event = socket.receive_json()
+        assert event["type"] == "scene.created"
+        assert event["project_id"] == project_id
+        assert event["data"] == {"scene_id": created["id"], "position": 0}
+
+        url = f"/scenes/{created['id']}/content?project_id={project_id}"
+        client.post(url, json={"content": "The storm came."}, headers=headers)
+        assert socket.receive_json()["data"] == {"scene_id": created["id"], "revision": 1}
+        client.patch(url, json={"ops": [{"op": "edit", "index": 0, "offset": 4, "delete": 5, "insert": "gale"}]}, headers=headers)
+        event = socket.receive_json()
+        assert event["data"]["revision"] == 2 and event["data"]["ops"][0]["insert"] == "gale"
+
+        client.post("/characters/", json={
+            "name": "Mara Voss", "traits": ["stubborn"], "motivation": "Find her brother", "project_id": project_id,
+        }, headers=headers)
+        assert socket.receive_json()["type"] == "character.created"
+        client.post("/memory/", json={
+            "text": "Mara fears the sea.", "category": "Character", "scene_id": created["id"], "project_id": project_id,
+        }, headers=headers)
+        event = socket.receive_json()
+        assert event["type"] == "memory.created" and event["data"]["scene_id"] == created["id"]
+
+    # Streams require a user
+    assert client.get(f"/events/{project_id}").status_code == 401
+
+
+def test_event_replay_and_resync():
+    """Test that reconnecting subscribers get missed events, or a resync when they are gone."""
+
+    async def scenario():
+        bus = EventBus()
+        bus.publish("p1", "scene.created", scene_id="a")
+        bus.publish("p2", "scene.created", scene_id="b")
+        bus.publish("p1", "scene.moved", scene_id="a", position=3)
+
+        live = bus.subscribe("p1")
+        missed = bus.subscribe("p1", last_event_id=1)
+        bus.publish("p1", "scene.content", scene_id="a", revision=1)
+
+        assert [event["id"] for event in [await missed.get(1), await missed.get(1)]] == [3, 4]
+        assert (await live.get(1))["type"] == "scene.content"
+        assert await live.get(0.01) is None
+
+        # An id this bus never issued (another worker, or a restart) asks for a reload
+        stranger = bus.subscribe("p1", last_event_id=99)
+        assert (await stranger.get(1))["type"] == "resync"
+
+        for subscription in (live, missed, stranger):
+            subscription.close()
+        assert bus.subscriber_count("p1") == 0
+
+    asyncio.run(scenario())
+    assert format_sse({"id": 7, "type": "scene.moved", "data": {}}).startswith("id: 7\nevent: scene.moved\ndata: {")
@@ -0,0 +1,44 @@
+"""
+Test the fast JSON response path.
+"""
+
+from datetime import datetime
+
+import pytest
+from pydantic import TypeAdapter
+
+from app.routers.characters import Character
+from app.routers.scenes import Scene
+from app.utils import fast_json
+
+
+def test_fast_path_matches_validated_output(monkeypatch):
+    """Test that projected records encode exactly like validated response models."""
+    created_at = datetime(2026, 3, 1, 9, 30, 15, 120000)
+    scenes = [
+        {
+            "id": f"s{position}", "project_id": "p", "created_at": created_at, "title": "Dock — night",
+            "setting": "Harbor", "mood": "Tense", "conflict": "Storm", "characters": ["c1"],
+            "position": position, "content": "Long prose that the list must not include.",
+        }
+        for position in range(3)
+    ]
+    characters = [{
+        "id": "c1", "project_id": "p", "created_at": created_at, "name": "Mara",
+        "traits": ["brave"], "motivation": "Answers", "relationships": {"Tobias": "brother"},
+    }]
+
+    for model, records in ((Scene, scenes), (Character, characters)):
+        adapter = TypeAdapter(list[model])
+        validated = adapter.dump_json(adapter.validate_python(records))
+        assert fast_json.serialize_list(model, records) == validated
+
+    # Defaults are filled in and undeclared fields left out
+    encoded = fast_json.serialize_list(Character, characters)
+    assert b'"codename":null' in encoded and b'"is_shared":false' in encoded
+    assert b"Long prose" not in fast_json.serialize_list(Scene, scenes)
+
+    # Records missing a required field fall back to validation (and its error)
+    monkeypatch.setattr(fast_json, "FAST_JSON", True)
+    with pytest.raises(ValueError, match="title"):
+        fast_json.serialize_list(Scene, [{"id": "s"}])
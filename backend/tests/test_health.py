@@ -12,3 +12,19 @@ def test_health_endpoint():
     response = client.get("/health")
     assert response.status_code == 200
     assert response.json() == {"status": "healthy", "message": "Ghost-Writers.AI backend is running"}
+
+def test_startup_does_not_import_crewai():
+    """Test that importing the app leaves the CrewAI stack unloaded until it is needed."""
+    import os
+    import subprocess
+    import sys
+
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    result = subprocess.run(
+        [sys.executable, "-c", "import sys, app.main; print('crewai' in sys.modules)"],
+        cwd=backend_dir,
+        capture_output=True,
+        text=True,
+    )
+    assert result.returncode == 0
+    assert result.stdout.strip() == "False"
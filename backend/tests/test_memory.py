@@ -111,3 +111,35 @@ def test_memory_api():
     updated_memory_in_list = next((m for m in memories if m["id"] == memory_id), None)
     assert updated_memory_in_list is not None
     assert updated_memory_in_list["text"] == update_data["text"]
+
+def test_bulk_memory_import():
+    """Test bulk memory creation with per-item validation."""
+    user_id = str(uuid.uuid4())
+    scene_id = str(uuid.uuid4())
+    items = [
+        {"text": "The lighthouse is abandoned.", "category": "World", "scene_id": scene_id, "project_id": "p"},
+        {"text": "Unknown category", "category": "Gossip", "scene_id": scene_id, "project_id": "p"},
+    ]
+    response = client.post("/memory/bulk", json=items, headers={"x-user-id": user_id})
+    assert response.status_code == 200
+    result = response.json()
+    assert (result["created"], result["failed"]) == (1, 1)
+    assert result["results"][1]["errors"][0]["loc"] == ["category"]
+
+    response = client.get(f"/memory/{scene_id}", headers={"x-user-id": user_id})
+    assert [memory["text"] for memory in response.json()] == ["The lighthouse is abandoned."]
+
+def test_memory_list_etag():
+    """Test that editing a memory entry invalidates its scene's cached list and ETag."""
+    headers = {"x-user-id": str(uuid.uuid4())}
+    scene_id = str(uuid.uuid4())
+    memory = {"text": "The key is brass.", "category": "Plot", "scene_id": scene_id, "project_id": "p"}
+    memory_id = client.post("/memory/", json=memory, headers=headers).json()["id"]
+
+    etag = client.get(f"/memory/{scene_id}", headers=headers).headers["etag"]
+    assert client.get(f"/memory/{scene_id}", headers={**headers, "if-none-match": etag}).status_code == 304
+
+    client.put(f"/memory/{memory_id}", json={"text": "The key is iron.", "category": "Plot"}, headers=headers)
+    response = client.get(f"/memory/{scene_id}", headers={**headers, "if-none-match": etag})
+    assert response.status_code == 200
+    assert response.json()[0]["text"] == "The key is iron."
@@ -0,0 +1,46 @@
+"""
+Test metrics endpoint and request instrumentation.
+"""
+
+from fastapi.testclient import TestClient
+from app.main import app
+import uuid
+
+client = TestClient(app)
+
+def test_metrics_endpoint():
+    """Test that requests are recorded per route and exposed in Prometheus format."""
+    user_id = str(uuid.uuid4())
+
+    # Make a couple of requests against a templated route
+    for _ in range(2):
+        response = client.get(
+            f"/scenes/?project_id={uuid.uuid4()}",
+            headers={"x-user-id": user_id}
+        )
+        assert response.status_code == 200
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    body = response.text
+
+    # Latency histogram, size histograms and in-flight gauge are exposed
+    assert "# TYPE http_request_duration_seconds histogram" in body
+    assert "# TYPE http_requests_in_flight gauge" in body
+    assert 'http_request_duration_seconds_count{method="GET",route="/scenes/"}' in body
+    assert 'http_response_size_bytes_bucket{method="GET",route="/scenes/",le="+Inf"}' in body
+    assert 'http_requests_total{method="GET",route="/scenes/",status="200"}' in body
+
+    # Path parameters are folded back into the route template
+    client.get(
+        f"/scenes/{uuid.uuid4()}/history?project_id={uuid.uuid4()}",
+        headers={"x-user-id": user_id}
+    )
+    body = client.get("/metrics").text
+    assert 'http_requests_total{method="GET",route="/scenes/{scene_id}/history",status="404"}' in body
+
+    # Unknown paths are grouped under a single label
+    client.get(f"/does-not-exist/{uuid.uuid4()}")
+    body = client.get("/metrics").text
+    assert 'route="unmatched"' in body
@@ -0,0 +1,97 @@
+"""
+Test per-task model routing and timeout fallbacks.
+"""
+
+import uuid
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services import model_routing
+from app.services.model_routing import FAST_MODEL, LARGE_FALLBACK_MODEL, LARGE_MODEL, ModelRoute
+
+client = TestClient(app)
+
+
+@pytest.fixture(autouse=True)
+def fresh_health():
+    model_routing.health.reset()
+    yield
+    model_routing.health.reset()
+
+
+def test_timeouts_fall_back_and_cool_down():
+    """Test that timed-out calls move to the fallback model, and repeat offenders are skipped."""
+    route = ModelRoute("slow", timeout=1.0, fallbacks=("steady",))
+    called = []
+
+    def call(model):
+        called.append(model)
+        if model == "slow":
+            raise TimeoutError("slow did not answer")
+        return f"answer from {model}"
+
+    assert model_routing.call_with_fallback("outline", route, call) == ("answer from steady", "steady", 1)
+
+    for _ in range(model_routing.TIMEOUT_STREAK - 1):
+        model_routing.call_with_fallback("outline", route, call)
+    called.clear()
+    # The slow model now cools down: calls go straight to the fallback
+    assert model_routing.call_with_fallback("outline", route, call)[1] == "steady"
+    assert called == ["steady"]
+    models = model_routing.health.snapshot()
+    assert models["slow"]["cooling_down"] is True
+    assert models["steady"]["calls"] == model_routing.TIMEOUT_STREAK + 1
+
+    def rejected(model):
+        raise ValueError("bad request")
+
+    # Other errors are raised without trying another model
+    with pytest.raises(ValueError):
+        model_routing.call_with_fallback("prose", ModelRoute("steady", fallbacks=("slow",)), rejected)
+
+
+def test_routing_policy_overrides(monkeypatch):
+    """Test that routes can be overridden per task, and unknown tasks use the default route."""
+    monkeypatch.setenv("GHOSTWRITERS_MODEL_ROUTES", '{"prose": {"timeout": 5, "fallbacks": []}, "summary": {"model": "tiny"}}')
+    assert model_routing.route_for("prose") == ModelRoute(LARGE_MODEL, temperature=0.6, timeout=5, fallbacks=())
+    assert model_routing.route_for("summary").model == "tiny"
+    assert model_routing.route_for("anything") == model_routing.DEFAULT_ROUTES["default"]
+
+    monkeypatch.setenv("GHOSTWRITERS_MODEL_ROUTES", "not json")
+    assert model_routing.routing_policy() == model_routing.DEFAULT_ROUTES
+
+
+def test_generation_routes_tasks_to_models(monkeypatch):
+    """Test that a generation uses the fast model for outlining and falls back when prose times out."""
+    from app.services.local_llm import LocalLLM
+
+    monkeypatch.setenv("GHOSTWRITERS_LLM", "local")
+    original_call = LocalLLM.call
+
+    def large_model_down(self, messages, *args, **kwargs):
+        if self.model == LARGE_MODEL:
+            raise TimeoutError("large model timed out")
+        return original_call(self, messages, *args, **kwargs)
+
+    monkeypatch.setattr(LocalLLM, "call", large_model_down)
+    headers = {"x-user-id": str(uuid.uuid4())}
+    response = client.post("/agents/generate/scene", json={
+        "scene_id": str(uuid.uuid4()),
+        "project_id": str(uuid.uuid4()),
+        "word_count": 500,
+        "include_characters": [],
+        "include_memory": False,
+    }, headers=headers)
+    assert response.status_code == 200
+    metadata = response.json()["metadata"]
+    assert metadata["tasks"]["outline"]["models"] == [FAST_MODEL]
+    assert metadata["tasks"]["prose"]["models"] == [LARGE_FALLBACK_MODEL]
+    assert metadata["tasks"]["prose"]["fallbacks"] == 1
+    assert metadata["totals"]["llm_calls"] == 3
+
+    routes = client.get("/agents/models", headers=headers).json()
+    assert routes["routes"]["continuity"]["model"] == FAST_MODEL
+    assert routes["models"][LARGE_MODEL]["timeouts"] == 2
+    assert routes["models"][LARGE_FALLBACK_MODEL]["tasks"] == {"character": 1, "prose": 1}
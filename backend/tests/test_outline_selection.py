@@ -0,0 +1,115 @@
+"""
+Test best-of-N outline drafting and selection.
+"""
+
+import time
+import uuid
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services.outline_selection import ACCEPT_SCORE, OutlineRace, score_outline
+
+GOOD_OUTLINE = """## Setting & Atmosphere
+- The harbor at night, storm rolling in
+## Character Objectives
+- Mara wants the ledger; Tobias wants to leave
+## Plot Points
+- The lamp fails
+- A knock at the door
+- The ledger is missing
+- Tobias lies
+- Mara finds the key
+## Emotional Arc
+- Suspicion turns to grief
+## Scene Structure
+1. Beginning: Mara waits
+2. Rising action: the knock
+3. Climax: the lie exposed
+4. Resolution: she lets him go
+""" + " ".join(["detail"] * 120)
+
+
+def drafting(seconds, outline):
+    """A draft taking `seconds`, which stops early when cancelled."""
+    def draft(cancel):
+        deadline = time.perf_counter() + seconds
+        while time.perf_counter() < deadline:
+            if cancel.is_set():
+                raise RuntimeError("cancelled")
+            time.sleep(0.005)
+        return outline
+    return draft
+
+
+def test_score_outline():
+    """Test that complete, concrete outlines outscore thin ones."""
+    good = score_outline(GOOD_OUTLINE, ["Mara Voss", "Tobias"])
+    assert good["score"] >= ACCEPT_SCORE
+    assert good["sections"] == 1.0 and good["beats"] == 1.0
+    thin = score_outline("The night wind carried a voice.", ["Mara Voss"])
+    assert thin["score"] < 0.3
+    assert score_outline(GOOD_OUTLINE, ["Absent Person"])["characters"] == 0.0
+
+
+def test_race_accepts_early_and_cancels_the_rest():
+    """Test that a good candidate is accepted at once and slower drafts are cancelled."""
+    drafts = [drafting(2.0, GOOD_OUTLINE), drafting(0.05, GOOD_OUTLINE), drafting(2.0, "thin")]
+    race = OutlineRace(3)
+    started = time.perf_counter()
+    assert race.run(lambda index, cancel: drafts[index](cancel)) == 1
+    assert time.perf_counter() - started < 1.0
+    assert [result["status"] for result in race.summary()["results"]] == ["cancelled", "chosen", "cancelled"]
+
+
+def test_race_waits_a_grace_period_for_better_candidates():
+    """Test that without an acceptable candidate the best one finished within the grace period wins."""
+    drafts = [drafting(0.1, "thin"), drafting(0.12, "thin\n## Setting\n## Scene Structure\n- a\n- b\n- c"), drafting(3.0, GOOD_OUTLINE)]
+    race = OutlineRace(3)
+    started = time.perf_counter()
+    assert race.run(lambda index, cancel: drafts[index](cancel)) == 1
+    assert time.perf_counter() - started < 1.0
+    assert race.candidates[2]["status"] == "cancelled"
+
+
+def test_user_chooses_outline_candidate(monkeypatch):
+    """Test drafting candidates, choosing one, and generating the scene from it."""
+    monkeypatch.setenv("GHOSTWRITERS_LLM", "local")
+    headers = {"x-user-id": str(uuid.uuid4())}
+    request = {"scene_id": str(uuid.uuid4()), "project_id": str(uuid.uuid4()), "word_count": 500,
+               "include_characters": ["hero"], "include_memory": False}
+
+    with TestClient(app) as client:
+        draft = client.post("/agents/generate/outlines", json={**request, "candidates": 3}, headers=headers).json()
+        assert draft["candidates"] == 3
+        deadline = time.time() + 30
+        while time.time() < deadline:
+            record = client.get(f"/agents/generate/outlines/{draft['draft_id']}").json()
+            if record["status"] != "drafting":
+                break
+            time.sleep(0.05)
+        assert record["status"] == "ready"
+        outlines = [candidate["outline"] for candidate in record["candidates"]]
+        assert len(set(outlines)) == 3
+        assert all(candidate["score"]["score"] > 0 for candidate in record["candidates"])
+
+        chosen = client.post(f"/agents/generate/outlines/{draft['draft_id']}/choose", json={"index": 2}, headers=headers)
+        assert chosen.json()["outline"] == outlines[2]
+        again = client.post(f"/agents/generate/outlines/{draft['draft_id']}/choose", json={"index": 0}, headers=headers)
+        assert again.status_code == 409
+
+        # Only the chosen outline goes on; no outline call is made
+        scene = client.post("/agents/generate/scene", json={**request, "outline": outlines[2]}, headers=headers).json()
+        assert "outline" not in scene["metadata"]["tasks"]
+        assert "outline" in scene["metadata"]["resumed_tasks"]
+
+        # Automatic selection within one generation
+        scene = client.post("/agents/generate/scene", json={**request, "outline_candidates": 3}, headers=headers).json()
+        selection = scene["metadata"]["outline_selection"]
+        assert selection["candidates"] == 3 and selection["chosen"] is not None
+        outline_usage = scene["metadata"]["tasks"]["outline"]
+        assert outline_usage["llm_calls"] <= 3
+        # Candidates are reported as such, not as retries
+        assert outline_usage["candidates"] == outline_usage["llm_calls"]
+        assert outline_usage["retries"] == 0
+        assert scene["word_count"] == 500
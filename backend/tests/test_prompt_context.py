@@ -0,0 +1,68 @@
+"""
+Test precompiled project prompt context.
+"""
+
+from app.services.crew_service import SceneGenerationCrew
+from app.services.local_llm import LocalLLM
+from app.services.prompt_context import compile_context, prompt_context_cache_total
+
+PROJECT = {"genre": "science fiction", "audience": "young adult", "style": "descriptive"}
+CHARACTERS = [{
+    "id": "c1",
+    "name": "Mara Voss",
+    "traits": "Brave, intelligent, resourceful",
+    "motivation": "Seeking answers about the past",
+    "relationships": "Mentored by the elder council",
+}]
+MEMORY = [
+    {"category": "Plot", "text": "The protagonist discovered a hidden map."},
+    {"category": "Plot", "text": "The map leads to ancient technology."},
+    {"category": "World", "text": "The atmosphere enhances psychic abilities."},
+]
+
+def test_context_is_compiled_once_per_change():
+    """Test that identical project data shares one compiled context."""
+    misses = prompt_context_cache_total.get(result="miss")
+    context = compile_context(PROJECT, CHARACTERS, MEMORY)
+    assert compile_context(dict(PROJECT), list(CHARACTERS), list(MEMORY)) is context
+    assert prompt_context_cache_total.get(result="miss") == misses + 1
+
+    # Changing the data renders a new block
+    edited = [{**CHARACTERS[0], "traits": "Cautious"}]
+    assert compile_context(PROJECT, edited, MEMORY) is not context
+
+def test_context_blocks_are_compact():
+    """Test the rendered blocks and that they beat raw dict dumps on size."""
+    context = compile_context(PROJECT, CHARACTERS, MEMORY)
+    assert context.project == "Genre: science fiction | Audience: young adult | Style: descriptive"
+    assert context.characters == (
+        "Mara Voss: Brave, intelligent, resourceful | wants: Seeking answers about the past"
+        " | ties: Mentored by the elder council"
+    )
+    assert context.memory.splitlines() == [
+        "Plot: The protagonist discovered a hidden map. The map leads to ancient technology.",
+        "World: The atmosphere enhances psychic abilities.",
+    ]
+    raw_dump = "\n".join(str(item) for item in CHARACTERS + MEMORY)
+    assert len(context.characters) + len(context.memory) < len(raw_dump) * 0.7
+
+def test_crews_share_the_compiled_context():
+    """Test that concurrent generations for one project reuse the same blocks."""
+    crews = [
+        SceneGenerationCrew(
+            project_id="project",
+            scene_id=f"scene-{number}",
+            word_count=500,
+            include_characters=["c1"],
+            include_memory=True,
+            project_metadata=PROJECT,
+            character_data=CHARACTERS,
+            memory_data=MEMORY,
+            llm=LocalLLM(model="local"),
+        )
+        for number in range(2)
+    ]
+    assert crews[0].context is crews[1].context
+    outline = crews[0].outline_task()
+    assert crews[0].context.characters in outline.description
+    assert "{'" not in crews[0].continuity_task(crews[0].prose_task(outline, crews[0].character_task(outline))).description
@@ -131,3 +131,395 @@ def test_scenes_api():
     
     assert scene1_pos == 3  # Our first scene should now be at position 3
     assert scene2_pos == 2  # Second scene should still be at position 2
+
+def test_bulk_scene_import():
+    """Test bulk scene creation from a JSON array and from NDJSON, with per-item results."""
+    import json
+
+    user_id = str(uuid.uuid4())
+    project_id = str(uuid.uuid4())
+    scene = lambda position: {
+        "title": f"Scene {position}",
+        "setting": "Harbor",
+        "mood": "Tense",
+        "conflict": "A storm is coming",
+        "characters": [],
+        "position": position,
+        "project_id": project_id,
+    }
+
+    # JSON array: invalid items are reported, valid ones stored
+    items = [scene(2), {"title": "Missing fields"}, scene(1)]
+    response = client.post("/scenes/bulk", json=items, headers={"x-user-id": user_id})
+    assert response.status_code == 200
+    result = response.json()
+    assert result["created"] == 2
+    assert result["failed"] == 1
+    assert [item["status"] for item in result["results"]] == ["created", "error", "created"]
+    assert result["results"][1]["index"] == 1
+
+    # NDJSON stream, including a line that is not JSON
+    lines = [json.dumps(scene(position)) for position in range(3, 1003)] + ["{not json"]
+    response = client.post(
+        "/scenes/bulk",
+        content="\n".join(lines) + "\n",
+        headers={"x-user-id": user_id, "content-type": "application/x-ndjson"}
+    )
+    assert response.status_code == 200
+    result = response.json()
+    assert result["created"] == 1000
+    assert result["results"][-1]["status"] == "error"
+
+    # Imported scenes are listed through the project index, in position order
+    response = client.get(f"/scenes/?project_id={project_id}", headers={"x-user-id": user_id})
+    scenes = response.json()
+    assert len(scenes) == 1002
+    assert [scene["position"] for scene in scenes[:3]] == [1, 2, 3]
+
+    # Bodies that are not a list are rejected outright
+    response = client.post("/scenes/bulk", json={"title": "x"}, headers={"x-user-id": user_id})
+    assert response.status_code == 400
+
+def test_manuscript_import():
+    """Test splitting a streamed manuscript into chapters and scenes with seeded history."""
+    from app.services.manuscript_import import ManuscriptSplitter
+
+    # Plaintext chapter lines and break markers; "Chapter" inside prose is not a heading
+    splitter = ManuscriptSplitter(extract_memory=True)
+    scenes = []
+    text = "Chapter 1: Arrival\n\nMara reached the harbor.\nChapter by chapter she read on.\n\n* * *\n\nShe met Tobias Reyne at dawn.\n"
+    for line in text.split("\n"):
+        scenes.extend(splitter.feed(line))
+    scenes.extend(splitter.finish())
+    assert [scene.title for scene in scenes] == ["Chapter 1: Arrival - Scene 1", "Chapter 1: Arrival - Scene 2"]
+    assert "Chapter by chapter" in scenes[0].content
+    assert scenes[1].memory_candidates == ["She met Tobias Reyne at dawn."]
+
+    # Paragraphs that merely start with a heading keyword stay prose
+    splitter = ManuscriptSplitter()
+    text = (
+        "Chapter Two\n\nShe waited.\n\nPart of her still believed him.\n\n"
+        "Book clubs met on Tuesdays, she remembered.\n\nPrologue\n\nLong before.\n"
+    )
+    scenes = []
+    for line in text.split("\n"):
+        scenes.extend(splitter.feed(line))
+    scenes.extend(splitter.finish())
+    assert [scene.chapter_title for scene in scenes] == ["Chapter Two", "Prologue"]
+    assert "Part of her still believed him." in scenes[0].content
+    assert "Book clubs met on Tuesdays" in scenes[0].content
+
+    user_id = str(uuid.uuid4())
+    project_id = str(uuid.uuid4())
+    client.post("/scenes/bulk", json=[{
+        "title": "Existing", "setting": "", "mood": "", "conflict": "",
+        "characters": [], "position": 4, "project_id": project_id,
+    }], headers={"x-user-id": user_id})
+
+    # Markdown manuscript, streamed in small chunks
+    chapters = []
+    for chapter in range(1, 4):
+        scenes_md = "\n\n---\n\n".join(f"Scene {n} of chapter {chapter}. The tide rose." for n in range(1, 11))
+        chapters.append(f"# Chapter {chapter}\n\n### Opening\n\n{scenes_md}\n")
+    manuscript = "\n".join(chapters).encode("utf-8")
+    body = (manuscript[i:i + 7] for i in range(0, len(manuscript), 7))
+    response = client.post(
+        f"/scenes/import?project_id={project_id}", content=body, headers={"x-user-id": user_id}
+    )
+    assert response.status_code == 200
+    result = response.json()
+    assert result["chapters"] == 3
+    assert result["scenes_created"] == 30
+    assert result["first_position"] == 5
+    assert result["words"] == 30 * 8
+
+    response = client.get(f"/scenes/?project_id={project_id}", headers={"x-user-id": user_id})
+    scenes = response.json()
+    assert len(scenes) == 31
+    assert scenes[1]["title"] == "Opening"
+    assert scenes[2]["title"] == "Chapter 1 - Scene 2"
+    assert [scene["position"] for scene in scenes[1:]] == list(range(5, 35))
+
+    response = client.get(
+        f"/scenes/{scenes[-1]['id']}/history?project_id={project_id}", headers={"x-user-id": user_id}
+    )
+    assert [entry["content"] for entry in response.json()] == ["Scene 10 of chapter 3. The tide rose."]
+
+    # Memory candidates are flagged for review until a person confirms them
+    response = client.post(
+        f"/scenes/import?project_id={project_id}&extract_memory=true",
+        content=b"The ferry left at noon. Later she met Tobias Reyne at dawn.\n",
+        headers={"x-user-id": user_id},
+    )
+    assert response.json()["memory_candidates"] == 1
+    scene_id = client.get(f"/scenes/?project_id={project_id}", headers={"x-user-id": user_id}).json()[-1]["id"]
+    memory = client.get(f"/memory/{scene_id}", headers={"x-user-id": user_id}).json()
+    assert [(entry["text"], entry["candidate"]) for entry in memory] == [("Later she met Tobias Reyne at dawn.", True)]
+    response = client.put(
+        f"/memory/{memory[0]['id']}", json={"text": memory[0]["text"], "category": "Character"},
+        headers={"x-user-id": user_id},
+    )
+    assert response.json()["candidate"] is False
+    assert client.get(f"/memory/{scene_id}", headers={"x-user-id": user_id}).json()[0]["candidate"] is False
+
+def test_scene_list_etag():
+    """Test conditional GET of the scene list: 304 until a scene write changes the ETag."""
+    user_id = str(uuid.uuid4())
+    project_id = str(uuid.uuid4())
+    headers = {"x-user-id": user_id}
+    scene = {
+        "title": "Opening", "setting": "Harbor", "mood": "Calm", "conflict": "None yet",
+        "characters": [], "position": 1, "project_id": project_id,
+    }
+    client.post("/scenes/", json=scene, headers=headers)
+
+    response = client.get(f"/scenes/?project_id={project_id}", headers=headers)
+    assert response.status_code == 200
+    etag = response.headers["etag"]
+    first_body = response.content
+
+    # Unchanged: 304, and a repeat without the header gets the same cached body
+    response = client.get(f"/scenes/?project_id={project_id}", headers={**headers, "if-none-match": etag})
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+    assert client.get(f"/scenes/?project_id={project_id}", headers=headers).content == first_body
+
+    # Another project's writes do not change this project's ETag
+    client.post("/scenes/", json={**scene, "project_id": str(uuid.uuid4())}, headers=headers)
+    response = client.get(f"/scenes/?project_id={project_id}", headers={**headers, "if-none-match": etag})
+    assert response.status_code == 304
+
+    # A reorder does
+    scene_id = client.get(f"/scenes/?project_id={project_id}", headers=headers).json()[0]["id"]
+    client.put("/scenes/reorder", json={"scene_id": scene_id, "new_position": 7, "project_id": project_id}, headers=headers)
+    response = client.get(f"/scenes/?project_id={project_id}", headers={**headers, "if-none-match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+    assert response.json()[0]["position"] == 7
+
+def test_scene_search():
+    """Test ranked full-text search over scene content and history, kept current by content updates."""
+    from app.routers.scenes import scene_search
+
+    headers = {"x-user-id": str(uuid.uuid4())}
+    project_id = str(uuid.uuid4())
+    client.post("/scenes/bulk", json=[
+        {"title": f"Scene {n}", "setting": "", "mood": "", "conflict": "", "characters": [],
+         "position": n, "project_id": project_id}
+        for n in range(3)
+    ], headers=headers)
+    scenes = client.get(f"/scenes/?project_id={project_id}", headers=headers).json()
+    contents = [
+        "The old lighthouse stood dark. Mara climbed the old lighthouse stairs twice.",
+        "A lighthouse is old when the keeper forgets it.",
+        "Nothing here but gulls.",
+    ]
+    for scene, content in zip(scenes, contents):
+        client.post(f"/scenes/{scene['id']}/content?project_id={project_id}", json={"content": content}, headers=headers)
+
+    search = lambda query, **params: client.get(
+        "/scenes/search", params={"project_id": project_id, "q": query, **params}, headers=headers
+    ).json()
+
+    # Both words anywhere vs. the exact phrase; more matches rank higher
+    result = search("old lighthouse")
+    assert [hit["title"] for hit in result["results"]] == ["Scene 0", "Scene 1"]
+    result = search('"old lighthouse"')
+    assert result["total"] == 1
+    hit = result["results"][0]
+    assert hit["matches"] == 2
+    start, end = hit["positions"][0]
+    assert contents[0][start:end] == "old lighthouse"
+    assert "Mara climbed" in hit["snippets"][0]
+
+    # A content update is reflected straight away; the old text stays findable in history
+    index_version = scene_search._projects[project_id].version
+    client.post(
+        f"/scenes/{scenes[2]['id']}/content?project_id={project_id}",
+        json={"content": "Gulls circled the old lighthouse."},
+        headers=headers,
+    )
+    assert scene_search._projects[project_id].version == index_version + 1
+    assert search('"old lighthouse"')["total"] == 2
+    assert search("nothing")["total"] == 0
+    result = search("nothing", include_history=True)
+    assert result["history_total"] == 1
+    assert result["history"][0]["scene_id"] == scenes[2]["id"]
+
+    # A patched revision is indexed with its text, not just its operations
+    url = f"/scenes/{scenes[1]['id']}/content?project_id={project_id}"
+    response = client.patch(url, json={"base_revision": 1, "ops": [
+        {"op": "edit", "index": 0, "offset": 2, "delete": 10, "insert": "zebra lighthouse"},
+    ]}, headers=headers)
+    assert response.status_code == 200
+    response = client.patch(url, json={"base_revision": 2, "ops": [
+        {"op": "edit", "index": 0, "offset": 2, "delete": 5, "insert": "quagga"},
+    ]}, headers=headers)
+    assert scene_search._projects[project_id].version == index_version + 3
+    assert search("zebra", include_history=True)["history_total"] == 1
+
+def test_manuscript_stats():
+    """Test that scene and project statistics follow each content save."""
+    headers = {"x-user-id": str(uuid.uuid4())}
+    project_id = str(uuid.uuid4())
+    client.post("/characters/", json={
+        "name": "Mara Voss", "traits": ["brave"], "motivation": "Answers", "project_id": project_id,
+    }, headers=headers)
+    client.post("/scenes/bulk", json=[
+        {"title": f"Scene {n}", "setting": "", "mood": "", "conflict": "", "characters": [],
+         "position": n, "project_id": project_id}
+        for n in range(2)
+    ], headers=headers)
+    first, second = client.get(f"/scenes/?project_id={project_id}", headers=headers).json()
+    save = lambda scene, content: client.post(
+        f"/scenes/{scene['id']}/content?project_id={project_id}", json={"content": content}, headers=headers
+    )
+
+    save(first, 'Mara Voss waited.\n\n"Where is he?" Mara asked. Voss was alone.')
+    save(second, "The harbor was quiet.")
+    stats = client.get(f"/scenes/{first['id']}/stats?project_id={project_id}", headers=headers).json()
+    assert (stats["words"], stats["dialogue_words"], stats["paragraphs"]) == (11, 3, 2)
+    assert stats["mentions"] == {"Mara Voss": 3}
+
+    project = client.get(f"/scenes/stats?project_id={project_id}", headers=headers).json()
+    assert (project["scenes"], project["words"]) == (2, 15)
+    assert project["dialogue_ratio"] == round(3 / 15, 3)
+
+    # A resave replaces the scene's share of the totals
+    save(first, "Nobody came.")
+    project = client.get(f"/scenes/stats?project_id={project_id}", headers=headers).json()
+    assert (project["scenes"], project["words"], project["dialogue_words"]) == (2, 6, 0)
+    assert project["mentions"] == {}
+
+def test_chunked_scene_content():
+    """Test paragraph and byte range reads and paragraph patches against a revision."""
+    headers = {"x-user-id": str(uuid.uuid4())}
+    project_id = str(uuid.uuid4())
+    scene = client.post("/scenes/", json={
+        "title": "Storm", "setting": "", "mood": "", "conflict": "", "characters": [],
+        "position": 0, "project_id": project_id,
+    }, headers=headers).json()
+    url = f"/scenes/{scene['id']}/content?project_id={project_id}"
+    paragraphs = [f"Paragraph {n}: the café shutters rattled." for n in range(5)]
+    content = "\n\n".join(paragraphs)
+    assert client.post(url, json={"content": content}, headers=headers).json()["revision"] == 1
+
+    # Listing scenes does not carry the prose
+    listed = client.get(f"/scenes/?project_id={project_id}", headers=headers).json()[0]
+    assert "content" not in listed
+
+    body = client.get(f"{url}&start=1&end=3", headers=headers).json()
+    assert body["paragraphs"] == paragraphs[1:3]
+    assert (body["paragraph_count"], body["total_bytes"]) == (5, len(content.encode("utf-8")))
+
+    response = client.get(url, headers={**headers, "range": "bytes=50-99"})
+    assert response.status_code == 206
+    assert response.content == content.encode("utf-8")[50:100]
+    assert response.headers["content-range"] == f"bytes 50-99/{body['total_bytes']}"
+    response = client.get(url, headers={**headers, "range": f"bytes={body['total_bytes']}-"})
+    assert response.status_code == 416
+
+    # Ranges starting or ending on the separator bytes between paragraphs
+    encoded = content.encode("utf-8")
+    first_end = len(paragraphs[0].encode("utf-8"))
+    for first, last in [(0, first_end), (0, first_end + 1), (first_end, first_end + 1), (first_end + 1, first_end + 4)]:
+        response = client.get(url, headers={**headers, "range": f"bytes={first}-{last}"})
+        assert response.content == encoded[first:last + 1]
+
+    # Replace paragraph 2 with two paragraphs
+    patch = {"start": 2, "end": 3, "paragraphs": ["New two.", "New three."], "base_revision": 1}
+    response = client.patch(url, json=patch, headers=headers)
+    assert response.status_code == 200
+    assert (response.json()["revision"], response.json()["paragraph_count"]) == (2, 6)
+    assert client.get(url, headers=headers).json()["paragraphs"][1:5] == [
+        paragraphs[1], "New two.", "New three.", paragraphs[3]
+    ]
+
+    # A patch against a stale revision is refused
+    assert client.patch(url, json=patch, headers=headers).status_code == 409
+    assert client.patch(url, json={**patch, "base_revision": 2, "end": 9}, headers=headers).status_code == 400
+
+    history = client.get(f"/scenes/{scene['id']}/history?project_id={project_id}", headers=headers).json()
+    assert "New three." in history[0]["content"]
+
+def test_concurrent_scene_patches():
+    """Test that patches against a stale revision are merged, with compact history."""
+    from app.routers.scenes import scene_history_db
+
+    headers = {"x-user-id": str(uuid.uuid4())}
+    project_id = str(uuid.uuid4())
+    scene = client.post("/scenes/", json={
+        "title": "Harbor", "setting": "", "mood": "", "conflict": "", "characters": [],
+        "position": 0, "project_id": project_id,
+    }, headers=headers).json()
+    url = f"/scenes/{scene['id']}/content?project_id={project_id}"
+    client.post(url, json={"content": "The storm came.\n\nMara waited.\n\nSilence."}, headers=headers)
+
+    # Two editors patch revision 1; the second is merged over the first
+    first = client.patch(url, json={"base_revision": 1, "ops": [
+        {"op": "splice", "index": 0, "insert": ["Night fell."]},
+    ]}, headers=headers)
+    assert first.json()["revision"] == 2
+    second = client.patch(url, json={"base_revision": 1, "ops": [
+        {"op": "edit", "index": 1, "offset": 5, "delete": 6, "insert": "paced"},
+    ]}, headers=headers)
+    assert second.status_code == 200
+    assert second.json()["ops"][0]["index"] == 2
+    assert client.get(url, headers=headers).json()["paragraphs"] == [
+        "Night fell.", "The storm came.", "Mara paced.", "Silence."
+    ]
+
+    # A patch overlapping a concurrent change is refused
+    conflict = client.patch(url, json={"base_revision": 2, "ops": [
+        {"op": "edit", "index": 2, "offset": 5, "delete": 5, "insert": "stood"},
+    ]}, headers=headers)
+    assert conflict.status_code == 409
+
+    # History stores operations for patches, but reads back full content
+    stored = scene_history_db[scene["id"]]
+    assert "content" not in stored[-1] and stored[-1]["ops"]
+    history = client.get(f"/scenes/{scene['id']}/history?project_id={project_id}", headers=headers).json()
+    assert history[0]["content"] == "Night fell.\n\nThe storm came.\n\nMara paced.\n\nSilence."
+    assert history[1]["content"] == "Night fell.\n\nThe storm came.\n\nMara waited.\n\nSilence."
+
+    # Patches committed in the opposite order to their timestamps (workers racing)
+    from app.utils.state import edit
+    with edit(scene_history_db, scene["id"]) as entries:
+        entries[-1]["timestamp"], entries[-2]["timestamp"] = entries[-2]["timestamp"], entries[-1]["timestamp"]
+    response = client.get(f"/scenes/{scene['id']}/history?project_id={project_id}", headers=headers)
+    assert response.json()[0]["content"] == "Night fell.\n\nThe storm came.\n\nMara paced.\n\nSilence."
+
+def test_first_patch_stores_history_snapshot():
+    """Test that history rebuilds when a scene's first history entry is a patch."""
+    from app.routers.scenes import scene_history_db, scenes_db
+    from app.services.scene_content import materialize_history
+    from app.utils.state import edit
+
+    headers = {"x-user-id": str(uuid.uuid4())}
+    project_id = str(uuid.uuid4())
+    scene = client.post("/scenes/", json={
+        "title": "Quay", "setting": "", "mood": "", "conflict": "", "characters": [],
+        "position": 0, "project_id": project_id,
+    }, headers=headers).json()
+    # Content embedded in the record, as written before the content store existed
+    with edit(scenes_db, scene["id"]) as record:
+        record["content"] = "Fog.\n\nMara waited."
+
+    url = f"/scenes/{scene['id']}/content?project_id={project_id}"
+    response = client.patch(url, json={"base_revision": 1, "ops": [
+        {"op": "edit", "index": 1, "offset": 5, "delete": 6, "insert": "paced"},
+    ]}, headers=headers)
+    assert response.status_code == 200
+    assert scene_history_db[scene["id"]][0]["content"] == "Fog.\n\nMara paced."
+
+    history = client.get(f"/scenes/{scene['id']}/history?project_id={project_id}", headers=headers)
+    assert history.status_code == 200
+    assert [entry["content"] for entry in history.json()] == ["Fog.\n\nMara paced."]
+    search = client.get(
+        f"/scenes/search?project_id={project_id}&q=paced&include_history=true", headers=headers
+    )
+    assert search.status_code == 200
+
+    # Older histories without a snapshot read back instead of failing
+    ops = [{"op": "edit", "index": 1, "offset": 0, "delete": 0, "insert": "x"}]
+    assert materialize_history([{"id": "h1", "ops": ops}])[0]["content"] == ""
@@ -0,0 +1,123 @@
+"""
+Test generation rate limiting and fair scheduling.
+"""
+
+import asyncio
+import uuid
+
+from fastapi.testclient import TestClient
+from app.main import app
+from app.services import scheduler
+from app.services.scheduler import BucketConfig, GenerationScheduler
+
+client = TestClient(app)
+
+def test_generation_rate_limit(monkeypatch):
+    """Test that a user's burst is enforced with 429 and rate limit headers."""
+    monkeypatch.setenv("GHOSTWRITERS_USER_BURST", "2")
+    monkeypatch.setenv("GHOSTWRITERS_USER_RATE", "1")
+    monkeypatch.setattr(scheduler, "_scheduler", None)
+    user_id = str(uuid.uuid4())
+
+    project_id = str(uuid.uuid4())
+
+    def start_generation(scene_id=None):
+        return client.post(
+            "/agents/generate/scene/stream",
+            json={
+                "scene_id": scene_id or str(uuid.uuid4()),
+                "project_id": project_id,
+                "word_count": 500,
+            },
+            headers={"x-user-id": user_id}
+        )
+
+    response = start_generation("first")
+    assert response.status_code == 200
+    assert response.headers["x-ratelimit-limit"] == "2"
+    assert response.headers["x-ratelimit-remaining"] == "1"
+    first_id = response.json()["generation_id"]
+
+    assert start_generation().status_code == 200
+
+    response = start_generation()
+    assert response.status_code == 429
+    assert response.headers["x-ratelimit-remaining"] == "0"
+    assert 0 < int(response.headers["retry-after"]) <= 60
+
+    # Retrying a generation that is still queued attaches to it without spending a token
+    retry = start_generation("first")
+    assert retry.status_code == 200
+    assert retry.json()["generation_id"] == first_id
+
+    # Other users have their own bucket
+    response = client.post(
+        "/agents/generate/scene/stream",
+        json={"scene_id": "s", "project_id": str(uuid.uuid4()), "word_count": 500},
+        headers={"x-user-id": str(uuid.uuid4())}
+    )
+    assert response.status_code == 200
+
+def test_fair_slot_scheduling():
+    """Test that slots go to interactive work first and round-robin between tenants."""
+    sched = GenerationScheduler(
+        user_limit=BucketConfig(capacity=100, per_minute=100),
+        project_limit=BucketConfig(capacity=100, per_minute=100),
+        slots=1,
+    )
+    order = []
+
+    async def generation(tenant, lane, label):
+        async with sched.slot(tenant, lane=lane):
+            order.append(label)
+            await asyncio.sleep(0)
+
+    async def run():
+        # Hold the only slot while everything else queues up
+        async with sched.slot("holder"):
+            tasks = [
+                asyncio.create_task(generation("batcher", "batch", "batch-1")),
+                asyncio.create_task(generation("heavy", "interactive", "heavy-1")),
+                asyncio.create_task(generation("heavy", "interactive", "heavy-2")),
+                asyncio.create_task(generation("heavy", "interactive", "heavy-3")),
+                asyncio.create_task(generation("light", "interactive", "light-1")),
+            ]
+            await asyncio.sleep(0)
+            assert sched.stats()["queued_interactive"] == 4
+            assert sched.stats()["queued_batch"] == 1
+        await asyncio.gather(*tasks)
+
+    asyncio.run(run())
+
+    # The light tenant is not stuck behind the heavy tenant's backlog,
+    # and batch work runs once interactive work has drained
+    assert order == ["heavy-1", "light-1", "heavy-2", "heavy-3", "batch-1"]
+    assert sched.stats()["busy"] == 0
+    # Tenants with nothing queued are forgotten once the virtual clock passes them
+    assert sched._finish_tags == {"interactive": {}, "batch": {}}
+
+def test_batch_lane_is_not_starved():
+    """Test that batch work that waited past max_batch_wait jumps the interactive lane."""
+    sched = GenerationScheduler(
+        user_limit=BucketConfig(capacity=1, per_minute=1),
+        project_limit=BucketConfig(capacity=1, per_minute=1),
+        slots=1,
+        max_batch_wait=0,
+    )
+    order = []
+
+    async def generation(lane):
+        async with sched.slot("tenant", lane=lane):
+            order.append(lane)
+
+    async def run():
+        async with sched.slot("holder"):
+            tasks = [
+                asyncio.create_task(generation("batch")),
+                asyncio.create_task(generation("interactive")),
+            ]
+            await asyncio.sleep(0.01)
+        await asyncio.gather(*tasks)
+
+    asyncio.run(run())
+    assert order == ["batch", "interactive"]
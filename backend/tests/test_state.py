@@ -0,0 +1,75 @@
+"""
+Test shared state backend functionality.
+"""
+
+from datetime import datetime
+from app.utils import state
+
+def test_sqlite_state_backend(tmp_path, monkeypatch):
+    """Test that SQLite collections behave like dicts and are shared between stores."""
+    monkeypatch.setenv("GHOSTWRITERS_STATE_BACKEND", "sqlite")
+    monkeypatch.setenv("GHOSTWRITERS_STATE_PATH", str(tmp_path / "state.db"))
+    monkeypatch.setattr(state, "_store", None)
+
+    scenes_db = state.collection("scenes")
+    created_at = datetime.now()
+    scenes_db["s1"] = {"id": "s1", "position": 1, "created_at": created_at}
+    scenes_db["s2"] = {"id": "s2", "position": 2, "created_at": created_at}
+
+    # Values round-trip with their types
+    assert scenes_db["s1"]["created_at"] == created_at
+    assert len(scenes_db) == 2
+    assert "s2" in scenes_db
+    assert sorted(scene["id"] for scene in scenes_db.values()) == ["s1", "s2"]
+
+    # Atomic read-modify-write persists nested changes
+    with state.edit(scenes_db, "s1") as scene:
+        scene["position"] = 5
+    assert scenes_db["s1"]["position"] == 5
+
+    history_db = state.collection("scene_history")
+    with state.edit(history_db, "s1", list) as history:
+        history.append("v1")
+    with state.edit(history_db, "s1", list) as history:
+        history.append("v2")
+    assert history_db["s1"] == ["v1", "v2"]
+
+    # A failed edit is rolled back
+    try:
+        with state.edit(scenes_db, "s2") as scene:
+            scene["position"] = 99
+            raise ValueError("boom")
+    except ValueError:
+        pass
+    assert scenes_db["s2"]["position"] == 2
+
+    # A second store on the same file (another worker process) sees the data
+    other = state.SQLiteCollection(state.SQLiteStore(str(tmp_path / "state.db")), "scenes")
+    assert other["s1"]["position"] == 5
+
+    # Collections are isolated from each other
+    del scenes_db["s2"]
+    assert "s2" not in other
+    assert len(history_db) == 1
+
+def test_sqlite_bulk_writes_and_secondary_index(tmp_path, monkeypatch):
+    """Test batch writes, batch reads and secondary indexes on the SQLite backend."""
+    monkeypatch.setenv("GHOSTWRITERS_STATE_BACKEND", "sqlite")
+    monkeypatch.setenv("GHOSTWRITERS_STATE_PATH", str(tmp_path / "state.db"))
+    monkeypatch.setattr(state, "_store", None)
+
+    scenes_db = state.collection("scenes")
+    scenes_db["old"] = {"id": "old", "project_id": "p1"}
+    # Existing records are indexed when the index is created
+    by_project = state.SecondaryIndex("scenes_by_project", scenes_db, "project_id")
+    assert by_project.ids("p1") == ["old"]
+
+    records = [{"id": f"s{number}", "project_id": f"p{number % 2}"} for number in range(1000)]
+    with state.transaction():
+        state.put_many(scenes_db, ((record["id"], record) for record in records))
+        by_project.add(records)
+
+    assert len(scenes_db) == 1001
+    assert len(by_project.records("p0")) == 500
+    assert [record["id"] for record in by_project.records("p1")][:2] == ["old", "s1"]
+    assert state.get_many(scenes_db, ["s3", "missing", "s2"]) == [records[3], records[2]]
@@ -0,0 +1,95 @@
+"""
+Test character voice profiles.
+"""
+
+import uuid
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.routers.agents import SceneGenerationRequest, scene_crew_inputs
+from app.services.prompt_context import compile_context
+from app.services.voice_profiles import attributed_dialogue, derive_profile, render_profile, voice_profiles_total
+
+client = TestClient(app)
+
+MARA = {
+    "name": "Mara Voss",
+    "traits": ["brave", "suspicious"],
+    "motivation": "Find her brother",
+    "background": "Grew up on the docks",
+    "relationships": {"Tobias": "distrusts him"},
+}
+TOBIAS = {"name": "Tobias Reed", "traits": ["kind"], "motivation": "Keep the peace"}
+SCENE = (
+    'Mara leaned on the rail. "Where\'s the ledger?" she asked. "Not tonight."\n\n'
+    'Tobias shook his head. "You should rest, Mara."\n\n'
+    'Mara didn\'t move. "The ledger. Now!"\n\n'
+    'Voss laughed. "Who\'s counting?"'
+)
+
+
+def test_profile_from_traits_and_dialogue():
+    """Test that dialogue is attributed by paragraph and the profile renders as one line."""
+    lines = attributed_dialogue(MARA, [TOBIAS], [SCENE])
+    assert lines == ["Where's the ledger?", "Not tonight.", "The ledger. Now!", "Who's counting?"]
+
+    profile = derive_profile(MARA, lines)
+    assert profile["tones"] == ["direct", "guarded"]
+    assert profile["habits"] == ["short clipped sentences", "asks questions", "exclaims", "uses contractions"]
+    assert profile["favourite_words"] == ["ledger"]
+    assert render_profile(MARA["name"], profile) == (
+        'Mara Voss: voice: direct, guarded; short clipped sentences, asks questions, exclaims,'
+        ' uses contractions; favours "ledger" | wants: Find her brother | to Tobias: distrusts him'
+        ' | e.g. "Not tonight." / "Who\'s counting?"'
+    )
+
+    # Without dialogue the profile comes from the record alone
+    assert render_profile(TOBIAS["name"], derive_profile(TOBIAS, [])) == (
+        "Tobias Reed: voice: warm | wants: Keep the peace"
+    )
+
+
+def test_profile_is_cached_and_rebuilt_on_edit():
+    """Test that a profile is derived once, reused, and derived again after the character is edited."""
+    user_id = str(uuid.uuid4())
+    headers = {"x-user-id": user_id}
+    project_id = client.post("/projects/", json={
+        "title": "Voices", "description": "d", "genre": "Mystery", "audience": "Adult",
+        "writing_style": "Noir", "story_length": "Novel"
+    }, headers=headers).json()["id"]
+    character = client.post("/characters/", json={**MARA, "project_id": project_id}, headers=headers).json()
+    client.post("/characters/", json={**TOBIAS, "project_id": project_id}, headers=headers)
+    scene = client.post("/scenes/", json={
+        "title": "Docks", "setting": "Harbour", "mood": "Tense", "conflict": "The ledger",
+        "characters": [character["id"]], "position": 1, "project_id": project_id
+    }, headers=headers).json()
+    client.post(f"/scenes/{scene['id']}/content?project_id={project_id}", json={"content": SCENE}, headers=headers)
+
+    url = f"/characters/{character['id']}/voice"
+    derived = voice_profiles_total.get(result="derived")
+    first = client.get(url, headers=headers).json()
+    assert first["profile"]["dialogue_lines"] == 4
+    assert first["prompt"].startswith("Mara Voss: voice: direct, guarded")
+    assert client.get(url, headers=headers).json()["profile"] == first["profile"]
+    assert voice_profiles_total.get(result="derived") == derived + 1
+
+    # The crew gets the voice line, and the prompt uses it instead of the trait dump
+    inputs = scene_crew_inputs(SceneGenerationRequest(
+        scene_id=scene["id"], project_id=project_id, word_count=500, include_characters=[character["id"]]
+    ))
+    assert inputs["character_data"][0]["voice"] == first["prompt"]
+    context = compile_context(inputs["project_metadata"], inputs["character_data"], [])
+    assert context.characters == first["prompt"]
+    assert voice_profiles_total.get(result="derived") == derived + 1
+
+    # Editing the character drops the cached profile
+    response = client.put(f"/characters/{character['id']}", json={**MARA, "traits": ["cheerful"]}, headers=headers)
+    assert response.status_code == 200
+    assert response.json()["created_at"] == character["created_at"]
+    edited = client.get(url, headers=headers).json()
+    assert edited["prompt"].startswith("Mara Voss: voice: upbeat;")
+    assert voice_profiles_total.get(result="derived") == derived + 2
+
+    assert client.put("/characters/missing", json=MARA, headers=headers).status_code == 404
+    assert client.get("/characters/missing/voice", headers=headers).status_code == 404